@@ -1,17 +1,98 @@
 import sqlite3
 
+import trigram_index
+
 """this script is responsible of creating all the tables in the database as well as defining all the primary and foreign keys"""
 
-conn = sqlite3.connect('mySchool.db')
-conn.execute("PRAGMA foreign_keys = ON;")
+# counters read by the Reports tab, kept up to date by the triggers below instead of counting the rows on every refresh
+SUMMARY_TABLES = [
+    "CREATE TABLE course_enrollment_counts(course_id TEXT PRIMARY KEY, students INTEGER NOT NULL DEFAULT 0);",
+    "CREATE TABLE instructor_course_load(instructor_id TEXT PRIMARY KEY, courses INTEGER NOT NULL DEFAULT 0);",
+    "CREATE TABLE student_course_counts(student_id TEXT PRIMARY KEY, courses INTEGER NOT NULL DEFAULT 0);",
+    "CREATE INDEX idx_student_course_counts_courses ON student_course_counts(courses);",
+    # registrations, also deleted by the cascades when their student or course is deleted
+    """CREATE TRIGGER summary_registered_courses_insert AFTER INSERT ON registered_courses BEGIN
+        UPDATE course_enrollment_counts SET students = students + 1 WHERE course_id = new.course_id;
+        UPDATE student_course_counts SET courses = courses + 1 WHERE student_id = new.student_id;
+    END;""",
+    """CREATE TRIGGER summary_registered_courses_delete AFTER DELETE ON registered_courses BEGIN
+        UPDATE course_enrollment_counts SET students = students - 1 WHERE course_id = old.course_id;
+        UPDATE student_course_counts SET courses = courses - 1 WHERE student_id = old.student_id;
+    END;""",
+    """CREATE TRIGGER summary_students_insert AFTER INSERT ON students BEGIN
+        INSERT INTO student_course_counts(student_id) VALUES (new.student_id);
+    END;""",
+    """CREATE TRIGGER summary_students_delete AFTER DELETE ON students BEGIN
+        DELETE FROM student_course_counts WHERE student_id = old.student_id;
+    END;""",
+    """CREATE TRIGGER summary_instructors_insert AFTER INSERT ON instructors BEGIN
+        INSERT INTO instructor_course_load(instructor_id) VALUES (new.instructor_id);
+    END;""",
+    """CREATE TRIGGER summary_instructors_delete AFTER DELETE ON instructors BEGIN
+        DELETE FROM instructor_course_load WHERE instructor_id = old.instructor_id;
+    END;""",
+    # assignments, also set to NULL by the foreign key when the instructor is deleted
+    """CREATE TRIGGER summary_courses_insert AFTER INSERT ON courses BEGIN
+        INSERT INTO course_enrollment_counts(course_id) VALUES (new.course_id);
+        UPDATE instructor_course_load SET courses = courses + 1 WHERE instructor_id = new.instructor_id;
+    END;""",
+    """CREATE TRIGGER summary_courses_assign AFTER UPDATE OF instructor_id ON courses WHEN new.instructor_id IS NOT old.instructor_id BEGIN
+        UPDATE instructor_course_load SET courses = courses - 1 WHERE instructor_id = old.instructor_id;
+        UPDATE instructor_course_load SET courses = courses + 1 WHERE instructor_id = new.instructor_id;
+    END;""",
+    """CREATE TRIGGER summary_courses_delete AFTER DELETE ON courses BEGIN
+        DELETE FROM course_enrollment_counts WHERE course_id = old.course_id;
+        UPDATE instructor_course_load SET courses = courses - 1 WHERE instructor_id = old.instructor_id;
+    END;""",
+]
+
+def create_tables(conn):
+    """
+    Creates the tables of the tkinter application in an open connection (used by this script and by the tools working on a copy of the schema)
+
+    Args:
+        type conn: sqlite3.Connection
+        conn: connection to the database in which the tables are created
+    """
+    conn.execute("PRAGMA foreign_keys = ON;")
+
+    cursor = conn.cursor()
+
+    cursor.execute("CREATE TABLE if not exists students(student_id TEXT PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL, email TEXT NOT NULL);")
+    cursor.execute("CREATE TABLE if not exists instructors(instructor_id TEXT PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL, email TEXT NOT NULL);")
+    cursor.execute("CREATE TABLE if not exists courses(course_id TEXT PRIMARY KEY, name TEXT NOT NULL, instructor_id TEXT, FOREIGN KEY(instructor_id) REFERENCES instructors(instructor_id) ON DELETE SET NULL ON UPDATE NO ACTION);")
+
+    cursor.execute("CREATE TABLE if not exists registered_courses(student_id TEXT NOT NULL, course_id TEXT NOT NULL, PRIMARY KEY(student_id, course_id), FOREIGN KEY(student_id) REFERENCES students(student_id) ON DELETE CASCADE ON UPDATE NO ACTION, FOREIGN KEY(course_id) REFERENCES courses(course_id) ON DELETE CASCADE ON UPDATE NO ACTION)")
+    # time slot of every course, computed by timetable.py
+    cursor.execute("CREATE TABLE if not exists course_timeslots(course_id TEXT PRIMARY KEY, timeslot INTEGER NOT NULL, FOREIGN KEY(course_id) REFERENCES courses(course_id) ON DELETE CASCADE ON UPDATE NO ACTION)")
+    conn.commit()
 
-cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='course_enrollment_counts'")
+    if cursor.fetchone() is None:
+        create_summary_tables(conn)
+    trigram_index.create_index(conn, trigram_index.TKINTER) # typo tolerant search of the Search tab, once per database
 
-cursor.execute("CREATE TABLE if not exists students(student_id TEXT PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL, email TEXT NOT NULL);")
-cursor.execute("CREATE TABLE if not exists instructors(instructor_id TEXT PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL, email TEXT NOT NULL);")
-cursor.execute("CREATE TABLE if not exists courses(course_id TEXT PRIMARY KEY, name TEXT NOT NULL, instructor_id TEXT, FOREIGN KEY(instructor_id) REFERENCES instructors(instructor_id) ON DELETE SET NULL ON UPDATE NO ACTION);")
+def create_summary_tables(conn):
+    """
+    Creates the summary tables and their triggers, and fills them from the records already in the database, in one transaction
 
-cursor.execute("CREATE TABLE if not exists registered_courses(student_id TEXT NOT NULL, course_id TEXT NOT NULL, PRIMARY KEY(student_id, course_id), FOREIGN KEY(student_id) REFERENCES students(student_id) ON DELETE CASCADE ON UPDATE NO ACTION, FOREIGN KEY(course_id) REFERENCES courses(course_id) ON DELETE CASCADE ON UPDATE NO ACTION)")
-conn.commit()
+    Args:
+        type conn: sqlite3.Connection
+        conn: connection to the database, with no transaction in progress
+    """
+    conn.execute("BEGIN") # or the CREATE statements would be committed on their own, and not retried after a failure
+    try:
+        for statement in SUMMARY_TABLES:
+            conn.execute(statement)
+        conn.execute("INSERT INTO course_enrollment_counts SELECT course_id, (SELECT COUNT(*) FROM registered_courses r WHERE r.course_id = courses.course_id) FROM courses;")
+        conn.execute("INSERT INTO instructor_course_load SELECT instructor_id, (SELECT COUNT(*) FROM courses c WHERE c.instructor_id = instructors.instructor_id) FROM instructors;")
+        conn.execute("INSERT INTO student_course_counts SELECT student_id, (SELECT COUNT(*) FROM registered_courses r WHERE r.student_id = students.student_id) FROM students;")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
 
-conn.close()
\ No newline at end of file
+if __name__ == "__main__":
+    conn = sqlite3.connect('mySchool.db')
+    create_tables(conn)
+    conn.close()
@@ -0,0 +1,610 @@
+"""
+Headless benchmark suite for the data layers of the School Management System.
+
+Synthetic schools are generated and loaded into the three storage formats of the project: the JSON file read by
+:class:`classes.School`, the PyQt database of :mod:`school_db` and the tkinter database created by :mod:`DDL_sql`.
+The core operations of each layer are then timed and the results are written as JSON so runs can be compared.
+
+Usage::
+
+    python benchmark.py --sizes 1000 100000 1000000 --enrollments 3 --output benchmark_results.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import classes
+import dedup
+import school_db
+import school_snapshot
+import timetable
+from DDL_sql import create_tables
+from sharded_school import ShardedSchool, shard_of
+
+
+def generate_school(n_students, enrollments_per_student=3, n_courses=None, n_instructors=None, seed=0):
+    """
+    Generates a synthetic school in the JSON format read by :class:`classes.School`.
+
+    :param n_students: Number of students to generate.
+    :type n_students: int
+    :param enrollments_per_student: Number of distinct courses each student is registered in.
+    :type enrollments_per_student: int
+    :param n_courses: Number of courses, defaults to one course per 50 students (at least 10).
+    :type n_courses: int
+    :param n_instructors: Number of instructors, defaults to one instructor per 3 courses (at least 5).
+    :type n_instructors: int
+    :param seed: Seed of the random generator, the same seed always gives the same school.
+    :type seed: int
+    :return: A dictionary with the ``students``, ``instructors`` and ``courses`` lists.
+    :rtype: dict
+    """
+    rng = random.Random(seed)
+    if n_courses is None:
+        n_courses = max(10, n_students // 50)
+    if n_instructors is None:
+        n_instructors = max(5, n_courses // 3)
+    enrollments_per_student = min(enrollments_per_student, n_courses)
+
+    instructors = [{'id': f"I{i:06d}", 'name': f"Instructor {i}", 'age': rng.randint(25, 70), 'email': f"instructor{i}@school.edu"}
+                   for i in range(n_instructors)]
+    # one course out of four is left without instructor
+    courses = [{'id': f"C{i:06d}", 'name': f"Course {i}", 'instructor_id': instructors[i % n_instructors]['id'] if i % 4 else ""}
+               for i in range(n_courses)]
+    students = [{'id': f"S{i:07d}", 'name': f"Student {i}", 'age': rng.randint(17, 30), 'email': f"student{i}@school.edu",
+                 'courses': [courses[j]['id'] for j in rng.sample(range(n_courses), enrollments_per_student)]}
+                for i in range(n_students)]
+    return {'students': students, 'instructors': instructors, 'courses': courses}
+
+
+def build_pyqt_db(data, path):
+    """
+    Creates the PyQt database (:func:`school_db.init_db` schema) at ``path`` and bulk loads a generated school into it.
+    :data:`school_db.DB_PATH` is left pointing at the new database.
+    """
+    school_db.DB_PATH = path
+    school_db.init_db()
+    conn = school_db.connect()
+    conn.executemany('INSERT INTO instructors (name, age, email, instructor_id) VALUES (?, ?, ?, ?)',
+                     ((x['name'], x['age'], x['email'], x['id']) for x in data['instructors']))
+    instructor_rowids = dict(conn.execute('SELECT instructor_id, id FROM instructors'))
+    conn.executemany('INSERT INTO courses (course_id, course_name, instructor_id) VALUES (?, ?, ?)',
+                     ((x['id'], x['name'], instructor_rowids.get(x['instructor_id'])) for x in data['courses']))
+    conn.executemany('INSERT INTO students (name, age, email, student_id) VALUES (?, ?, ?, ?)',
+                     ((x['name'], x['age'], x['email'], x['id']) for x in data['students']))
+    course_rowids = dict(conn.execute('SELECT course_id, id FROM courses'))
+    student_rowids = dict(conn.execute('SELECT student_id, id FROM students'))
+    conn.executemany('INSERT INTO enrollments (student_id, course_id) VALUES (?, ?)',
+                     ((student_rowids[x['id']], course_rowids[c]) for x in data['students'] for c in x['courses']))
+    conn.commit()
+    conn.close()
+
+
+def build_tkinter_db(data, path):
+    """
+    Creates the tkinter database (:func:`DDL_sql.create_tables` schema) at ``path`` and bulk loads a generated school into it.
+
+    :return: An open connection to the new database, with foreign keys enabled like in the application.
+    :rtype: sqlite3.Connection
+    """
+    conn = sqlite3.connect(path)
+    create_tables(conn)
+    conn.executemany("INSERT INTO instructors VALUES(?, ?, ?, ?)", ((x['id'], x['name'], x['age'], x['email']) for x in data['instructors']))
+    conn.executemany("INSERT INTO courses VALUES(?, ?, ?)", ((x['id'], x['name'], x['instructor_id'] or None) for x in data['courses']))
+    conn.executemany("INSERT INTO students VALUES(?, ?, ?, ?)", ((x['id'], x['name'], x['age'], x['email']) for x in data['students']))
+    conn.executemany("INSERT INTO registered_courses VALUES(?, ?)", ((x['id'], c) for x in data['students'] for c in x['courses']))
+    conn.commit()
+    return conn
+
+
+class Recorder(object):
+    """
+    Collects the timings of one benchmark run and prints them as they come.
+
+    :param size: Number of students of the school being measured.
+    :type size: int
+    :param enrollments: Number of enrollments per student of the school being measured.
+    :type enrollments: int
+    """
+    def __init__(self, size, enrollments):
+        self.size = size
+        self.enrollments = enrollments
+        self.results = []
+
+    def measure(self, group, operation, fn, calls=1):
+        """
+        Times ``calls`` successive calls of ``fn(i)``, with ``i`` going from 0 to calls-1, and records the result.
+
+        :return: The value returned by the last call.
+        """
+        value = None
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): # classes.School prints after every operation
+            for i in range(calls):
+                value = fn(i)
+        self.record(group, operation, time.perf_counter() - start, calls)
+        return value
+
+    def record(self, group, operation, seconds, calls=1):
+        """
+        Records a timing measured by the caller.
+        """
+        self.results.append({'group': group, 'operation': operation, 'students': self.size,
+                             'enrollments_per_student': self.enrollments, 'calls': calls,
+                             'seconds': seconds, 'per_call': seconds / calls})
+        print(f"{self.size:>9} {group:<8} {operation:<45} {seconds / calls * 1000:12.3f} ms/call")
+
+
+def bench_json(rec, data, workdir, calls):
+    """
+    Times the :class:`classes.School` JSON layer: loading, saving (whole file and journal) and the methods changing the school.
+    """
+    path = os.path.join(workdir, 'school.json')
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    school = rec.measure('json', 'School(json_file)', lambda i: classes.School(path))
+    rec.measure('json', 'School.save_to_json', lambda i: school.save_to_json())
+    rec.measure('json', 'School.add_student_to_school', lambda i: school.add_student_to_school(f"N{i:07d}", f"New {i}", 20, f"new{i}@school.edu"), calls)
+    rec.measure('json', 'School.add_instructor_to_school', lambda i: school.add_instructor_to_school(f"J{i:06d}", f"New {i}", 40, f"newi{i}@school.edu"), calls)
+    rec.measure('json', 'School.add_course_to_school', lambda i: school.add_course_to_school(f"D{i:06d}", f"New course {i}"), calls)
+    # the students added above have no course yet, so every registration is new
+    rec.measure('json', 'School.register_course', lambda i: school.register_course(f"N{i:07d}", data['courses'][i % len(data['courses'])]['id']), calls)
+    rec.measure('json', 'School.save (journal)', lambda i: school.save())
+
+
+def build_school(data):
+    """
+    Builds a :class:`classes.School` from a generated school. Registrations are resolved with a dict, loading the JSON
+    file scans the courses for every registration, which is too slow for a million students.
+    """
+    school = classes.School()
+    instructors = {}
+    for x in data['instructors']:
+        instructors[x['id']] = classes.Instructor(x['id'], x['name'], x['age'], x['email'])
+        school.instructors.append(instructors[x['id']])
+    courses = {}
+    for x in data['courses']:
+        courses[x['id']] = classes.Course(x['id'], x['name'])
+        school.courses.append(courses[x['id']])
+        if x['instructor_id']:
+            instructors[x['instructor_id']].assign_course(courses[x['id']])
+    for x in data['students']:
+        student = classes.Student(x['id'], x['name'], x['age'], x['email'])
+        school.students.append(student)
+        for course_id in x['courses']:
+            student.register_course(courses[course_id])
+    return school
+
+
+def loop_age_histogram(school):
+    counts = {}
+    for x in school.students:
+        counts[x.age] = counts.get(x.age, 0) + 1
+    return sorted(counts.items())
+
+
+def loop_students_per_course(school):
+    counts = {x.course_id: 0 for x in school.courses}
+    for x in school.students:
+        for course in x.registered_courses:
+            counts[course.course_id] += 1
+    return counts
+
+
+def loop_course_overlap(school):
+    shared = {}
+    for x in school.students:
+        for pair in itertools.combinations(sorted(c.course_id for c in x.registered_courses), 2):
+            shared[pair] = shared.get(pair, 0) + 1
+    return shared
+
+
+def bench_analytics(rec, data, workdir, calls):
+    """
+    Times the statistics of :mod:`school_analytics` against the same statistics computed by loops over the Student objects.
+    Needs NumPy, the group is skipped without it.
+    """
+    if importlib.util.find_spec('numpy') is None:
+        print(f"{rec.size:>9} analytics skipped: NumPy not installed")
+        return
+    from school_analytics import SchoolArrays
+    school = build_school(data)
+    rec.measure('analytics', 'age histogram (loop)', lambda i: loop_age_histogram(school))
+    rec.measure('analytics', 'students per course (loop)', lambda i: loop_students_per_course(school))
+    rec.measure('analytics', 'course overlap (loop)', lambda i: loop_course_overlap(school))
+    arrays = rec.measure('analytics', 'SchoolArrays.from_school', lambda i: SchoolArrays.from_school(school))
+    path = os.path.join(workdir, 'school.snap')
+    school_snapshot.write_snapshot(school, path)
+    rec.measure('analytics', 'SchoolArrays.from_snapshot', lambda i: SchoolArrays.from_snapshot(path))
+    rec.measure('analytics', 'age_histogram', lambda i: arrays.age_histogram(), calls)
+    rec.measure('analytics', 'students_per_course', lambda i: arrays.students_per_course(), calls)
+    rec.measure('analytics', 'course_overlap', lambda i: arrays.course_overlap())
+
+
+def bench_snapshot(rec, data, workdir, calls):
+    """
+    Times the binary snapshots of :mod:`school_snapshot`: conversion from JSON, cold start and lazy record access.
+    """
+    rng = random.Random(4)
+    json_path = os.path.join(workdir, 'school.json')
+    path = os.path.join(workdir, 'school.snap')
+    with open(json_path, 'w') as f:
+        json.dump(data, f)
+    rec.measure('snapshot', 'json_to_snapshot', lambda i: school_snapshot.json_to_snapshot(json_path, path))
+    school = rec.measure('snapshot', 'SnapshotSchool(path)', lambda i: school_snapshot.SnapshotSchool(path))
+    students = data['students']
+    rec.measure('snapshot', 'find_student + registered_courses', lambda i: school.find_student(rng.choice(students)['id']).registered_courses, calls)
+    rec.measure('snapshot', 'students[i] (decode)', lambda i: school.students[rng.randrange(len(students))].name, calls)
+    rec.measure('snapshot', 'snapshot_to_json', lambda i: school_snapshot.snapshot_to_json(path, json_path))
+    school.snapshot.close()
+
+def bench_pyqt(rec, data, workdir, calls):
+    """
+    Times the functions of :mod:`school_db` used by the PyQt application.
+    """
+    rng = random.Random(1)
+    build_pyqt_db(data, os.path.join(workdir, 'school.db'))
+    students = data['students']
+    courses = data['courses']
+    instructors = data['instructors']
+    rec.measure('pyqt', 'fetch_all_students', lambda i: school_db.fetch_all_students())
+    rec.measure('pyqt', 'fetch_all_instructors', lambda i: school_db.fetch_all_instructors())
+    rec.measure('pyqt', 'fetch_all_courses', lambda i: school_db.fetch_all_courses())
+    rec.measure('pyqt', 'fetch_dropdown_page', lambda i: school_db.fetch_dropdown_page('students', rng.choice(students)['id'], 200), calls)
+    rec.measure('pyqt', 'search_dropdown_labels', lambda i: school_db.search_dropdown_labels('students', rng.choice(students)['id'][:5]), calls)
+    rec.measure('pyqt', 'add_student_to_db', lambda i: school_db.add_student_to_db(f"New {i}", 20, f"new{i}@school.edu", f"N{i:07d}"), calls)
+    rec.measure('pyqt', 'update_student_in_db', lambda i: school_db.update_student_in_db(f"N{i:07d}", f"N{i:07d}", f"Renamed {i}", 21, f"new{i}@school.edu"), calls)
+    rec.measure('pyqt', 'enroll_student_in_course', lambda i: school_db.enroll_student_in_course(rng.choice(students)['id'], rng.choice(courses)['id']), calls)
+    cohort = [x['id'] for x in rng.sample(students, min(2000, len(students)))]
+    rec.measure('pyqt', 'enroll_students_in_course (cohort of 2000)', lambda i: school_db.enroll_students_in_course(cohort, courses[i]['id']), min(10, len(courses)))
+    rec.measure('pyqt', 'assign_instructor_to_course', lambda i: school_db.assign_instructor_to_course(rng.choice(instructors)['id'], rng.choice(courses)['id']), calls)
+    rec.measure('pyqt', 'delete_student_from_db', lambda i: school_db.delete_student_from_db(f"N{i:07d}"), calls)
+    conn = school_db.connect()
+    rec.measure('pyqt', 'course enrollment counts (GROUP BY)', lambda i: conn.execute('''
+        SELECT courses.course_id, courses.course_name, COUNT(enrollments.student_id)
+        FROM courses LEFT JOIN enrollments ON enrollments.course_id = courses.id
+        GROUP BY courses.id ORDER BY courses.course_id
+    ''').fetchall(), min(10, calls))
+    conn.close()
+    rec.measure('pyqt', 'fetch_course_enrollment_counts (summary)', lambda i: school_db.fetch_course_enrollment_counts(), min(10, calls))
+    rec.measure('pyqt', 'fetch_students_without_courses', lambda i: school_db.fetch_students_without_courses(), min(10, calls))
+    rec.measure('pyqt', 'search_records (substring)', lambda i: list(school_db.search_records(rng.choice(students)['name'])), min(10, calls))
+    # the same names with two letters swapped, found by the trigram index only
+    rec.measure('pyqt', 'fuzzy_search_records (typo)', lambda i: school_db.fuzzy_search_records(rng.choice(students)['name'].replace('ud', 'du')), min(10, calls))
+
+
+# enrollments table created by init_db before schema version 1: no key, no index
+LEGACY_ENROLLMENTS_DDL = """
+    CREATE TABLE enrollments (
+        student_id INTEGER,
+        course_id INTEGER,
+        FOREIGN KEY (student_id) REFERENCES students(id),
+        FOREIGN KEY (course_id) REFERENCES courses(id)
+    )
+"""
+
+
+def bench_enrollments(rec, data, workdir, calls):
+    """
+    Times the roster and schedule lookups of :mod:`school_db` on the legacy enrollments table, then migrates it with
+    :func:`school_db.migrate_enrollments` (one enrollment in 100 being duplicated first) and times them again.
+    """
+    rng = random.Random(2)
+    build_pyqt_db(data, os.path.join(workdir, 'school.db'))
+    conn = school_db.connect()
+    rows = conn.execute('SELECT student_id, course_id FROM enrollments').fetchall()
+    conn.execute('DROP TABLE enrollments')
+    conn.execute(LEGACY_ENROLLMENTS_DDL)
+    conn.executemany('INSERT INTO enrollments (student_id, course_id) VALUES (?, ?)', rows + rows[::100])
+    conn.execute('PRAGMA user_version = 0')
+    conn.commit()
+    students = data['students']
+    courses = data['courses']
+    for layout in ('legacy', 'clustered'):
+        if layout == 'clustered':
+            rec.measure('enrollments', 'migrate_enrollments', lambda i: school_db.migrate_enrollments(conn))
+        rec.measure('enrollments', f'fetch_course_roster ({layout})', lambda i: school_db.fetch_course_roster(rng.choice(courses)['id']), calls)
+        rec.measure('enrollments', f'fetch_student_courses ({layout})', lambda i: school_db.fetch_student_courses(rng.choice(students)['id']), calls)
+    conn.close()
+
+def bench_sharded(rec, data, workdir, calls, shards=4):
+    """
+    Times :class:`sharded_school.ShardedSchool` with ``shards`` student databases.
+    """
+    rng = random.Random(3)
+    school = ShardedSchool(os.path.join(workdir, 'sharded'), shards)
+    for x in data['instructors']:
+        school.add_instructor(x['name'], x['age'], x['email'], x['id'])
+    for x in data['courses']:
+        school.add_course(x['id'], x['name'])
+
+    def load_students(i):
+        def write(number):
+            conn = school.shard(number)
+            with conn:
+                conn.executemany('INSERT INTO students (name, age, email, student_id) VALUES (?, ?, ?, ?)',
+                                 ((x['name'], x['age'], x['email'], x['id']) for x in data['students'] if shard_of(x['id'], shards) == number))
+            conn.close()
+        list(school.pool.map(write, range(shards)))
+    students = data['students']
+    courses = data['courses']
+    rec.measure('sharded', f'load students ({shards} shards)', load_students)
+    rec.measure('sharded', 'enroll_many', lambda i: school.enroll_many((x['id'], c) for x in students for c in x['courses']))
+    rec.measure('sharded', 'add_student', lambda i: school.add_student(f"New {i}", 20, f"new{i}@school.edu", f"N{i:07d}"), calls)
+    rec.measure('sharded', 'enroll', lambda i: school.enroll(rng.choice(students)['id'], rng.choice(courses)['id']), calls)
+    rec.measure('sharded', 'fetch_student_courses', lambda i: school.fetch_student_courses(rng.choice(students)['id']), calls)
+    rec.measure('sharded', 'fetch_course_roster', lambda i: school.fetch_course_roster(rng.choice(courses)['id']), calls)
+    rec.measure('sharded', 'search_students (fan-out)', lambda i: school.search_students(rng.choice(students)['id'][:5], 50), calls)
+    school.close()
+
+# statements issued by the search function of tkinter_app_sql.py, with the keyword they are benchmarked with
+TKINTER_SEARCHES = [
+    ('search students by name', "SELECT * FROM students WHERE name LIKE ?", '%student 1%'),
+    ('search students by ID', "SELECT * FROM students WHERE student_id LIKE ?", '%s00001%'),
+    ('search students by email', "SELECT * FROM students WHERE email LIKE ?", '%student1%'),
+    ('search students by age', "SELECT * FROM students WHERE age=?", 20),
+    ('search students by course enrolled', "SELECT DISTINCT students.student_id, students.name, students.age, students.email FROM students JOIN registered_courses ON students.student_id = registered_courses.student_id WHERE registered_courses.course_id LIKE ?", '%c000001%'),
+    ('search instructors by name', "SELECT * FROM instructors WHERE name LIKE ?", '%instructor 1%'),
+    ('search courses by instructor', "SELECT courses.course_id, courses.name, instructors.name FROM courses JOIN instructors ON instructors.instructor_id=courses.instructor_id WHERE instructors.name LIKE ?", '%instructor 1%'),
+]
+
+
+def fill_treeview_queries(cursor):
+    """
+    Runs the statements of fillTreeview in tkinter_app_sql.py, in the same order, without building the widgets.
+
+    :return: The number of rows read.
+    :rtype: int
+    """
+    rows = 0
+    cursor.execute("SELECT * FROM students")
+    for x in cursor.fetchall():
+        cursor.execute("SELECT course_id FROM registered_courses WHERE student_id=?", (x[0],))
+        rows += 1 + len(cursor.fetchall())
+    cursor.execute("SELECT * FROM instructors")
+    for z in cursor.fetchall():
+        cursor.execute("SELECT course_id FROM courses WHERE instructor_id=?", (z[0], ))
+        rows += 1 + len(cursor.fetchall())
+    cursor.execute("SELECT courses.course_id, courses.name, courses.instructor_id, instructors.name FROM courses LEFT JOIN instructors ON courses.instructor_id=instructors.instructor_id")
+    for s in cursor.fetchall():
+        cursor.execute("SELECT student_id FROM registered_courses WHERE course_id=?", (s[0],))
+        rows += 1 + len(cursor.fetchall())
+    return rows
+
+
+def tkinter_id_suggestions(cursor, prefix, limit=8):
+    """
+    Statement of the IdCompleter of tkinter_app_sql.py, suggesting the student IDs starting with ``prefix``
+    """
+    return cursor.execute("SELECT student_id FROM students WHERE student_id >= ? AND student_id < ? ORDER BY student_id LIMIT ?",
+                          (prefix, school_db.prefix_upper_bound(prefix), limit)).fetchall()
+
+
+def tkinter_register(conn, student_id, course_id):
+    """
+    Statements of the register function of tkinter_app_sql.py
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("INSERT INTO registered_courses VALUES(?, ?)", (student_id, course_id))
+        conn.commit()
+    except sqlite3.IntegrityError:
+        cursor.execute("SELECT * FROM registered_courses WHERE student_id=? AND course_id=?", (student_id, course_id))
+        cursor.fetchall()
+
+
+def tkinter_assign(conn, instructor_id, course_id):
+    """
+    Statements of the assign function of tkinter_app_sql.py
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT instructor_id FROM courses WHERE course_id=?", (course_id,))
+    if cursor.fetchone()[0] is None:
+        cursor.execute("UPDATE courses SET instructor_id=? WHERE course_id=?", (instructor_id, course_id))
+        conn.commit()
+
+
+def bench_tkinter(rec, data, workdir, calls):
+    """
+    Times the SQL statements issued by tkinter_app_sql.py against its own schema.
+    """
+    rng = random.Random(2)
+    conn = build_tkinter_db(data, os.path.join(workdir, 'mySchool.db'))
+    cursor = conn.cursor()
+    for operation, sql, keyword in TKINTER_SEARCHES:
+        rec.measure('tkinter', operation, lambda i: cursor.execute(sql, (keyword,)).fetchall(), calls)
+    # IdCompleter.suggestions, for the prefix of a random student ID
+    rec.measure('tkinter', 'ID autocomplete (prefix range)', lambda i: tkinter_id_suggestions(cursor, rng.choice(data['students'])['id'][:-2]), calls)
+    rec.measure('tkinter', 'fillTreeview queries', lambda i: fill_treeview_queries(cursor))
+    rec.measure('tkinter', 'register', lambda i: tkinter_register(conn, rng.choice(data['students'])['id'], rng.choice(data['courses'])['id']), calls)
+    rec.measure('tkinter', 'assign', lambda i: tkinter_assign(conn, rng.choice(data['instructors'])['id'], rng.choice(data['courses'])['id']), calls)
+    rec.measure('tkinter', 'timetable.generate', lambda i: timetable.generate(conn, timetable.TKINTER))
+    conn.close()
+
+
+# Programs run with ``python -c`` by time_to_lines, with the directory of the applications as first argument. They start
+# an application with its first paint hooked, print "first paint" (and "records loaded" once the PyQt window has read
+# the database) and quit, so the applications carry no benchmark code. They import nothing of this module, whose
+# imports would be counted in the startup time.
+TKINTER_LAUNCHER = """
+import os, runpy, sys, tkinter
+here, sys.argv = sys.argv[1], [os.path.join(sys.argv[1], 'tkinter_app_sql.py')] + sys.argv[2:]
+sys.path.insert(0, here)
+mainloop = tkinter.Misc.mainloop
+def first_paint(event):
+    root = event.widget.winfo_toplevel()
+    if not getattr(root, 'painted', False):
+        root.painted = True
+        print('first paint', flush=True)
+        root.after_idle(root.destroy)
+def hooked_mainloop(root, n=0):
+    root.bind('<Expose>', first_paint, add='+')
+    mainloop(root, n)
+tkinter.Misc.mainloop = hooked_mainloop
+runpy.run_path(sys.argv[0], run_name='__main__')
+"""
+
+PYQT_LAUNCHER = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from PyQt5.QtWidgets import QApplication
+import lab2_pyqt
+class Window(lab2_pyqt.SchoolManagementSystem):
+    def paintEvent(self, event):
+        first = not self.records_loaded
+        super().paintEvent(event)
+        if first:
+            print('first paint', flush=True)
+    def load_records(self):
+        super().load_records()
+        print('records loaded', flush=True)
+        QApplication.quit()
+lab2_pyqt.init_db()
+app = QApplication(sys.argv[:1])
+window = Window()
+window.show()
+sys.exit(app.exec_())
+"""
+
+
+LAUNCHERS = {'tkinter': TKINTER_LAUNCHER, 'pyqt': PYQT_LAUNCHER}
+
+
+def time_to_lines(application, args, cwd):
+    """
+    Starts an application through its launcher (see :data:`LAUNCHERS`), which prints progress lines from the first
+    paint of the window on and then exits.
+
+    :param application: ``tkinter`` or ``pyqt``.
+    :type application: str
+    :param args: The command line arguments of the application.
+    :type args: list
+    :return: The seconds elapsed from the start of the process until each line was printed, keyed by line.
+    :rtype: dict
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    argv = [sys.executable, '-c', LAUNCHERS[application], here] + args
+    start = time.perf_counter()
+    process = subprocess.Popen(argv, cwd=cwd, stdout=subprocess.PIPE, text=True)
+    times = {}
+    for line in process.stdout:
+        times[line.strip()] = time.perf_counter() - start
+    if process.wait() != 0:
+        raise RuntimeError(f"the {application} application exited with status {process.returncode}")
+    return times
+
+
+def bench_startup(rec, data, workdir, calls):
+    """
+    Times the startup of both applications, from the launch of the process to the first paint of the window and, for
+    the PyQt application, to the records being loaded. Needs a display, the group is skipped without one.
+    """
+    if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+        print(f"{rec.size:>9} startup  skipped: no display")
+        return
+    path = os.path.join(workdir, 'mySchool.db')
+    build_tkinter_db(data, path).close()
+    times = time_to_lines('tkinter', [path], workdir)
+    rec.record('startup', 'tkinter first paint', times['first paint'])
+    if importlib.util.find_spec('PyQt5') is None:
+        print(f"{rec.size:>9} startup  PyQt5 not installed, lab2_pyqt.py skipped")
+        return
+    build_pyqt_db(data, os.path.join(workdir, 'school.db')) # lab2_pyqt.py opens school.db in its working directory
+    times = time_to_lines('pyqt', [], workdir)
+    rec.record('startup', 'pyqt first paint', times['first paint'])
+    rec.record('startup', 'pyqt records loaded', times['records loaded'])
+
+
+def generate_people(data, duplicate_rate=0.01, seed=5):
+    """
+    Gives the students of a synthetic school varied names, and adds a near duplicate (one letter of the name changed,
+    another spelling of the email) for ``duplicate_rate`` of them.
+
+    :return: The people and the number of duplicates added.
+    :rtype: tuple[list[dedup.Person], int]
+    """
+    rng = random.Random(seed)
+    syllables = "ka ri mo na el so la ti ve an do be ru mi sha ko le ga ni to".split()
+    people = []
+    duplicates = 0
+    for i, student in enumerate(data['students']):
+        first = ''.join(rng.choice(syllables) for _ in range(2)).title()
+        last = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+        name, email = f"{first} {last}", f"{first.lower()}.{last.lower()}{i}@school.edu"
+        people.append(dedup.Person(i, student['id'], name, student['age'], email))
+        if rng.random() < duplicate_rate:
+            j = rng.randrange(len(name))
+            people.append(dedup.Person(-i - 1, student['id'] + 'D', name[:j] + rng.choice('aeiou') + name[j + 1:], student['age'], email.replace('.', '_', 1)))
+            duplicates += 1
+    return people, duplicates
+
+
+def bench_dedup(rec, data, workdir, calls):
+    """
+    Times :func:`dedup.find_duplicates` on the students with a few near duplicates added, and prints how many were found.
+    """
+    people, duplicates = generate_people(data)
+    matches = rec.measure('dedup', 'find_duplicates', lambda i: dedup.find_duplicates(people))
+    found = sum(1 for x in matches if x.second.id == x.first.id + 'D')
+    print(f"{rec.size:>9} dedup: {found} of {duplicates} duplicates found, {len(matches)} pairs")
+
+
+BENCHMARKS = {'json': bench_json, 'snapshot': bench_snapshot, 'pyqt': bench_pyqt, 'enrollments': bench_enrollments, 'sharded': bench_sharded, 'tkinter': bench_tkinter, 'startup': bench_startup, 'analytics': bench_analytics, 'dedup': bench_dedup}
+
+
+def run(sizes, enrollments, groups, calls, seed=0):
+    """
+    Runs the selected benchmark groups on a synthetic school of every size.
+
+    :return: The benchmark report, ready to be dumped as JSON.
+    :rtype: dict
+    """
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'sizes': sizes, 'enrollments_per_student': enrollments, 'calls': calls, 'seed': seed,
+        },
+        'results': [],
+    }
+    for size in sizes:
+        rec = Recorder(size, enrollments)
+        data = rec.measure('setup', 'generate_school', lambda i: generate_school(size, enrollments, seed=seed))
+        for group in groups:
+            with tempfile.TemporaryDirectory() as workdir:
+                BENCHMARKS[group](rec, data, workdir, calls)
+        report['results'].extend(rec.results)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data layers of the School Management System on synthetic schools.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000], help="numbers of students to generate (e.g. 1000 100000 1000000)")
+    parser.add_argument('--enrollments', type=int, default=3, help="courses per student")
+    parser.add_argument('--groups', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS), help="data layers to benchmark")
+    parser.add_argument('--calls', type=int, default=100, help="calls of every per-record operation")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file the results are written to")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.enrollments, args.groups, args.calls, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Validation of bulk imports into the PyQt database, run before any row is written.
+
+Records are normalized (surrounding spaces removed, emails in lower case, ages converted to int) and checked in
+chunks by a pool of processes: required fields, email format and positive integer age. The checks that need every
+record, duplicate IDs and emails within the import and against the database, are then made in the main process
+with sets. The result is a :class:`ValidationReport` listing every error with its line, so a whole file can be
+fixed at once instead of stopping at the first bad record.
+
+Example::
+
+    report = validate_records('students', rows, conn, first_line=2)
+    if report.errors:
+        report.write(sys.stderr, 'students.csv')
+    else:
+        school_db.import_records('students', report.valid)
+"""
+import itertools
+import json
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from school_db import EMAIL_PATTERN, ID_COLUMNS, RECORD_COLUMNS
+
+ValidationError = namedtuple('ValidationError', ['line', 'column', 'value', 'message'])
+
+# records sent to a worker at once. An input that fits in one chunk is validated in the main process, starting a pool
+# would cost more than it saves.
+CHUNK_SIZE = 20000
+
+
+def normalize(table, record):
+    """
+    Normalizes one record of ``table`` and checks the fields that do not depend on the other records.
+
+    :return: The normalized record and the list of its errors as ``(column, value, message)`` tuples.
+    :rtype: tuple
+    """
+    columns = RECORD_COLUMNS[table]
+    values = [x.strip() if isinstance(x, str) else x for x in record]
+    errors = []
+    if len(values) != len(columns):
+        return tuple(values), [(None, None, f"expected {len(columns)} fields, got {len(values)}")]
+    for column, value in zip(columns, values):
+        if column != 'instructor_id' or table != 'courses': # the instructor of a course is optional
+            if value is None or value == '':
+                errors.append((column, value, "missing value"))
+    if 'age' in columns:
+        i = columns.index('age')
+        try:
+            values[i] = int(values[i])
+            if values[i] <= 0:
+                errors.append(('age', record[i], "age must be a positive integer"))
+        except (TypeError, ValueError):
+            if values[i] not in (None, ''):
+                errors.append(('age', record[i], "age must be a positive integer"))
+    if 'email' in columns:
+        i = columns.index('email')
+        if values[i]:
+            values[i] = values[i].lower()
+            if not EMAIL_PATTERN.match(values[i]):
+                errors.append(('email', record[i], "invalid email address"))
+    return tuple(values), errors
+
+
+def _validate_chunk(table, first_line, records):
+    """
+    Normalizes a chunk of records, in a worker process.
+
+    :return: ``(line, record)`` pairs of the valid records and the :class:`ValidationError` of the others.
+    :rtype: tuple[list, list]
+    """
+    valid, errors = [], []
+    for line, record in enumerate(records, start=first_line):
+        record, problems = normalize(table, record)
+        if problems:
+            errors.extend(ValidationError(line, *x) for x in problems)
+        else:
+            valid.append((line, record))
+    return valid, errors
+
+
+class ValidationReport(object):
+    """
+    Result of :func:`validate_records`.
+
+    **Sphinx-style documentation**
+
+    :ivar valid: The normalized records that passed every check, in input order.
+    :vartype valid: list[tuple]
+    :ivar errors: The errors ordered by line, several per record being possible.
+    :vartype errors: list[ValidationError]
+    :ivar total: The number of records checked.
+    :vartype total: int
+    """
+    def __init__(self, table, total, valid, errors):
+        self.table = table
+        self.total = total
+        self.valid = valid
+        self.errors = errors
+
+    @property
+    def rejected(self):
+        """
+        The number of records with at least one error.
+        """
+        return len(set(x.line for x in self.errors))
+
+    def as_dict(self):
+        return {'table': self.table, 'total': self.total, 'valid': len(self.valid), 'rejected': self.rejected,
+                'errors': [x._asdict() for x in self.errors]}
+
+    def write(self, stream, source='input'):
+        """
+        Writes the errors as ``source:line: column: message`` lines followed by a summary line.
+        """
+        for x in self.errors:
+            column = f" {x.column}" if x.column else ""
+            stream.write(f"{source}:{x.line}:{column}: {x.message} ({x.value!r})\n")
+        stream.write(f"{self.total} {self.table} checked, {len(self.valid)} valid, {self.rejected} rejected\n")
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+def _chunks(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validate_records(table, records, conn=None, workers=None, chunk_size=CHUNK_SIZE, first_line=1):
+    """
+    Normalizes and validates records to be imported with :func:`school_db.import_records`, without writing anything.
+
+    **Sphinx-style documentation**
+
+    :param table: ``students``, ``instructors`` or ``courses``.
+    :type table: str
+    :param records: Tuples with the columns of :data:`school_db.RECORD_COLUMNS`, e.g. the rows of a CSV file.
+    :type records: iterable
+    :param conn: Connection to the database the records will be imported into, to reject the IDs and emails it
+        already contains. Not checked if None.
+    :type conn: sqlite3.Connection
+    :param workers: Number of worker processes, by default one per CPU. 1 validates in the main process.
+    :type workers: int
+    :param chunk_size: Number of records sent to a worker at once.
+    :type chunk_size: int
+    :param first_line: Line number of the first record in the error report, 2 for a CSV file with a header.
+    :type first_line: int
+    :return: The valid records and the errors.
+    :rtype: ValidationReport
+    """
+    chunks = _chunks(records, chunk_size)
+    first = next(chunks, [])
+    chunks = itertools.chain([first], chunks)
+    starts = itertools.count(first_line, chunk_size)
+    if workers == 1 or len(first) < chunk_size: # a single chunk
+        results = [_validate_chunk(table, start, x) for start, x in zip(starts, chunks)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_validate_chunk, itertools.repeat(table), starts, chunks))
+
+    candidates = [x for valid, _ in results for x in valid]
+    errors = [x for _, chunk_errors in results for x in chunk_errors]
+    total = sum(len(valid) for valid, _ in results) + len(set(x.line for x in errors))
+
+    # uniqueness, checked on the records in input order so the first occurrence of an ID or email is kept
+    columns = RECORD_COLUMNS[table]
+    unique = [(columns.index(ID_COLUMNS[table]), ID_COLUMNS[table])]
+    if 'email' in columns:
+        unique.append((columns.index('email'), 'email'))
+    existing = {}
+    for i, column in unique:
+        existing[column] = set()
+        if conn is not None: # emails are compared in lower case, as normalized
+            existing[column].update(x[0].lower() if column == 'email' else x[0] for x in conn.execute(f'SELECT {column} FROM {table}'))
+    seen = {column: {} for _, column in unique}
+    valid = []
+    for line, record in candidates:
+        problems = []
+        for i, column in unique:
+            value = record[i]
+            if value in existing[column]:
+                problems.append(ValidationError(line, column, value, f"{column} already in the database"))
+            elif value in seen[column]:
+                problems.append(ValidationError(line, column, value, f"duplicate {column}, first used on line {seen[column][value]}"))
+        if problems:
+            errors.extend(problems)
+        else:
+            for i, column in unique:
+                seen[column][record[i]] = line
+            valid.append(record)
+    errors.sort(key=lambda x: x.line)
+    return ValidationReport(table, total, valid, errors)
@@ -1,6 +1,10 @@
 import json
+import os
 from tkinter import messagebox
 
+# number of journal entries above which School.save folds the journal into the JSON file
+JOURNAL_LIMIT = 10000
+
 class Person(object):
     """
     This is a simple class representing a person. It is used as a super class for the Student and Instructor classes.
@@ -58,7 +62,7 @@ class Student(Person):
             type course: :class:`Course`
             course: course to which the student want to register
         """
-        assert type(course) == Course, 'Invalid class. Must be a Course class.'
+        assert isinstance(course, Course), 'Invalid class. Must be a Course class.'
         self.registered_courses.append(course)
         course.add_student(self)
 
@@ -92,7 +96,7 @@ class Instructor(Person):
             course: course to which the instructor is assigned to
             
         """
-        assert type(course) == Course, 'Invalid class. Must be a Course class.'
+        assert isinstance(course, Course), 'Invalid class. Must be a Course class.'
         self.assigned_courses.append(course)
         course.instructor = self
 
@@ -123,13 +127,18 @@ class Course(object):
         Returns:   
             :return: None
         """
-        assert type(student) == Student, "Invalid class. Must be a Student class."
+        assert isinstance(student, Student), "Invalid class. Must be a Student class."
         self.enrolled_student.append(student)
 
 # Step 2
 class School(object):
     """
     This is a complex class used to represent an entire school. It makes use of the simple classes `:class:Student`, `:class:Instructor`, `:class:Course`
+
+    Every change made through the methods of the school (add_*_to_school, register_course, assign_course) is also recorded in the journal.
+    :meth:`save` appends the changes made since the last save to a journal file next to the JSON file, one JSON line per change, so saving
+    costs as much as what changed. Loading the JSON file replays its journal, and :meth:`compact` writes the whole school to the JSON file
+    and empties the journal.
     
     Args:
         type json_file: str, defaults to empty string
@@ -146,6 +155,8 @@ class School(object):
         self.instructors = []
         self.courses = []
         self.fileName = json_file
+        self.journal = [] # changes not saved yet
+        self.journal_length = 0 # number of changes in the journal file
         if json_file != "":
             with open(json_file, 'r') as open_file:
                 data = json.load(open_file)
@@ -169,7 +180,84 @@ class School(object):
                         if i == j.course_id:
                             self.students[-1].register_course(j)
                             break
-    
+            self.replay_journal()
+
+    def journal_path(self):
+        """
+        Returns the location of the journal file of the JSON file
+        """
+        return self.fileName + ".journal"
+
+    def replay_journal(self):
+        """
+        Applies the changes of the journal file to the school just loaded from the JSON file. The records are looked up in dicts built once, and
+        the changes already in the JSON file (when a compaction was interrupted) or referring to unknown records are ignored. A last line cut by
+        a crash during a save is ignored too.
+
+        Returns:
+            :return: None
+        """
+        if not os.path.exists(self.journal_path()):
+            return
+        students = {x.student_id: x for x in self.students}
+        instructors = {x.instructor_id: x for x in self.instructors}
+        courses = {x.course_id: x for x in self.courses}
+        with open(self.journal_path(), 'r') as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except ValueError:
+                    continue
+                self.journal_length += 1
+                op = change.get('op')
+                if op == 'add_student' and change['id'] not in students:
+                    students[change['id']] = Student(change['id'], change['name'], change['age'], change['email'])
+                    self.students.append(students[change['id']])
+                elif op == 'add_instructor' and change['id'] not in instructors:
+                    instructors[change['id']] = Instructor(change['id'], change['name'], change['age'], change['email'])
+                    self.instructors.append(instructors[change['id']])
+                elif op == 'add_course' and change['id'] not in courses:
+                    courses[change['id']] = Course(change['id'], change['name'])
+                    self.courses.append(courses[change['id']])
+                elif op == 'register_course' and change['student_id'] in students and change['course_id'] in courses:
+                    student, course = students[change['student_id']], courses[change['course_id']]
+                    if course not in student.registered_courses:
+                        student.register_course(course)
+                elif op == 'assign_course' and change['instructor_id'] in instructors and change['course_id'] in courses:
+                    instructor, course = instructors[change['instructor_id']], courses[change['course_id']]
+                    if course.instructor is not instructor:
+                        if course.instructor is not None:
+                            course.instructor.assigned_courses.remove(course)
+                        instructor.assign_course(course)
+
+    def save(self):
+        """
+        Saves the changes made since the last save by appending them to the journal file. Without a JSON file to add them to, the whole school is
+        written instead (see :meth:`save_to_json`). The journal is compacted once it holds more than JOURNAL_LIMIT changes.
+
+        Returns:
+            :return: None
+        """
+        if self.fileName == "" or not os.path.exists(self.fileName):
+            self.save_to_json()
+            return
+        if self.journal:
+            with open(self.journal_path(), 'a') as output:
+                output.write("".join(json.dumps(x) + "\n" for x in self.journal))
+            self.journal_length += len(self.journal)
+            self.journal = []
+        if self.journal_length > JOURNAL_LIMIT:
+            self.compact()
+
+    def compact(self):
+        """
+        Folds the journal into the JSON file: the whole school is written to it and the journal file is removed.
+
+        Returns:
+            :return: None
+        """
+        self.save_to_json()
+
     def save_to_json(self):
         """
         Saves any modified data into the json file. If json file specified at the start, data will be saved into it, otherwise, data will be saved in output_file.json file.
@@ -211,13 +299,61 @@ class School(object):
         json_data = json.dumps(data)
 
         if self.fileName != "":
-            with open(self.fileName, 'w') as output:
+            # replaced at once, so the file and its journal are never seen half written. The journal is removed after, replaying it again
+            # on a school that already contains its changes does nothing
+            with open(self.fileName + ".tmp", 'w') as output:
                 output.write(json_data)
+            os.replace(self.fileName + ".tmp", self.fileName)
+            if os.path.exists(self.journal_path()):
+                os.remove(self.journal_path())
         else:
             with open("output_file.json", 'w') as output:
                 output.write(json_data)
+        self.journal = []
+        self.journal_length = 0
         print("operation successful")
 
+    def save_to_snapshot(self, path):
+        """
+        Saves the data into a binary snapshot file that can be opened quickly with :class:`school_snapshot.SnapshotSchool`.
+
+        Args:
+            type path: str
+            path: location of the snapshot file
+
+        Returns:
+            :return: None
+        """
+        from school_snapshot import write_snapshot
+        write_snapshot(self, path)
+
+    def find_student(self, id):
+        """
+        Returns the student with the given ID, or None if there is none
+        """
+        for x in self.students:
+            if x.student_id == id:
+                return x
+        return None
+
+    def find_instructor(self, id):
+        """
+        Returns the instructor with the given ID, or None if there is none
+        """
+        for x in self.instructors:
+            if x.instructor_id == id:
+                return x
+        return None
+
+    def find_course(self, id):
+        """
+        Returns the course with the given ID, or None if there is none
+        """
+        for x in self.courses:
+            if x.course_id == id:
+                return x
+        return None
+
     def add_student_to_school(self, id, name, age, email):
         """
         Adds a student to the school system. Performs necessary checks on the inputs. Creates a `:class:Student` object to store the data in it then places it in the students list
@@ -244,11 +380,11 @@ class School(object):
         except Exception as e:
             messagebox.showwarning("Entered age is not a number")
             return "Age is not an integer"
-        for x in self.students:
-            if x.student_id == id:
-                messagebox.showwarning("WARNING", "Student with ID " + id + " already exists!")
-                return
+        if self.find_student(id) is not None:
+            messagebox.showwarning("WARNING", "Student with ID " + id + " already exists!")
+            return
         self.students.append(Student(id, name, age, email))
+        self.journal.append({'op': 'add_student', 'id': id, 'name': name, 'age': age, 'email': email})
         print(self.students[-1].name, self.students[-1].student_id)
         return self.students[-1]
     
@@ -277,11 +413,11 @@ class School(object):
         except Exception as e:
             messagebox.showwarning("WARNING", "Entered age is not a number")
             return "Age is not an integer"
-        for x in self.instructors:
-            if x.instructor_id == id:
-                messagebox.showwarning("WARNING", "Instructor with ID " + id + " already exists!")
-                return
+        if self.find_instructor(id) is not None:
+            messagebox.showwarning("WARNING", "Instructor with ID " + id + " already exists!")
+            return
         self.instructors.append(Instructor(id, name, age, email))
+        self.journal.append({'op': 'add_instructor', 'id': id, 'name': name, 'age': age, 'email': email})
         print(self.instructors[-1].name, self.instructors[-1].instructor_id)
         return self.instructors[-1]
     
@@ -302,11 +438,63 @@ class School(object):
         if id == "" or name == "":
             messagebox.showwarning("WARNING", "Missing field")
             return "Missing field"
-        for x in self.courses:
-            if x.course_id == id:
-                messagebox.showwarning("WARNING", "Course with ID " + id + " already exists!")
-                return
+        if self.find_course(id) is not None:
+            messagebox.showwarning("WARNING", "Course with ID " + id + " already exists!")
+            return
         self.courses.append(Course(id, name))
+        self.journal.append({'op': 'add_course', 'id': id, 'name': name})
         print(self.courses[-1].course_name, self.courses[-1].course_id)
         return self.courses[-1]
 
+    def register_course(self, student_id, course_id):
+        """
+        Registers a student in a course of the school and records it in the journal
+        
+        Args:
+            type student_id: str
+            student_id: id of the student
+            type course_id: str
+            course_id: id of the course
+        
+        Returns:
+            :return: the course, or None if the student or the course does not exist or the student is already registered
+            :rtype: `:class:Course`
+        """
+        student = self.find_student(student_id)
+        course = self.find_course(course_id)
+        if student is None or course is None:
+            messagebox.showwarning("WARNING", "Unknown student or course!")
+            return
+        if course in student.registered_courses:
+            messagebox.showwarning("WARNING", "Student with ID " + student_id + " is already enrolled in the course " + course_id + "!")
+            return
+        student.register_course(course)
+        self.journal.append({'op': 'register_course', 'student_id': student_id, 'course_id': course_id})
+        return course
+
+    def assign_course(self, instructor_id, course_id):
+        """
+        Assigns a course of the school to an instructor, in place of its previous instructor, and records it in the journal
+        
+        Args:
+            type instructor_id: str
+            instructor_id: id of the instructor
+            type course_id: str
+            course_id: id of the course
+        
+        Returns:
+            :return: the course, or None if the instructor or the course does not exist
+            :rtype: `:class:Course`
+        """
+        instructor = self.find_instructor(instructor_id)
+        course = self.find_course(course_id)
+        if instructor is None or course is None:
+            messagebox.showwarning("WARNING", "Unknown instructor or course!")
+            return
+        if course.instructor is not instructor:
+            if course.instructor is not None:
+                course.instructor.assigned_courses.remove(course)
+            instructor.assign_course(course)
+        self.journal.append({'op': 'assign_course', 'instructor_id': instructor_id, 'course_id': course_id})
+        return course
+
@@ -0,0 +1,307 @@
+"""
+Detection and merging of duplicate students or instructors, the same person entered twice with a slightly different
+name or email.
+
+Comparing every pair of people does not scale, so candidate pairs are found by blocking:
+
+- people whose emails have the same local part (the part before ``@``, without dots, dashes and ``+tag``) form a block;
+- names are cut into character trigrams and indexed in an inverted index (trigram -> people). Two names are candidates
+  when the Jaccard similarity of their trigram sets reaches ``min_overlap``. Only the rarest trigrams of a name (its
+  prefix once the trigrams are sorted by frequency) are looked up and indexed: two sets that share the required
+  number of trigrams always share one of them, so common trigrams such as ``"ann"`` never produce a large block. Postings still longer than ``max_block`` (many
+  people with the same name) are not compared, such duplicates are left to the email blocks.
+
+The candidates are then scored with :class:`difflib.SequenceMatcher` on the normalized names and email local parts.
+Merging a duplicate into the record that is kept moves its enrollments (students) or courses (instructors), then
+deletes it. The queries of either application are in :data:`TKINTER` and :data:`PYQT`.
+
+Usage::
+
+    python dedup.py --pyqt school.db students
+    python dedup.py --tkinter mySchool.db instructors --threshold 0.9
+    python dedup.py --pyqt school.db students --merge S0001 S0042
+    python dedup.py --pyqt school.db students --merge-above 0.95
+"""
+import argparse
+import math
+import re
+import time
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+from difflib import SequenceMatcher
+
+import query_log
+
+Person = namedtuple('Person', ['key', 'id', 'name', 'age', 'email'])
+Match = namedtuple('Match', ['score', 'first', 'second'])
+
+# queries of the tkinter database (DDL_sql.py), people identified by their ID. Deleting a student deletes its
+# registrations through the foreign key cascade.
+TKINTER = {
+    'students': {
+        'select': 'SELECT student_id, student_id, name, age, email FROM students ORDER BY student_id',
+        'lookup': 'SELECT student_id FROM students WHERE student_id = ?',
+        'move': '''INSERT OR IGNORE INTO registered_courses (student_id, course_id)
+                   SELECT ?, course_id FROM registered_courses WHERE student_id = ?''',
+        'delete': 'DELETE FROM students WHERE student_id = ?',
+    },
+    'instructors': {
+        'select': 'SELECT instructor_id, instructor_id, name, age, email FROM instructors ORDER BY instructor_id',
+        'lookup': 'SELECT instructor_id FROM instructors WHERE instructor_id = ?',
+        'move': 'UPDATE courses SET instructor_id = ? WHERE instructor_id = ?',
+        'delete': 'DELETE FROM instructors WHERE instructor_id = ?',
+    },
+}
+
+# queries of the PyQt database (school_db.init_db), people identified by their rowid. Deleting a student deletes its
+# enrollments through the summary triggers.
+PYQT = {
+    'students': {
+        'select': 'SELECT id, student_id, name, age, email FROM students ORDER BY id',
+        'lookup': 'SELECT id FROM students WHERE student_id = ?',
+        'move': '''INSERT OR IGNORE INTO enrollments (student_id, course_id)
+                   SELECT ?, course_id FROM enrollments WHERE student_id = ?''',
+        'delete': 'DELETE FROM students WHERE id = ?',
+    },
+    'instructors': {
+        'select': 'SELECT id, instructor_id, name, age, email FROM instructors ORDER BY id',
+        'lookup': 'SELECT id FROM instructors WHERE instructor_id = ?',
+        'move': 'UPDATE courses SET instructor_id = ? WHERE instructor_id = ?',
+        'delete': 'DELETE FROM instructors WHERE id = ?',
+    },
+}
+
+
+def normalize_name(name):
+    """
+    Lower case, without accents or punctuation: "Émile  O'Neil" gives "emile o neil".
+    """
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+def email_local(email):
+    """
+    The local part of an email in lower case, without its ``+tag`` and punctuation: ``John.Smith+x@a.com`` gives ``johnsmith``.
+    """
+    local = email.lower().partition('@')[0].partition('+')[0]
+    return re.sub(r'[^a-z0-9]', '', local)
+
+
+def trigrams(name):
+    """
+    The set of character trigrams of a normalized name, spaces removed. Names shorter than 3 characters are their own trigram.
+    """
+    compact = name.replace(' ', '')
+    if len(compact) < 3:
+        return {compact} if compact else set()
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+def candidate_pairs(names, locals_, min_overlap=0.5, max_block=50):
+    """
+    Finds the candidate pairs with the email blocks and the trigram inverted index.
+
+    **Sphinx-style documentation**
+
+    :param names: Normalized name of every person.
+    :type names: list[str]
+    :param locals_: Email local part of every person, see :func:`email_local`.
+    :type locals_: list[str]
+    :param min_overlap: Minimum Jaccard similarity of the trigram sets of two names.
+    :type min_overlap: float
+    :param max_block: Email blocks and trigram postings larger than this are not compared, e.g. ``info@`` at many
+        domains or a rare trigram of a very common name. Keeps the number of comparisons linear in the number of people.
+    :type max_block: int
+    :return: ``(i, j)`` pairs of positions, with ``i < j``.
+    :rtype: set
+    """
+    pairs = set()
+    blocks = defaultdict(list)
+    for i, local in enumerate(locals_):
+        if local:
+            blocks[local].append(i)
+    for block in blocks.values():
+        if 1 < len(block) <= max_block:
+            pairs.update((a, b) for n, a in enumerate(block) for b in block[n + 1:])
+
+    grams = [trigrams(x) for x in names]
+    frequency = Counter(g for x in grams for g in x)
+    index = defaultdict(list)
+    for i, x in enumerate(grams):
+        if not x:
+            continue
+        ordered = sorted(x, key=lambda g: (frequency[g], g))
+        # a set sharing at least `needed` trigrams with this one shares one of its first len - needed + 1
+        needed = math.ceil(min_overlap * len(ordered))
+        candidates = set()
+        for g in ordered[:len(ordered) - needed + 1]:
+            posting = index[g]
+            if len(posting) <= max_block: # a longer one is a name shared by that many people, left to the email blocks
+                candidates.update(posting)
+            posting.append(i)
+        # sets of very different sizes cannot reach the similarity, whatever they share
+        low, high = min_overlap * len(x), len(x) / min_overlap
+        for j in candidates:
+            other = grams[j]
+            if low <= len(other) <= high:
+                common = len(x & other)
+                if common >= min_overlap * (len(x) + len(other) - common):
+                    pairs.add((j, i))
+    return pairs
+
+
+def score(first_name, first_local, second_name, second_local):
+    """
+    Similarity of two people between 0 and 1: 70% name, 30% email local part, 1 when the email local parts are equal
+    and the names are close. The names are also compared with their words sorted, so that "Smith John" equals "John Smith".
+    """
+    name = max(SequenceMatcher(None, first_name, second_name).ratio(),
+               SequenceMatcher(None, ' '.join(sorted(first_name.split())), ' '.join(sorted(second_name.split()))).ratio())
+    if first_local and first_local == second_local and name >= 0.5:
+        return 1.0
+    email = SequenceMatcher(None, first_local, second_local).ratio()
+    return 0.7 * name + 0.3 * email
+
+
+def find_duplicates(people, threshold=0.85, min_overlap=0.5, max_block=50):
+    """
+    Finds the pairs of people that are probably the same person.
+
+    **Sphinx-style documentation**
+
+    :param people: The people to compare.
+    :type people: list[Person]
+    :param threshold: Minimum :func:`score` of a returned pair.
+    :type threshold: float
+    :param min_overlap: See :func:`candidate_pairs`.
+    :type min_overlap: float
+    :param max_block: See :func:`candidate_pairs`.
+    :type max_block: int
+    :return: The matching pairs by decreasing score, the earlier of the two people in ``people`` first.
+    :rtype: list[Match]
+    """
+    names = [normalize_name(x.name) for x in people]
+    locals_ = [email_local(x.email) for x in people]
+    matches = []
+    for i, j in candidate_pairs(names, locals_, min_overlap, max_block):
+        value = score(names[i], locals_[i], names[j], locals_[j])
+        if value >= threshold:
+            matches.append(Match(round(value, 3), people[i], people[j]))
+    matches.sort(key=lambda x: (-x.score, x.first.id, x.second.id))
+    return matches
+
+
+def load_people(conn, schema, table):
+    """
+    :return: The students or instructors of a database, in the order of their key.
+    :rtype: list[Person]
+    """
+    return [Person(*row) for row in conn.execute(schema[table]['select'])]
+
+
+def _merge(conn, queries, keep, drop):
+    conn.execute(queries['move'], (keep, drop))
+    conn.execute(queries['delete'], (drop,))
+
+
+def merge(conn, schema, table, keep, drop):
+    """
+    Merges the person with key ``drop`` into the person with key ``keep``, in one transaction: the enrollments of a
+    student not already held by ``keep`` are moved to it, the courses of an instructor are reassigned, then ``drop``
+    is deleted.
+
+    :param conn: An open connection to the database, with no transaction in progress.
+    :type conn: sqlite3.Connection
+    :param schema: :data:`TKINTER` or :data:`PYQT`.
+    :type schema: dict
+    :param table: ``students`` or ``instructors``.
+    :type table: str
+    """
+    try:
+        _merge(conn, schema[table], keep, drop)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def merge_matches(conn, schema, table, matches):
+    """
+    Merges the second person of every match into the first, in one transaction. When a person was already merged
+    into another one, the pair is redirected to the person it was merged into, so chains such as A = B = C end in A.
+
+    :return: The keys of the deleted people mapped to the key of the person they were merged into.
+    :rtype: dict
+    """
+    merged = {}
+    def resolve(key):
+        while key in merged:
+            key = merged[key]
+        return key
+    try:
+        for match in matches:
+            keep, drop = resolve(match.first.key), resolve(match.second.key)
+            if keep != drop:
+                _merge(conn, schema[table], keep, drop)
+                merged[drop] = keep
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find and merge students or instructors entered twice.")
+    database = parser.add_mutually_exclusive_group(required=True)
+    database.add_argument('--tkinter', metavar='PATH', help="database of the tkinter application")
+    database.add_argument('--pyqt', metavar='PATH', help="database of the PyQt application")
+    parser.add_argument('table', choices=['students', 'instructors'])
+    parser.add_argument('--threshold', type=float, default=0.85, help="minimum similarity of a reported pair (default: 0.85)")
+    parser.add_argument('--limit', type=int, default=50, help="number of pairs printed (default: 50)")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--merge', nargs=2, metavar=('KEEP', 'DROP'), help="merge the person with ID DROP into the one with ID KEEP")
+    action.add_argument('--merge-above', type=float, metavar='SCORE', help="merge every pair scoring at least SCORE into its older record")
+    args = parser.parse_args(argv)
+
+    if args.tkinter:
+        from DDL_sql import create_tables
+        conn = query_log.connect(args.tkinter)
+        create_tables(conn)
+        schema = TKINTER
+    else:
+        import school_db
+        school_db.DB_PATH = args.pyqt
+        school_db.init_db()
+        conn = school_db.connect()
+        schema = PYQT
+
+    if args.merge:
+        keys = [conn.execute(schema[args.table]['lookup'], (x,)).fetchone() for x in args.merge]
+        for person_id, key in zip(args.merge, keys):
+            if key is None:
+                raise SystemExit(f"no {args.table[:-1]} with ID {person_id}")
+        merge(conn, schema, args.table, keys[0][0], keys[1][0])
+        print(f"{args.merge[1]} merged into {args.merge[0]}")
+        conn.close()
+        return
+
+    start = time.perf_counter()
+    people = load_people(conn, schema, args.table)
+    matches = find_duplicates(people, min(args.threshold, args.merge_above or 1))
+    print(f"{len(people)} {args.table} compared in {time.perf_counter() - start:.2f} s")
+    shown = [x for x in matches if x.score >= args.threshold]
+    for match in shown[:args.limit]:
+        print(f"  {match.score:.3f}  {match.first.id} {match.first.name} <{match.first.email}>"
+              f"  =  {match.second.id} {match.second.name} <{match.second.email}>")
+    if len(shown) > args.limit:
+        print(f"  ... {len(shown) - args.limit} more")
+    if args.merge_above is not None:
+        merged = merge_matches(conn, schema, args.table, [x for x in matches if x.score >= args.merge_above])
+        print(f"{len(merged)} {args.table} merged")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,426 +2,35 @@ import sys
 import json
 import csv
 import sqlite3
-import re
-from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QComboBox,QMessageBox, QTableWidget, QTableWidgetItem, QFileDialog, QHeaderView, QDialog, QGridLayout, QHBoxLayout)
-from PyQt5.QtGui import QIcon  
-
-
-
-def init_db():
-    """
-    Initializes the SQLite database by creating necessary tables if they do not already exist.
-
-    **docstring** 
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS students (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            age INTEGER NOT NULL,
-            email TEXT NOT NULL UNIQUE,
-            student_id TEXT NOT NULL UNIQUE
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS instructors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            age INTEGER NOT NULL,
-            email TEXT NOT NULL UNIQUE,
-            instructor_id TEXT NOT NULL UNIQUE
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS courses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            course_id TEXT NOT NULL UNIQUE,
-            course_name TEXT NOT NULL,
-            instructor_id INTEGER,
-            FOREIGN KEY (instructor_id) REFERENCES instructors(id)
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS enrollments (
-            student_id INTEGER,
-            course_id INTEGER,
-            FOREIGN KEY (student_id) REFERENCES students(id),
-            FOREIGN KEY (course_id) REFERENCES courses(id)
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-def add_student_to_db(name, age, email, student_id):
-    """
-    Adds a new student to the database.
-
-    **Sphinx-style documentation**
-
-    :param name: The student's full name.
-    :type name: str
-    :param age: The student's age, must be a positive integer.
-    :type age: int
-    :param email: The student's email address.
-    :type email: str
-    :param student_id: A unique identifier for the student.
-    :type student_id: str
-    :raises sqlite3.IntegrityError: If the student ID or email is already in use.
-    :return: True if the student is added successfully, False if there's an IntegrityError.
-    :rtype: bool
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            INSERT INTO students (name, age, email, student_id)
-            VALUES (?, ?, ?, ?)
-        ''', (name, age, email, student_id))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False
-    conn.close()
-    return True
-
-def add_instructor_to_db(name, age, email, instructor_id):
-    """
-    **Sphinx-style documentation**
-    Adds a new instructor to the database.
-
-    :param name: The instructor's full name.
-    :type name: str
-    :param age: The instructor's age, must be a positive integer.
-    :type age: int
-    :param email: The instructor's email address.
-    :type email: str
-    :param instructor_id: A unique identifier for the instructor.
-    :type instructor_id: str
-    :raises sqlite3.IntegrityError: If the instructor ID or email is already in use.
-    :return: True if the instructor is added successfully, False if there's an IntegrityError.
-    :rtype: bool
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            INSERT INTO instructors (name, age, email, instructor_id)
-            VALUES (?, ?, ?, ?)
-        ''', (name, age, email, instructor_id))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False
-    conn.close()
-    return True
-
-
-def add_course_to_db(course_id, course_name):
-    """
-    **Sphinx-style documentation**
-    Adds a new course to the database.
-
-    :param course_id: The unique ID for the course.
-    :type course_id: str
-    :param course_name: The name of the course.
-    :type course_name: str
-    :raises sqlite3.IntegrityError: If the course ID already exists.
-    :return: True if the course is added successfully, False if there's an IntegrityError.
-    :rtype: bool
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            INSERT INTO courses (course_id, course_name)
-            VALUES (?, ?)
-        ''', (course_id, course_name))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False
-    conn.close()
-    return True
-
-def fetch_all_students():
-    """
-    Fetches all students from the database.
-
-    **Sphinx-style documentation** 
-
-    :return: A list of student records, where each record contains:
-        - ID (int)
-        - Name (str)
-        - Age (int)
-        - Email (str)
-        - Student ID (str)
-    :rtype: list
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM students')
-    students = cursor.fetchall()
-    conn.close()
-    return students
-
-def update_student_in_db(old_student_id, new_student_id, new_name, new_age, new_email):
-    """
-    **Sphinx-style documentation** 
-    Updates an existing student's details in the database, including the ID.
-
-    :param old_student_id: The current student ID.
-    :type old_student_id: str
-    :param new_student_id: The updated student ID.
-    :type new_student_id: str
-    :param new_name: The updated student name.
-    :type new_name: str
-    :param new_age: The updated student age.
-    :type new_age: int
-    :param new_email: The updated student email address.
-    :type new_email: str
-    :raises sqlite3.IntegrityError: If the new student ID or email is not unique.
-    :return: None
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            UPDATE students
-            SET student_id=?, name=?, age=?, email=?
-            WHERE student_id=?
-        ''', (new_student_id, new_name, new_age, new_email, old_student_id))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False
-    conn.close()
-    return True
-
-
-def delete_student_from_db(student_id):
-    """
-    Deletes a student from the database using the provided student ID.
-
-     **regular docstring** 
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM students WHERE student_id=?', (student_id,))
-    conn.commit()
-    conn.close()
-
-
-def update_instructor_in_db(old_instructor_id, new_instructor_id, new_name, new_age, new_email):
-    """
-    Updates an existing instructor's details in the database, including the ID.
-
-    **Sphinx-style documentation** 
-    :param old_instructor_id: The current instructor ID.
-    :type old_instructor_id: str
-    :param new_instructor_id: The updated instructor ID.
-    :type new_instructor_id: str
-    :param new_name: The updated instructor name.
-    :type new_name: str
-    :param new_age: The updated instructor age.
-    :type new_age: int
-    :param new_email: The updated instructor email address.
-    :type new_email: str
-    :raises sqlite3.IntegrityError: If the new instructor ID or email is not unique.
-    :return: None
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            UPDATE instructors
-            SET instructor_id=?, name=?, age=?, email=?
-            WHERE instructor_id=?
-        ''', (new_instructor_id, new_name, new_age, new_email, old_instructor_id))
-        conn.commit()
-    except sqlite3.IntegrityError as e:
-        raise sqlite3.IntegrityError(f"Update failed: {str(e)}")
-    finally:
-        conn.close()
-
-def fetch_all_instructors():
-    """
-    Fetches all instructors from the database.
-
-    **Sphinx-style documentation** 
-
-    :return: A list of instructor records, where each record contains:
-        - ID (int)
-        - Name (str)
-        - Age (int)
-        - Email (str)
-        - Instructor ID (str)
-    :rtype: list
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM instructors')
-    instructors = cursor.fetchall()
-    conn.close()
-    return instructors
-
-
-def delete_instructor_from_db(instructor_id):
-    """
-    **docsting documentation**
-    Deletes an instructor from the database based on the provided instructor ID.
+from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QComboBox,QMessageBox, QTableWidget, QTableWidgetItem, QFileDialog, QHeaderView, QDialog, QGridLayout, QHBoxLayout, QCompleter, QCheckBox)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QStringListModel, QTimer
+from PyQt5.QtGui import QIcon, QColor
+from school_db import (connect, init_db, add_student_to_db, add_instructor_to_db, add_course_to_db, fetch_all_students, delete_student_from_db,
+                       fetch_all_instructors, delete_instructor_from_db, fetch_all_courses, delete_course_from_db,
+                       assign_instructor_to_course, enroll_student_in_course, fetch_dropdown_page, search_dropdown_labels, is_valid_email, is_valid_age,
+                       id_map, warm_id_map, fetch_course_enrollment_counts, fetch_instructor_course_loads, fetch_students_without_courses,
+                       generate_timetable, fetch_timetable)
+from school_mapper import Session
+
+# column of the table widget -> attribute edited in place, by type of record
+EDITABLE_COLUMNS = {
+    'Student': {0: 'name', 1: 'student_id', 2: 'age', 3: 'email'},
+    'Instructor': {0: 'name', 1: 'instructor_id', 2: 'age', 3: 'email'},
+    'Course': {0: 'course_name', 1: 'course_id'},
+}
+
+# background of the cells changed and not saved yet
+CHANGED_CELL_COLOR = QColor(255, 243, 176)
+
+
+def instructor_label(instructor_rowid):
     """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM instructors WHERE instructor_id=?', (instructor_id,))
-    conn.commit()
-    conn.close()
-
-
-
-def update_course_in_db(old_course_id, new_course_id, new_name):
-    """
-    Updates the course's details in the database, including the course ID.
-
-    **Sphinx-style documentation**
-
-    :param old_course_id: The current course ID.
-    :type old_course_id: str
-    :param new_course_id: The updated course ID.
-    :type new_course_id: str
-    :param new_name: The updated course name.
-    :type new_name: str
-    :raises sqlite3.IntegrityError: If the new course ID already exists in the database.
-    :return: True if the update was successful, False if there was an IntegrityError.
-    :rtype: bool
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            UPDATE courses
-            SET course_id=?, course_name=?
-            WHERE course_id=?
-        ''', (new_course_id, new_name, old_course_id))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False
-    finally:
-        conn.close()
-
-
-
-def fetch_all_courses():
-    """
-    Fetches all courses from the database.
-
-    **Sphinx-style documentation**
-
-    :return: A list of course records, where each record contains:
-        - ID (int)
-        - Course ID (str)
-        - Course Name (str)
-        - Instructor ID (int, nullable)
-    :rtype: list
+    Returns the text shown for the instructor of a course, resolving the instructor rowid stored in ``courses.instructor_id`` through the ID map.
     """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM courses')
-    courses = cursor.fetchall()
-    conn.close()
-    return courses
-
-
-def delete_course_from_db(course_id):
-    """
-    **docstring documentation**
-    Deletes a course from the database using the provided course ID.
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM courses WHERE course_id=?', (course_id,))
-    conn.commit()
-    conn.close()
-
-def assign_instructor_to_course(instructor_id, course_id):
-    """
-    Assigns an instructor to a course.
-
-     **Sphinx-style documentation**
-
-    :param instructor_id: The unique identifier of the instructor to assign.
-    :type instructor_id: str
-    :param course_id: The unique identifier of the course to which the instructor is assigned.
-    :type course_id: str
-    :raises sqlite3.IntegrityError: If there's an issue with the instructor or course ID.
-    :return: True if the instructor is assigned successfully, False if an IntegrityError occurs.
-    :rtype: bool
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            UPDATE courses
-            SET instructor_id = (
-                SELECT id FROM instructors WHERE instructor_id=?
-            )
-            WHERE course_id = ?
-        ''', (instructor_id, course_id))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False
-    conn.close()
-    return True
-
-
-def enroll_student_in_course(student_id, course_id):
-    """
-    Enrolls a student in a course by adding a record to the enrollments table.
-
-    **Sphinx-style documentation** 
-
-    :param student_id: The unique identifier of the student to enroll.
-    :type student_id: str
-    :param course_id: The unique identifier of the course.
-    :type course_id: str
-    :raises sqlite3.IntegrityError: If the student is already enrolled in the course.
-    :return: True if the student was successfully enrolled, False otherwise.
-    :rtype: bool
-    """
-    conn = sqlite3.connect('school.db')
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            INSERT INTO enrollments (student_id, course_id)
-            VALUES (
-                (SELECT id FROM students WHERE student_id=?),
-                (SELECT id FROM courses WHERE course_id=?)
-            )
-        ''', (student_id, course_id))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False
-    conn.close()
-    return True
-
-def is_valid_email(email):
-    """
-    **docstring**
-    Validates if the given email is in the correct format 
-    """
-    return re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', email)
-
-def is_valid_age(age):
-    """
-    **docstring**
-    Validates if the given age is a positive integer.
-    """
-    return age.isdigit() and int(age) >= 0
+    if instructor_rowid is None:
+        return "None"
+    name = id_map.instructor_name(instructor_rowid)
+    return name if name is not None else f"Instructor ID: {instructor_rowid}"
 
 def save_data_to_json():
     """
@@ -456,22 +65,20 @@ def export_to_csv():
     Exports student, instructor, and course data into a CSV file.
     **docsting** 
     """
-    students = fetch_all_students()
-    instructors = fetch_all_instructors()
-    courses = fetch_all_courses()
+    session = Session()
 
     path, _ = QFileDialog.getSaveFileName(None, "Export CSV", "", "CSV Files (*.csv)")
     if path:
         with open(path, 'w', newline='') as file:
             writer = csv.writer(file)
             writer.writerow(["Type", "Name", "ID", "Age", "Email/Course ID"])
-            for student in students:
-                writer.writerow(["Student", student[1], student[4], student[2], student[3]])
-            for instructor in instructors:
-                writer.writerow(["Instructor", instructor[1], instructor[4], instructor[2], instructor[3]])
-            for course in courses:
-                instructor_name = "None" if course[3] is None else f"Instructor ID: {course[3]}"
-                writer.writerow(["Course", course[2], course[1], "N/A", instructor_name])
+            for student in session.students():
+                writer.writerow(["Student", student.name, student.student_id, student.age, student.email])
+            for instructor in session.instructors():
+                writer.writerow(["Instructor", instructor.name, instructor.instructor_id, instructor.age, instructor.email])
+            for course in session.courses():
+                instructor_name = instructor_label(course.instructor_id)
+                writer.writerow(["Course", course.course_name, course.course_id, "N/A", instructor_name])
         QMessageBox.information(None, "Success", "Data exported to CSV file.")
 
 def backup_database():
@@ -480,7 +87,7 @@ def backup_database():
 
     **docstring** 
     """
-    conn = sqlite3.connect('school.db')
+    conn = connect()
     backup_file, _ = QFileDialog.getSaveFileName(None, "Backup Database", "", "SQLite Database (*.db)")
     if backup_file:
         with open(backup_file, 'wb') as f:
@@ -489,6 +96,100 @@ def backup_database():
         QMessageBox.information(None, "Backup", "Database backup successful.")
     conn.close()
 
+class LazyDropdownModel(QAbstractListModel):
+    """
+    List model feeding dropdowns straight from the database, one page at a time.
+
+    Row 0 holds the placeholder ("Select Student", ...). The other rows are pulled with :func:`fetch_dropdown_page` only when a view asks for more, so a refresh costs one page query instead of one addItem per record.
+    Several combo boxes can share the same model.
+
+    **docstring**
+    """
+    PAGE_SIZE = 200
+
+    def __init__(self, table, placeholder, parent=None):
+        """
+        **sphinx**
+        :param table: One of ``students``, ``instructors`` or ``courses``.
+        :type table: str
+        :param placeholder: Text of the first row, shown when nothing is selected.
+        :type placeholder: str
+        """
+        super().__init__(parent)
+        self.table = table
+        self.placeholder = placeholder
+        self._rows = []
+        self._exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) + 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        if index.row() == 0:
+            return self.placeholder
+        return self._rows[index.row() - 1][1]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        after_key = self._rows[-1][0] if self._rows else ''
+        page = fetch_dropdown_page(self.table, after_key, self.PAGE_SIZE)
+        if len(page) < self.PAGE_SIZE:
+            self._exhausted = True
+        if page:
+            first = len(self._rows) + 1
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    def refresh(self):
+        """
+        Drops the loaded pages and reloads the first one.
+        """
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+class DropdownCompleter(QCompleter):
+    """
+    Completer that turns a combo box into a searchable dropdown.
+
+    The candidates are re-queried with :func:`search_dropdown_labels` as the user types, and QCompleter then filters them with a case insensitive substring match.
+
+    **docstring**
+    """
+    def __init__(self, table, combo):
+        """
+        **sphinx**
+        :param table: One of ``students``, ``instructors`` or ``courses``.
+        :type table: str
+        :param combo: The combo box to attach to. It is made editable.
+        :type combo: QComboBox
+        """
+        super().__init__(combo)
+        self.table = table
+        self.candidates = QStringListModel(self)
+        self.setModel(self.candidates)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setFilterMode(Qt.MatchContains)
+        self.setCompletionMode(QCompleter.PopupCompletion)
+        combo.setEditable(True)
+        combo.setInsertPolicy(QComboBox.NoInsert)
+        combo.setCompleter(self)
+        combo.lineEdit().textEdited.connect(self.update_candidates)
+
+    def update_candidates(self, text):
+        self.candidates.setStringList(search_dropdown_labels(self.table, text))
+
 class SchoolManagementSystem(QWidget):
     """
     Main window for the School Management System application.
@@ -506,6 +207,9 @@ class SchoolManagementSystem(QWidget):
         **docstring**
         """
         super().__init__()
+        self.records_loaded = False # the records are loaded after the first paint, see paintEvent
+        self.session = Session() # records shown in the table, edited in place until Save Changes
+        self.table_records = [] # record of every row of the table
         self.initUI()
 
     def initUI(self):
@@ -585,11 +289,20 @@ class SchoolManagementSystem(QWidget):
         self.add_course_btn.clicked.connect(self.add_course)
         main_layout.addWidget(self.add_course_btn)
 
+        # dropdown models are shared by every combo box listing the same table
+        self.student_model = LazyDropdownModel('students', "Select Student", self)
+        self.instructor_model = LazyDropdownModel('instructors', "Select Instructor", self)
+        self.course_model = LazyDropdownModel('courses', "Select Course", self)
+
         main_layout.addWidget(QLabel("Register Student for Course"))
         self.student_dropdown = QComboBox()
+        self.student_dropdown.setModel(self.student_model)
+        DropdownCompleter('students', self.student_dropdown)
         main_layout.addWidget(self.student_dropdown)
 
         self.course_dropdown = QComboBox()
+        self.course_dropdown.setModel(self.course_model)
+        DropdownCompleter('courses', self.course_dropdown)
         main_layout.addWidget(self.course_dropdown)
 
         self.register_student_btn = QPushButton("Register Student")
@@ -598,9 +311,13 @@ class SchoolManagementSystem(QWidget):
 
         main_layout.addWidget(QLabel("Assign Instructor to Course"))
         self.instructor_dropdown = QComboBox()
+        self.instructor_dropdown.setModel(self.instructor_model)
+        DropdownCompleter('instructors', self.instructor_dropdown)
         main_layout.addWidget(self.instructor_dropdown)
 
         self.course_assign_dropdown = QComboBox()
+        self.course_assign_dropdown.setModel(self.course_model)
+        DropdownCompleter('courses', self.course_assign_dropdown)
         main_layout.addWidget(self.course_assign_dropdown)
 
         self.assign_instructor_btn = QPushButton("Assign Instructor")
@@ -613,14 +330,29 @@ class SchoolManagementSystem(QWidget):
         self.search_input.setPlaceholderText("Search by name, ID, or course")
         self.search_input.textChanged.connect(self.search_records)
         search_layout.addWidget(self.search_input)
+        self.fuzzy_checkbox = QCheckBox("Typo tolerant (names, emails and course names)")
+        self.fuzzy_checkbox.stateChanged.connect(self.search_records)
+        search_layout.addWidget(self.fuzzy_checkbox)
         main_layout.addLayout(search_layout)
 
         self.table_widget = QTableWidget()
         self.table_widget.setColumnCount(7)
         self.table_widget.setHorizontalHeaderLabels(["Name", "ID", "Age", "Email", "Type", "Edit", "Delete"])
         self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table_widget.itemChanged.connect(self.cell_edited)
         main_layout.addWidget(self.table_widget)
 
+        # cells edited in the table are saved together, in one transaction
+        changes_layout = QHBoxLayout()
+        self.save_changes_btn = QPushButton("Save Changes")
+        self.save_changes_btn.clicked.connect(self.save_changes)
+        changes_layout.addWidget(self.save_changes_btn)
+        self.discard_changes_btn = QPushButton("Discard Changes")
+        self.discard_changes_btn.clicked.connect(self.discard_changes)
+        changes_layout.addWidget(self.discard_changes_btn)
+        main_layout.addLayout(changes_layout)
+        self.update_changes_buttons()
+
         self.export_btn = QPushButton("Export to CSV")
         self.export_btn.clicked.connect(export_to_csv)
         main_layout.addWidget(self.export_btn)
@@ -637,36 +369,48 @@ class SchoolManagementSystem(QWidget):
         self.backup_btn.clicked.connect(backup_database)
         main_layout.addWidget(self.backup_btn)
 
+        self.reports_btn = QPushButton("Reports")
+        self.reports_btn.clicked.connect(lambda: ReportsDialog(self).exec_())
+        main_layout.addWidget(self.reports_btn)
+
+        self.timetable_btn = QPushButton("Timetable")
+        self.timetable_btn.clicked.connect(lambda: TimetableDialog(self).exec_())
+        main_layout.addWidget(self.timetable_btn)
+
         self.setLayout(main_layout)
+
+    def paintEvent(self, event):
+        """
+        Schedules the loading of the records after the first paint, so the window shows up before the database is read.
+
+        :param event: The paint event.
+        :type event: QPaintEvent
+        """
+        super().paintEvent(event)
+        if not self.records_loaded:
+            self.records_loaded = True
+            QTimer.singleShot(0, self.load_records)
+
+    def load_records(self):
+        """
+        Loads the ID map, the dropdown menus and the records table from the database.
+        """
+        warm_id_map()
         self.update_dropdowns()
         self.display_all_records()
 
     def update_dropdowns(self):
         """
         Updates the student, instructor, and course dropdown menus with the latest data from the database.
+
+        Only the first page of each shared model is reloaded, further pages are fetched as the user scrolls.
         **docstring** 
         """
-        self.course_dropdown.clear()
-        self.course_dropdown.addItem("Select Course")
-        self.course_assign_dropdown.clear()
-        self.course_assign_dropdown.addItem("Select Course")
-
-        courses = fetch_all_courses()
-        for course in courses:
-            self.course_dropdown.addItem(f"{course[1]} - {course[2]}")
-            self.course_assign_dropdown.addItem(f"{course[1]} - {course[2]}")
-
-        self.student_dropdown.clear()
-        self.student_dropdown.addItem("Select Student")
-        students = fetch_all_students()
-        for student in students:
-            self.student_dropdown.addItem(f"{student[4]} - {student[1]}")
-
-        self.instructor_dropdown.clear()
-        self.instructor_dropdown.addItem("Select Instructor")
-        instructors = fetch_all_instructors()
-        for instructor in instructors:
-            self.instructor_dropdown.addItem(f"{instructor[4]} - {instructor[1]}")
+        self.course_model.refresh()
+        self.student_model.refresh()
+        self.instructor_model.refresh()
+        for dropdown in (self.course_dropdown, self.course_assign_dropdown, self.student_dropdown, self.instructor_dropdown):
+            dropdown.setCurrentIndex(0)
 
     def add_student(self):
         """
@@ -700,7 +444,7 @@ class SchoolManagementSystem(QWidget):
         if add_student_to_db(name, int(age), email, student_id):
             QMessageBox.information(self, "Success", f"Student {name} added successfully!")
             self.update_dropdowns()
-            self.display_all_records()
+            self.refresh_records()
             self.student_name_input.clear()
             self.student_age_input.clear()
             self.student_email_input.clear()
@@ -731,7 +475,7 @@ class SchoolManagementSystem(QWidget):
         if add_instructor_to_db(name, int(age), email, instructor_id):
             QMessageBox.information(self, "Success", f"Instructor {name} added successfully!")
             self.update_dropdowns()
-            self.display_all_records()
+            self.refresh_records()
             self.instructor_name_input.clear()
             self.instructor_age_input.clear()
             self.instructor_email_input.clear()
@@ -759,7 +503,7 @@ class SchoolManagementSystem(QWidget):
         if add_course_to_db(course_id, course_name):
             QMessageBox.information(self, "Success", f"Course {course_name} added successfully!")
             self.update_dropdowns()
-            self.display_all_records()
+            self.refresh_records()
             self.course_name_input.clear()
             self.course_id_input.clear()
         else:
@@ -779,7 +523,7 @@ class SchoolManagementSystem(QWidget):
         selected_student = self.student_dropdown.currentText()
         selected_course = self.course_dropdown.currentText()
 
-        if selected_student == "Select Student" or selected_course == "Select Course":
+        if selected_student in ("", "Select Student") or selected_course in ("", "Select Course"):
             QMessageBox.warning(self, "Input Error", "Please select both a student and a course.")
             return
 
@@ -806,7 +550,7 @@ class SchoolManagementSystem(QWidget):
         selected_instructor = self.instructor_dropdown.currentText()
         selected_course = self.course_assign_dropdown.currentText()
 
-        if selected_instructor == "Select Instructor" or selected_course == "Select Course":
+        if selected_instructor in ("", "Select Instructor") or selected_course in ("", "Select Course"):
             QMessageBox.warning(self, "Input Error", "Please select both an instructor and a course.")
             return
 
@@ -815,7 +559,7 @@ class SchoolManagementSystem(QWidget):
 
         if assign_instructor_to_course(instructor_id, course_id):
             QMessageBox.information(self, "Success", f"Instructor {selected_instructor} assigned to {selected_course}!")
-            self.display_all_records()
+            self.refresh_records()
         else:
             QMessageBox.warning(self, "Error", "Could not assign instructor. Please check the selected IDs.")
 
@@ -823,8 +567,8 @@ class SchoolManagementSystem(QWidget):
         """
         Displays all student, instructor, and course records in the table widget.
 
-        This method retrieves data from the database for students, instructors, and courses, and populates the table widget with the retrieved data. 
-        It also adds options to edit and delete each record, updating the UI to reflect the current state of the database.
+        This method populates the table widget with the students, instructors, and courses of the session, without reading the tables again
+        (see :meth:`refresh_records`). It also adds options to edit and delete each record.
 
         The table displays the following:
         - Student records with name, ID, age, email, and options for editing/deleting.
@@ -834,43 +578,17 @@ class SchoolManagementSystem(QWidget):
         **docstring**
         """
         self.table_widget.setRowCount(0)
+        self.table_records = []
+        for record in self.session.students() + self.session.instructors() + self.session.courses():
+            self.add_record_row(record)
 
-        students = fetch_all_students()
-        for student in students:
-            row_position = self.table_widget.rowCount()
-            self.table_widget.insertRow(row_position)
-            self.table_widget.setItem(row_position, 0, QTableWidgetItem(student[1]))  
-            self.table_widget.setItem(row_position, 1, QTableWidgetItem(student[4])) 
-            self.table_widget.setItem(row_position, 2, QTableWidgetItem(str(student[2])))  
-            self.table_widget.setItem(row_position, 3, QTableWidgetItem(student[3]))  
-            self.table_widget.setItem(row_position, 4, QTableWidgetItem("Student"))  
-            self.table_widget.setCellWidget(row_position, 5, self.create_edit_button("Student", student))
-            self.table_widget.setCellWidget(row_position, 6, self.create_delete_button("Student", student))
-
-        instructors = fetch_all_instructors()
-        for instructor in instructors:
-            row_position = self.table_widget.rowCount()
-            self.table_widget.insertRow(row_position)
-            self.table_widget.setItem(row_position, 0, QTableWidgetItem(instructor[1])) 
-            self.table_widget.setItem(row_position, 1, QTableWidgetItem(instructor[4]))  
-            self.table_widget.setItem(row_position, 2, QTableWidgetItem(str(instructor[2])))  
-            self.table_widget.setItem(row_position, 3, QTableWidgetItem(instructor[3]))  
-            self.table_widget.setItem(row_position, 4, QTableWidgetItem("Instructor"))  
-            self.table_widget.setCellWidget(row_position, 5, self.create_edit_button("Instructor", instructor))
-            self.table_widget.setCellWidget(row_position, 6, self.create_delete_button("Instructor", instructor))
-
-        courses = fetch_all_courses()
-        for course in courses:
-            row_position = self.table_widget.rowCount()
-            self.table_widget.insertRow(row_position)
-            self.table_widget.setItem(row_position, 0, QTableWidgetItem(course[2]))  
-            self.table_widget.setItem(row_position, 1, QTableWidgetItem(course[1]))  
-            self.table_widget.setItem(row_position, 2, QTableWidgetItem("N/A"))  
-            instructor_name = "None" if course[3] is None else f"Instructor ID: {course[3]}"
-            self.table_widget.setItem(row_position, 3, QTableWidgetItem(instructor_name))  
-            self.table_widget.setItem(row_position, 4, QTableWidgetItem("Course")) 
-            self.table_widget.setCellWidget(row_position, 5, self.create_edit_button("Course", course))
-            self.table_widget.setCellWidget(row_position, 6, self.create_delete_button("Course", course))
+    def refresh_records(self):
+        """
+        Reads the tables again and displays them, after records were inserted, deleted or assigned outside of the session.
+        The records with unsaved changes are kept as they are.
+        """
+        self.session.refresh()
+        self.display_all_records()
 
     def create_edit_button(self, record_type, record):
         """
@@ -879,7 +597,7 @@ class SchoolManagementSystem(QWidget):
         :param record_type: it specifies thr type of the record (Student, Instructor, or Course)
         :type record_type: str
         :param record: The record details to be edited.
-        :type record: tuple
+        :type record: school_mapper.Record
         :return: A QPushButton widget for editing the record.
         :rtype: QPushButton
         """
@@ -895,7 +613,7 @@ class SchoolManagementSystem(QWidget):
         :param record_type: Type of the record (Student, Instructor, or Course).
         :type record_type: str
         :param record: The record details to be deleted.
-        :type record: tuple
+        :type record: school_mapper.Record
         :return: A QPushButton widget for deleting the record.
         :rtype: QPushButton
         """
@@ -911,7 +629,7 @@ class SchoolManagementSystem(QWidget):
         :param record_type: Type of the record (Student, Instructor, or Course).
         :type record_type: str
         :param record: The record details to be edited.
-        :type record: tuple
+        :type record: school_mapper.Record
         :return: None
         """
         if record_type == "Student":
@@ -929,7 +647,7 @@ class SchoolManagementSystem(QWidget):
         :param record_type: Type of the record (Student, Instructor, or Course).
         :type record_type: str
         :param record: The record details to be deleted.
-        :type record: tuple
+        :type record: school_mapper.Record
         :return: None
         """
         if record_type == "Student":
@@ -945,19 +663,47 @@ class SchoolManagementSystem(QWidget):
         Opens the edit dialog for a student and updates the database after validation
 
         :param student: The student record to edit.
-        :type student: tuple
+        :type student: school_mapper.StudentRecord
         :return: None
         """
         dialog = EditDialog("Student", student)
         if dialog.exec_():
             new_student_id, new_name, new_age, new_email = dialog.get_inputs()
-            if not new_name or not is_valid_age(new_age) or not is_valid_email(new_email):
+            if not new_student_id or not new_name or not is_valid_age(new_age) or not is_valid_email(new_email):
                 QMessageBox.warning(self, "Input Error", "Please provide valid data.")
                 return
-            update_student_in_db(student[4], new_student_id, new_name, int(new_age), new_email)
-            QMessageBox.information(self, "Success", "Student updated successfully.")
-            self.update_dropdowns()
+            if self.save_record(student, {'student_id': new_student_id, 'name': new_name, 'age': int(new_age), 'email': new_email}):
+                QMessageBox.information(self, "Success", "Student updated successfully.")
+
+    def save_record(self, record, values):
+        """
+        **Sphinx-style documentation**
+        Applies the values entered in a dialog to a record and writes its changes, then reloads the dropdowns and the table. If its new ID or email
+        is already used the columns set by the dialog get their previous values back, the other changes made to the record in the table are kept.
+
+        :param record: The edited record.
+        :type record: school_mapper.Record
+        :param values: The new value of every column of the dialog.
+        :type values: dict
+        :return: True if the record was saved.
+        :rtype: bool
+        """
+        previous = {attribute: getattr(record, attribute) for attribute in values}
+        for attribute, value in values.items():
+            setattr(record, attribute, value)
+        try:
+            self.session.flush([record])
+        except sqlite3.IntegrityError:
+            for attribute, value in previous.items():
+                setattr(record, attribute, value)
+            QMessageBox.warning(self, "Error", f"Could not update {record.TYPE.lower()}. The ID or email may already be in use.")
             self.display_all_records()
+            self.update_changes_buttons()
+            return False
+        self.update_dropdowns()
+        self.display_all_records()
+        self.update_changes_buttons()
+        return True
 
     def delete_student(self, student):
         """
@@ -965,17 +711,17 @@ class SchoolManagementSystem(QWidget):
         Deletes the student record from the database after confirmation.
 
         :param student: The student record to delete.
-        :type student: tuple
+        :type student: school_mapper.StudentRecord
         :return: None
         """
         reply = QMessageBox.question(self, 'Confirm Delete',
-                                     f"Are you sure you want to delete student {student[1]}?",
+                                     f"Are you sure you want to delete student {student.name}?",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            delete_student_from_db(student[4])
+            delete_student_from_db(student.stored_key)
             QMessageBox.information(self, "Success", "Student deleted successfully.")
             self.update_dropdowns()
-            self.display_all_records()
+            self.refresh_records()
 
     def edit_instructor(self, instructor):
         """
@@ -983,19 +729,17 @@ class SchoolManagementSystem(QWidget):
         Opens the edit dialog for an instructor and updates the database.
 
         :param instructor: The instructor record to edit.
-        :type instructor: tuple
+        :type instructor: school_mapper.InstructorRecord
         :return: None
         """
         dialog = EditDialog("Instructor", instructor)
         if dialog.exec_():
             new_instructor_id, new_name, new_age, new_email = dialog.get_inputs()
-            if not new_name or not is_valid_age(new_age) or not is_valid_email(new_email):
+            if not new_instructor_id or not new_name or not is_valid_age(new_age) or not is_valid_email(new_email):
                 QMessageBox.warning(self, "Input Error", "Please provide valid data.")
                 return
-            update_instructor_in_db(instructor[4], new_instructor_id, new_name, int(new_age), new_email)
-            QMessageBox.information(self, "Success", "Instructor updated successfully.")
-            self.update_dropdowns()
-            self.display_all_records()
+            if self.save_record(instructor, {'instructor_id': new_instructor_id, 'name': new_name, 'age': int(new_age), 'email': new_email}):
+                QMessageBox.information(self, "Success", "Instructor updated successfully.")
 
     def delete_instructor(self, instructor):
         """
@@ -1003,17 +747,17 @@ class SchoolManagementSystem(QWidget):
         Deletes the instructor record from the database after user confirmation.
 
         :param instructor: The instructor record to delete.
-        :type instructor: tuple
+        :type instructor: school_mapper.InstructorRecord
         :return: None
         """
         reply = QMessageBox.question(self, 'Confirm Delete',
-                                     f"Are you sure you want to delete instructor {instructor[1]}?",
+                                     f"Are you sure you want to delete instructor {instructor.name}?",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            delete_instructor_from_db(instructor[4])
+            delete_instructor_from_db(instructor.stored_key)
             QMessageBox.information(self, "Success", "Instructor deleted successfully.")
             self.update_dropdowns()
-            self.display_all_records()
+            self.refresh_records()
 
     def edit_course(self, course):
         """
@@ -1021,7 +765,7 @@ class SchoolManagementSystem(QWidget):
         Opens the edit dialog for a course and updates the database.
 
         :param course: The course record to edit.
-        :type course: tuple
+        :type course: school_mapper.CourseRecord
         :return: None
         """
         dialog = EditDialog("Course", course)
@@ -1033,12 +777,8 @@ class SchoolManagementSystem(QWidget):
                 QMessageBox.warning(self, "Input Error", "Please provide valid course data.")
                 return
             
-            if update_course_in_db(course[1], new_course_id, new_course_name):
+            if self.save_record(course, {'course_id': new_course_id, 'course_name': new_course_name}):
                 QMessageBox.information(self, "Success", "Course updated successfully.")
-                self.update_dropdowns()
-                self.display_all_records()
-            else:
-                QMessageBox.warning(self, "Error", "Could not update course. Course ID may already be in use.")
 
 
     def delete_course(self, course):
@@ -1047,17 +787,17 @@ class SchoolManagementSystem(QWidget):
         Deletes the course record from the database after user confirmation.
 
         :param course: The course record to delete.
-        :type course: tuple
+        :type course: school_mapper.CourseRecord
         :return: None
         """
         reply = QMessageBox.question(self, 'Confirm Delete',
-                                     f"Are you sure you want to delete course {course[2]}?",
+                                     f"Are you sure you want to delete course {course.course_name}?",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            delete_course_from_db(course[1])
+            delete_course_from_db(course.stored_key)
             QMessageBox.information(self, "Success", "Course deleted successfully.")
             self.update_dropdowns()
-            self.display_all_records()
+            self.refresh_records()
 
     def search_records(self):
         """
@@ -1065,51 +805,121 @@ class SchoolManagementSystem(QWidget):
         Searches for students, instructors, or courses based on the input query.
 
         Compares the query with student names, student IDs, instructor names, instructor IDs, and course names to filter and display matching records in the table widget.
+        The records of the session are searched, unsaved changes included.
+        When the typo tolerant box is checked, the names, emails and course names close to the query are shown instead, the closest first.
 
         """
         query = self.search_input.text().lower()
         self.table_widget.setRowCount(0)
+        self.table_records = []
+
+        if self.fuzzy_checkbox.isChecked():
+            for record in self.session.fuzzy_search(query):
+                self.add_record_row(record)
+            return
+
+        # the records of the session are filtered in memory, the tables are only read again by refresh_records
+        for student in self.session.students():
+            if query in student.name.lower() or query in student.student_id.lower():
+                self.add_record_row(student)
+
+        for instructor in self.session.instructors():
+            if query in instructor.name.lower() or query in instructor.instructor_id.lower():
+                self.add_record_row(instructor)
+
+        for course in self.session.courses():
+            if query in course.course_name.lower() or query in course.course_id.lower():
+                self.add_record_row(course)
+
+    def add_record_row(self, record):
+        """
+        **docstring**
+        Appends a student, instructor or course to the table widget, with its edit and delete buttons.
+        The name, ID, age and email cells can be edited in place, the changed cells are highlighted until they are saved.
+
+        :param record: The record, from :attr:`session`.
+        :type record: school_mapper.Record
+        """
+        record_type = record.TYPE
+        row_position = self.table_widget.rowCount()
+        self.table_widget.blockSignals(True) # filling the cells is not an edit
+        self.table_widget.insertRow(row_position)
+        if record_type == "Course":
+            cells = [record.course_name, record.course_id, "N/A", instructor_label(record.instructor_id)]
+        else:
+            cells = [record.name, record.key, str(record.age), record.email]
+        changed = record.changes()
+        for column, text in enumerate(cells + [record_type]):
+            item = QTableWidgetItem(text)
+            attribute = EDITABLE_COLUMNS[record_type].get(column)
+            if attribute is None:
+                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            elif attribute in changed:
+                item.setBackground(CHANGED_CELL_COLOR)
+            self.table_widget.setItem(row_position, column, item)
+        self.table_widget.setCellWidget(row_position, 5, self.create_edit_button(record_type, record))
+        self.table_widget.setCellWidget(row_position, 6, self.create_delete_button(record_type, record))
+        self.table_widget.blockSignals(False)
+        self.table_records.append(record)
+
+    def cell_edited(self, item):
+        """
+        Applies a cell edited in the table to its record, which is only written to the database by :meth:`save_changes`.
+        An invalid value is refused and the cell shows the value of the record again.
+
+        :param item: The edited cell.
+        :type item: QTableWidgetItem
+        """
+        record = self.table_records[item.row()]
+        attribute = EDITABLE_COLUMNS[record.TYPE].get(item.column())
+        if attribute is None:
+            return
+        text = item.text().strip()
+        if not text or (attribute == 'age' and not is_valid_age(text)) or (attribute == 'email' and not is_valid_email(text)):
+            QMessageBox.warning(self, "Input Error", f"Invalid {attribute.replace('_', ' ')}: {text!r}")
+        else:
+            setattr(record, attribute, int(text) if attribute == 'age' else text)
+        self.table_widget.blockSignals(True)
+        item.setText(str(getattr(record, attribute)))
+        item.setData(Qt.BackgroundRole, CHANGED_CELL_COLOR if attribute in record.changes() else None)
+        self.table_widget.blockSignals(False)
+        self.update_changes_buttons()
+
+    def update_changes_buttons(self):
+        """
+        Shows the number of records with unsaved changes on the Save Changes button, and disables the buttons when there are none.
+        """
+        count = len(self.session.dirty)
+        self.save_changes_btn.setText(f"Save Changes ({count})" if count else "Save Changes")
+        self.save_changes_btn.setEnabled(count > 0)
+        self.discard_changes_btn.setEnabled(count > 0)
+
+    def save_changes(self):
+        """
+        **Sphinx-style documentation**
+        Writes every record edited in the table to the database in one transaction. If a new ID or email is already used nothing is written
+        and the edits are kept, so they can be corrected.
+
+        :return: None
+        """
+        try:
+            count = self.session.flush()
+        except sqlite3.IntegrityError as e:
+            QMessageBox.warning(self, "Error", f"Nothing was saved, an ID or email is already in use ({e}).")
+            return
+        QMessageBox.information(self, "Success", f"{count} record(s) saved.")
+        self.update_dropdowns()
+        self.display_all_records()
+        self.update_changes_buttons()
+
+    def discard_changes(self):
+        """
+        Reverts the records edited in the table to the values stored in the database.
+        """
+        self.session.revert()
+        self.display_all_records()
+        self.update_changes_buttons()
 
-        students = fetch_all_students()
-        instructors = fetch_all_instructors()
-        courses = fetch_all_courses()
-
-        for student in students:
-            if query in student[1].lower() or query in student[4].lower():
-                row_position = self.table_widget.rowCount()
-                self.table_widget.insertRow(row_position)
-                self.table_widget.setItem(row_position, 0, QTableWidgetItem(student[1]))
-                self.table_widget.setItem(row_position, 1, QTableWidgetItem(student[4]))
-                self.table_widget.setItem(row_position, 2, QTableWidgetItem(str(student[2])))
-                self.table_widget.setItem(row_position, 3, QTableWidgetItem(student[3]))
-                self.table_widget.setItem(row_position, 4, QTableWidgetItem("Student"))
-                self.table_widget.setCellWidget(row_position, 5, self.create_edit_button("Student", student))
-                self.table_widget.setCellWidget(row_position, 6, self.create_delete_button("Student", student))
-
-        for instructor in instructors:
-            if query in instructor[1].lower() or query in instructor[4].lower():
-                row_position = self.table_widget.rowCount()
-                self.table_widget.insertRow(row_position)
-                self.table_widget.setItem(row_position, 0, QTableWidgetItem(instructor[1]))
-                self.table_widget.setItem(row_position, 1, QTableWidgetItem(instructor[4]))
-                self.table_widget.setItem(row_position, 2, QTableWidgetItem(str(instructor[2])))
-                self.table_widget.setItem(row_position, 3, QTableWidgetItem(instructor[3]))
-                self.table_widget.setItem(row_position, 4, QTableWidgetItem("Instructor"))
-                self.table_widget.setCellWidget(row_position, 5, self.create_edit_button("Instructor", instructor))
-                self.table_widget.setCellWidget(row_position, 6, self.create_delete_button("Instructor", instructor))
-
-        for course in courses:
-            if query in course[2].lower() or query in course[1].lower():
-                row_position = self.table_widget.rowCount()
-                self.table_widget.insertRow(row_position)
-                self.table_widget.setItem(row_position, 0, QTableWidgetItem(course[2]))
-                self.table_widget.setItem(row_position, 1, QTableWidgetItem(course[1]))
-                self.table_widget.setItem(row_position, 2, QTableWidgetItem("N/A"))
-                instructor_name = "None" if course[3] is None else f"Instructor ID: {course[3]}"
-                self.table_widget.setItem(row_position, 3, QTableWidgetItem(instructor_name))
-                self.table_widget.setItem(row_position, 4, QTableWidgetItem("Course"))
-                self.table_widget.setCellWidget(row_position, 5, self.create_edit_button("Course", course))
-                self.table_widget.setCellWidget(row_position, 6, self.create_delete_button("Course", course))
 class EditDialog(QDialog):
     """
     A dialog for editing student, instructor, or course records.
@@ -1125,7 +935,7 @@ class EditDialog(QDialog):
         :param record_type: Specifies whether the record is a Student, Instructor, or Course.
         :type record_type: str
         :param record: The data of the record being edited.
-        :type record: tuple
+        :type record: school_mapper.Record
         """
         super().__init__()
         self.record_type = record_type
@@ -1141,10 +951,10 @@ class EditDialog(QDialog):
             self.age_input = QLineEdit()
             self.email_input = QLineEdit()
 
-            self.id_input.setText(record[4])
-            self.name_input.setText(record[1])
-            self.age_input.setText(str(record[2]))
-            self.email_input.setText(record[3])
+            self.id_input.setText(record.key)
+            self.name_input.setText(record.name)
+            self.age_input.setText(str(record.age))
+            self.email_input.setText(record.email)
 
             self.layout.addWidget(QLabel("ID:"), 0, 0)
             self.layout.addWidget(self.id_input, 0, 1)
@@ -1160,8 +970,8 @@ class EditDialog(QDialog):
             self.course_id_input = QLineEdit()
             self.course_name_input = QLineEdit()
 
-            self.course_id_input.setText(record[1])  
-            self.course_name_input.setText(record[2])
+            self.course_id_input.setText(record.course_id)
+            self.course_name_input.setText(record.course_name)
 
             self.layout.addWidget(QLabel("Course ID:"), 0, 0)
             self.layout.addWidget(self.course_id_input, 0, 1)
@@ -1211,6 +1021,95 @@ class EditDialog(QDialog):
         """
         return self.course_name_input.text().strip()
 
+class ReportsDialog(QDialog):
+    """
+    Dialog showing the enrollment count of every course, the course load of every instructor and the students enrolled in no course.
+
+    The counts are read from the summary tables that the database keeps up to date with triggers, so opening the dialog does not count any enrollment.
+
+    **docstring**
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Reports")
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.add_table("Students per course", ["Course ID", "Course Name", "Students"], fetch_course_enrollment_counts())
+        self.add_table("Courses per instructor", ["Instructor ID", "Name", "Courses"], fetch_instructor_course_loads())
+        students = fetch_students_without_courses()
+        self.add_table(f"Students without courses ({len(students)})", ["Student ID", "Name"], students)
+
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.accept)
+        self.layout.addWidget(self.close_button)
+
+    def add_table(self, title, headers, rows):
+        """
+        Adds a titled read-only table to the dialog.
+
+        :param title: The label shown above the table.
+        :type title: str
+        :param headers: The column headers.
+        :type headers: list[str]
+        :param rows: The rows of the table.
+        :type rows: list[tuple]
+        """
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for row, record in enumerate(rows):
+            for column, value in enumerate(record):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+        self.layout.addWidget(QLabel(title))
+        self.layout.addWidget(table)
+
+class TimetableDialog(QDialog):
+    """
+    Dialog showing the time slot of every course, with a button computing a new timetable in which no student has two courses in the same slot.
+
+    **docstring**
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Timetable")
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Slot", "Course ID", "Course Name"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.table)
+
+        self.generate_button = QPushButton("Generate Timetable")
+        self.generate_button.clicked.connect(self.generate)
+        self.layout.addWidget(self.generate_button)
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.accept)
+        self.layout.addWidget(self.close_button)
+        self.display_timetable()
+
+    def generate(self):
+        """
+        Computes a new timetable, stores it in the database and shows it.
+        """
+        slots = generate_timetable()
+        QMessageBox.information(self, "Timetable", f"{slots} time slots are needed so that no student has two courses at the same time.")
+        self.display_timetable()
+
+    def display_timetable(self):
+        """
+        Fills the table with the time slots stored in the database.
+        """
+        rows = fetch_timetable()
+        self.table.setRowCount(len(rows))
+        for row, (slot, course_id, course_name) in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(str(slot + 1)))
+            self.table.setItem(row, 1, QTableWidgetItem(course_id))
+            self.table.setItem(row, 2, QTableWidgetItem(course_name))
+
 if __name__ == '__main__':
     init_db()
     app = QApplication(sys.argv)
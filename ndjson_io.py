@@ -0,0 +1,411 @@
+"""
+Streaming interchange of schools as newline-delimited JSON (NDJSON): one JSON object per line, one record per object.
+
+Every record has a ``type`` and the fields of the JSON format of :class:`classes.School`, the registrations being
+records of their own instead of a list in the student::
+
+    {"type": "instructor", "id": "I001", "name": "Jane Doe", "age": 41, "email": "jane@school.edu"}
+    {"type": "student", "id": "S001", "name": "John Smith", "age": 20, "email": "john@school.edu"}
+    {"type": "course", "id": "C001", "name": "Algebra", "instructor_id": "I001"}
+    {"type": "enrollment", "student_id": "S001", "course_id": "C001"}
+
+A file can be appended to, concatenated with another one or cut anywhere between two lines. The sources
+(:func:`school_records`, :func:`pyqt_records`, :func:`tkinter_records`, :func:`read_ndjson`) and the sinks
+(:func:`write_ndjson`, :func:`load_into_school`, :func:`import_pyqt`, :func:`import_tkinter`) work record by record, so a
+pipeline of them keeps a bounded number of records in memory whatever the size of the school. The sources write the
+parents first (see :data:`TYPES`), which the database sinks expect: a course whose instructor comes later in the
+stream is imported without one, a registration of an unknown student or course is skipped.
+
+Files whose name ends in ``.gz`` or ``.xz`` are compressed with gzip or lzma, ``-`` stands for the standard input or
+output.
+
+Usage::
+
+    python ndjson_io.py export --pyqt school.db school.ndjson.gz
+    python ndjson_io.py import --tkinter mySchool.db school.ndjson.gz
+    python ndjson_io.py export --json school.json - | grep '"type":"course"'
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import lzma
+import os
+import sys
+
+import query_log
+import school_db
+
+# parents first, the order in which the sources write the records and the sinks import them
+TYPES = ('instructor', 'student', 'course', 'enrollment')
+
+# fields of every type of record, in the order of the columns of school_db.RECORD_COLUMNS
+FIELDS = {
+    'instructor': ('id', 'name', 'age', 'email'),
+    'student': ('id', 'name', 'age', 'email'),
+    'course': ('id', 'name', 'instructor_id'),
+    'enrollment': ('student_id', 'course_id'),
+}
+
+# type of record -> table of school_db.RECORD_COLUMNS
+TABLES = {'instructor': 'instructors', 'student': 'students', 'course': 'courses', 'enrollment': 'enrollments'}
+
+_COMPRESSION = {'.gz': gzip, '.xz': lzma, '.lzma': lzma}
+
+_TKINTER_EXPORT = {
+    'instructor': 'SELECT instructor_id, name, age, email FROM instructors',
+    'student': 'SELECT student_id, name, age, email FROM students',
+    'course': 'SELECT course_id, name, instructor_id FROM courses',
+    'enrollment': 'SELECT student_id, course_id FROM registered_courses',
+}
+
+_TKINTER_IMPORT = {
+    'instructor': 'INSERT OR IGNORE INTO instructors (instructor_id, name, age, email) VALUES (?, ?, ?, ?)',
+    'student': 'INSERT OR IGNORE INTO students (student_id, name, age, email) VALUES (?, ?, ?, ?)',
+    # an unknown instructor leaves the course unassigned
+    'course': 'INSERT OR IGNORE INTO courses (course_id, name, instructor_id) VALUES (?1, ?2, (SELECT instructor_id FROM instructors WHERE instructor_id=?3))',
+    # OR IGNORE does not cover the foreign keys, a registration of an unknown student or course is filtered out instead
+    'enrollment': '''INSERT OR IGNORE INTO registered_courses (student_id, course_id) SELECT ?1, ?2
+                     WHERE EXISTS (SELECT 1 FROM students WHERE student_id=?1) AND EXISTS (SELECT 1 FROM courses WHERE course_id=?2)''',
+}
+
+
+def make_record(record_type, row):
+    """
+    Builds a record of ``record_type`` from a tuple of its :data:`FIELDS`, a missing instructor becoming ``""`` as in
+    the JSON format of :class:`classes.School`.
+    """
+    record = {'type': record_type}
+    record.update(zip(FIELDS[record_type], row))
+    if record_type == 'course' and record['instructor_id'] is None:
+        record['instructor_id'] = ''
+    return record
+
+
+def as_rows(records, record_type):
+    """
+    Streams the records of one type as tuples of its :data:`FIELDS`, ready for :mod:`school_db` or
+    :mod:`bulk_validation`. The records of the other types are skipped.
+    """
+    fields = FIELDS[record_type]
+    for x in records:
+        if x['type'] == record_type:
+            yield tuple(x.get(f) for f in fields)
+
+
+@contextlib.contextmanager
+def open_ndjson(path, mode, compression=None):
+    """
+    Opens an NDJSON file as text, ``-`` being the standard input or output.
+
+    **Sphinx-style documentation**
+
+    :param path: The file, compressed if its name ends in ``.gz``, ``.xz`` or ``.lzma``.
+    :type path: str
+    :param mode: ``'r'``, ``'w'`` or ``'a'`` (appending to a compressed file adds a new compressed stream, which both
+        formats read back as one).
+    :type mode: str
+    :param compression: ``'gzip'`` or ``'lzma'`` to override the extension, ``'none'`` to read or write plain text.
+    :type compression: str
+    """
+    if compression is None:
+        module = next((m for suffix, m in _COMPRESSION.items() if str(path).endswith(suffix)), None)
+    else:
+        module = {'gzip': gzip, 'lzma': lzma, 'none': None}[compression]
+    if path == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        if module is None:
+            yield stream
+        else:
+            with module.open(stream.buffer, mode + 't', encoding='utf-8') as f:
+                yield f
+    elif module is None:
+        with open(path, mode, encoding='utf-8', newline='\n') as f:
+            yield f
+    else:
+        with module.open(path, mode + 't', encoding='utf-8') as f:
+            yield f
+
+
+def read_ndjson(path, compression=None, types=None):
+    """
+    Streams the records of an NDJSON file, blank lines being ignored.
+
+    **Sphinx-style documentation**
+
+    :param path: The file, see :func:`open_ndjson`.
+    :type path: str
+    :param compression: See :func:`open_ndjson`.
+    :type compression: str
+    :param types: The types of records kept, all by default.
+    :type types: list[str]
+    :return: A generator of record dicts.
+    :rtype: generator
+    :raises ValueError: On a line that is not a JSON object with a known ``type``, giving its number.
+    """
+    with open_ndjson(path, 'r', compression) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e})")
+            if not isinstance(record, dict) or record.get('type') not in FIELDS:
+                raise ValueError(f"{path}:{line_number}: not a record with a type among {', '.join(TYPES)}")
+            if types is None or record['type'] in types:
+                yield record
+
+
+def write_ndjson(records, path, compression=None, append=False):
+    """
+    Writes records to an NDJSON file, one line each, as they are produced.
+
+    **Sphinx-style documentation**
+
+    :param records: Record dicts, e.g. from one of the sources of this module.
+    :type records: iterable
+    :param path: The file, see :func:`open_ndjson`.
+    :type path: str
+    :param compression: See :func:`open_ndjson`.
+    :type compression: str
+    :param append: Adds the records at the end of an existing file instead of replacing it.
+    :type append: bool
+    :return: The number of records written.
+    :rtype: int
+    """
+    count = 0
+    with open_ndjson(path, 'a' if append else 'w', compression) as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def school_records(school):
+    """
+    Streams the content of a :class:`classes.School` as records.
+    """
+    for x in school.instructors:
+        yield make_record('instructor', (x.instructor_id, x.name, x.age, x._email))
+    for x in school.students:
+        yield make_record('student', (x.student_id, x.name, x.age, x._email))
+    for x in school.courses:
+        yield make_record('course', (x.course_id, x.course_name, x.instructor.instructor_id if x.instructor is not None else ''))
+    for x in school.students:
+        for course in x.registered_courses:
+            yield make_record('enrollment', (x.student_id, course.course_id))
+
+
+def pyqt_records(batch_size=1000, types=TYPES):
+    """
+    Streams the records of the PyQt database (:data:`school_db.DB_PATH`), ``batch_size`` rows being read at a time.
+    """
+    for record_type in types:
+        for row in school_db.iter_records(TABLES[record_type], batch_size):
+            yield make_record(record_type, row)
+
+
+def tkinter_records(conn, batch_size=1000, types=TYPES):
+    """
+    Streams the records of a database of the tkinter application, ``batch_size`` rows being read at a time.
+    """
+    cursor = conn.cursor()
+    for record_type in types:
+        cursor.execute(_TKINTER_EXPORT[record_type])
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield make_record(record_type, row)
+
+
+def _in_batches(records, flush, batch_size):
+    """
+    Groups a stream of records of any type into batches of one type. When a batch is full, the pending batches of
+    every type are passed to ``flush(record_type, rows)`` in the order of :data:`TYPES`, so a record is always imported
+    after the parents that came before it in the stream.
+
+    :return: ``{type: [written, skipped]}``
+    :rtype: dict
+    """
+    counts = {x: [0, 0] for x in TYPES}
+    pending = {x: [] for x in TYPES}
+
+    def flush_all():
+        for record_type in TYPES:
+            if pending[record_type]:
+                written, skipped = flush(record_type, pending[record_type])
+                counts[record_type][0] += written
+                counts[record_type][1] += skipped
+                pending[record_type] = []
+
+    for record in records:
+        record_type = record['type']
+        pending[record_type].append(tuple(record.get(f) for f in FIELDS[record_type]))
+        if len(pending[record_type]) == batch_size:
+            flush_all()
+    flush_all()
+    return counts
+
+
+def import_pyqt(records, batch_size=1000):
+    """
+    Imports records into the PyQt database (:data:`school_db.DB_PATH`) with :func:`school_db.import_records` and
+    :func:`school_db.enroll_many`, one transaction per batch. Records already there are skipped.
+
+    **Sphinx-style documentation**
+
+    The records are written as they are, validate them first (:func:`bulk_validation.validate_records`) if they do not
+    come from another database.
+
+    :param records: Record dicts, consumed lazily.
+    :type records: iterable
+    :param batch_size: The number of records of a type per transaction.
+    :type batch_size: int
+    :return: ``{type: [written, skipped]}``
+    :rtype: dict
+    """
+    def flush(record_type, rows):
+        if record_type == 'enrollment':
+            report = school_db.enroll_many(rows, batch_size)
+            return report['enrolled'], len(report['skipped'])
+        return school_db.import_records(TABLES[record_type], rows, batch_size)
+    return _in_batches(records, flush, batch_size)
+
+
+def import_tkinter(conn, records, batch_size=1000):
+    """
+    Imports records into a database of the tkinter application, one transaction per batch. Records already there are
+    skipped, so are the registrations of unknown students or courses.
+
+    **Sphinx-style documentation**
+
+    :param conn: An open connection to the database, with its tables created (:func:`DDL_sql.create_tables`).
+    :type conn: sqlite3.Connection
+    :param records: Record dicts, consumed lazily.
+    :type records: iterable
+    :param batch_size: The number of records of a type per transaction.
+    :type batch_size: int
+    :return: ``{type: [written, skipped]}``
+    :rtype: dict
+    """
+    def flush(record_type, rows):
+        with conn:
+            written = conn.executemany(_TKINTER_IMPORT[record_type], rows).rowcount
+        return written, len(rows) - written
+    return _in_batches(records, flush, batch_size)
+
+
+def load_into_school(records, school=None):
+    """
+    Adds records to a :class:`classes.School`, linking the courses to their instructor and students through dicts of
+    the IDs. Records already in the school, with invalid fields or referring to unknown IDs are skipped.
+
+    **Sphinx-style documentation**
+
+    :param records: Record dicts.
+    :type records: iterable
+    :param school: The school to add to, a new empty one by default.
+    :type school: classes.School
+    :return: The school and ``{type: [added, skipped]}``.
+    :rtype: tuple
+    """
+    from classes import School, Student, Instructor, Course
+    if school is None:
+        school = School()
+    students = {x.student_id: x for x in school.students}
+    instructors = {x.instructor_id: x for x in school.instructors}
+    courses = {x.course_id: x for x in school.courses}
+    registered = {(x.student_id, c.course_id) for x in school.students for c in x.registered_courses}
+    counts = {x: [0, 0] for x in TYPES}
+    for record in records:
+        record_type = record['type']
+        try:
+            if record_type == 'instructor' and record['id'] not in instructors:
+                instructors[record['id']] = x = Instructor(record['id'], record['name'], int(record['age']), record['email'])
+                school.instructors.append(x)
+            elif record_type == 'student' and record['id'] not in students:
+                students[record['id']] = x = Student(record['id'], record['name'], int(record['age']), record['email'])
+                school.students.append(x)
+            elif record_type == 'course' and record['id'] not in courses:
+                courses[record['id']] = x = Course(record['id'], record['name'])
+                school.courses.append(x)
+                if record.get('instructor_id') in instructors:
+                    instructors[record['instructor_id']].assign_course(x)
+            elif (record_type == 'enrollment' and (record['student_id'], record['course_id']) not in registered
+                  and record['student_id'] in students and record['course_id'] in courses):
+                students[record['student_id']].register_course(courses[record['course_id']])
+                registered.add((record['student_id'], record['course_id']))
+            else:
+                counts[record_type][1] += 1
+                continue
+        except (AssertionError, KeyError, TypeError, ValueError): # the constructors assert the validity of the fields
+            counts[record_type][1] += 1
+            continue
+        counts[record_type][0] += 1
+    return school, counts
+
+
+def print_counts(counts, verb, stream=sys.stderr):
+    for record_type in TYPES:
+        written, skipped = counts[record_type]
+        if written or skipped:
+            print(f"{record_type}: {written} {verb}, {skipped} skipped", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import a school as newline-delimited JSON.")
+    parser.add_argument('direction', choices=['export', 'import'])
+    database = parser.add_mutually_exclusive_group(required=True)
+    database.add_argument('--tkinter', metavar='PATH', help="database of the tkinter application")
+    database.add_argument('--pyqt', metavar='PATH', help="database of the PyQt application")
+    database.add_argument('--json', metavar='PATH', help="JSON file of classes.School, rewritten by an import")
+    parser.add_argument('--type', action='append', choices=TYPES, help="type of record exported or imported, can be repeated (default: all)")
+    parser.add_argument('--compression', choices=['gzip', 'lzma', 'none'], help="overrides the compression chosen from the file name")
+    parser.add_argument('--append', action='store_true', help="add the exported records at the end of the file")
+    parser.add_argument('--batch-size', type=int, default=1000, help="records per fetch or transaction")
+    parser.add_argument('file', help="NDJSON file, - for the standard input or output")
+    args = parser.parse_args(argv)
+    types = [x for x in TYPES if x in args.type] if args.type else TYPES
+
+    if args.direction == 'export':
+        if args.tkinter:
+            conn = query_log.connect(args.tkinter)
+            records = tkinter_records(conn, args.batch_size, types)
+        elif args.pyqt:
+            school_db.DB_PATH = args.pyqt
+            records = pyqt_records(args.batch_size, types)
+        else:
+            from classes import School
+            records = (x for x in school_records(School(args.json)) if x['type'] in types)
+        count = write_ndjson(records, args.file, args.compression, args.append)
+        print(f"{count} records exported", file=sys.stderr)
+        return
+
+    records = read_ndjson(args.file, args.compression, types)
+    if args.tkinter:
+        from DDL_sql import create_tables
+        conn = query_log.connect(args.tkinter)
+        create_tables(conn)
+        counts = import_tkinter(conn, records, args.batch_size)
+        conn.close()
+    elif args.pyqt:
+        school_db.DB_PATH = args.pyqt
+        school_db.init_db()
+        counts = import_pyqt(records, args.batch_size)
+    else:
+        from classes import School
+        school = School(args.json) if os.path.exists(args.json) else School()
+        school.fileName = args.json
+        with contextlib.redirect_stdout(io.StringIO()): # School prints after saving
+            school, counts = load_into_school(records, school)
+            school.save_to_json()
+    print_counts(counts, 'imported')
+
+
+if __name__ == '__main__':
+    main()
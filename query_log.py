@@ -0,0 +1,293 @@
+"""
+Instrumentation of the SQLite connections of both applications.
+
+:func:`connect` opens a connection whose cursors record, for every statement they execute, the statement text, the
+shape of its parameters, the number of rows it touched or returned and its latency (execution and fetching).
+Statements slower than :data:`SLOW_QUERY_MS` are logged on the ``school.sql`` logger, and per-statement totals and
+latency histograms are kept in memory until :func:`dump` writes them out.
+
+Configuration through the environment:
+
+    SCHOOL_SLOW_QUERY_MS    slow query threshold in milliseconds (default 100)
+    SCHOOL_QUERY_STATS      if set, the statistics are dumped to this JSON file when the program exits
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+logger = logging.getLogger('school.sql')
+
+SLOW_QUERY_MS = float(os.environ.get('SCHOOL_SLOW_QUERY_MS', 100))
+
+# upper bounds (in ms) of the histogram buckets, one extra bucket holds everything slower
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+_stats = {}
+_lock = threading.Lock()
+
+
+def set_slow_threshold(ms):
+    """
+    Changes the latency above which statements are logged as slow.
+
+    :param ms: The new threshold in milliseconds.
+    :type ms: float
+    """
+    global SLOW_QUERY_MS
+    SLOW_QUERY_MS = ms
+
+
+def param_shape(parameters):
+    """
+    Describes the parameters of a statement without their values, e.g. ``(str, int)`` or ``{name, age}``.
+    """
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(sorted(parameters)) + '}'
+    return '(' + ', '.join(type(x).__name__ for x in parameters) + ')'
+
+
+def _bucket(elapsed_ms):
+    bucket = 0
+    while bucket < len(BUCKETS_MS) and elapsed_ms > BUCKETS_MS[bucket]:
+        bucket += 1
+    return bucket
+
+
+def record(sql, shape, rows, elapsed_ms):
+    """
+    Adds one execution of a statement to the statistics and logs it if it was slow.
+
+    :param sql: The statement text.
+    :type sql: str
+    :param shape: The shape of its parameters, see :func:`param_shape`.
+    :type shape: str
+    :param rows: The number of rows modified or returned.
+    :type rows: int
+    :param elapsed_ms: The time spent executing the statement and fetching its rows.
+    :type elapsed_ms: float
+    """
+    sql = ' '.join(sql.split())
+    with _lock:
+        entry = _stats.get(sql)
+        if entry is None:
+            entry = _stats[sql] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                                   'param_shapes': set(), 'histogram': [0] * (len(BUCKETS_MS) + 1)}
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+        entry['rows'] += rows
+        entry['param_shapes'].add(shape)
+        entry['histogram'][_bucket(elapsed_ms)] += 1
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning("slow query (%.1f ms, %d rows, params %s): %s", elapsed_ms, rows, shape, sql)
+
+
+def _add_fetch(sql, shape, rows, executed_ms, fetched_ms):
+    """
+    Adds the rows fetched after an execution recorded by :func:`record` with ``executed_ms`` and no rows, moving it to
+    the histogram bucket of its whole latency. It is logged if only the fetching made it slow.
+    """
+    sql = ' '.join(sql.split())
+    elapsed_ms = executed_ms + fetched_ms
+    with _lock:
+        entry = _stats.get(sql)
+        if entry is None: # reset() since the execution
+            return
+        entry['total_ms'] += fetched_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+        entry['rows'] += rows
+        entry['histogram'][_bucket(executed_ms)] -= 1
+        entry['histogram'][_bucket(elapsed_ms)] += 1
+    if executed_ms < SLOW_QUERY_MS <= elapsed_ms:
+        logger.warning("slow query (%.1f ms, %d rows, params %s): %s", elapsed_ms, rows, shape, sql)
+
+
+def statistics():
+    """
+    Returns the per-statement statistics gathered so far, the most expensive statements first.
+
+    :return: A list of dictionaries with the statement, its call count, total/mean/max latency, rows, parameter shapes and latency histogram.
+    :rtype: list
+    """
+    labels = [f"<={x}ms" for x in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+    with _lock:
+        items = [(sql, dict(entry)) for sql, entry in _stats.items()]
+    report = []
+    for sql, entry in sorted(items, key=lambda x: x[1]['total_ms'], reverse=True):
+        report.append({
+            'sql': sql,
+            'count': entry['count'],
+            'total_ms': round(entry['total_ms'], 3),
+            'mean_ms': round(entry['total_ms'] / entry['count'], 3),
+            'max_ms': round(entry['max_ms'], 3),
+            'rows': entry['rows'],
+            'param_shapes': sorted(entry['param_shapes']),
+            'histogram': {label: n for label, n in zip(labels, entry['histogram']) if n},
+        })
+    return report
+
+
+def reset():
+    """
+    Forgets all the statistics gathered so far.
+    """
+    with _lock:
+        _stats.clear()
+
+
+def dump(path):
+    """
+    Writes the statistics returned by :func:`statistics` to a JSON file.
+
+    :param path: The file to write.
+    :type path: str
+    """
+    with open(path, 'w') as f:
+        json.dump(statistics(), f, indent=2)
+
+
+def dump_on_exit(path):
+    """
+    Registers a :func:`dump` of the statistics to ``path`` when the interpreter exits.
+    """
+    atexit.register(dump, path)
+
+
+class LoggedCursor(sqlite3.Cursor):
+    """
+    Cursor recording every statement it runs. A SELECT is recorded as soon as it is executed; the time spent fetching
+    its rows is added once the rows are exhausted, the cursor is reused, closed or freed, or its connection is closed.
+    """
+    _pending = None
+
+    def _finish(self):
+        if self._pending is not None:
+            sql, shape, executed, fetched, rows = self._pending
+            self._pending = None
+            self.connection._fetching.discard(self)
+            _add_fetch(sql, shape, rows, executed * 1000, fetched * 1000)
+
+    def _started(self, sql, shape, start):
+        self._finish()
+        elapsed = time.perf_counter() - start
+        if self.description is None: # nothing to fetch
+            record(sql, shape, max(self.rowcount, 0), elapsed * 1000)
+        else:
+            record(sql, shape, 0, elapsed * 1000)
+            self._pending = [sql, shape, elapsed, 0.0, 0]
+            self.connection._fetching.add(self)
+
+    def _fetched(self, rows, start, exhausted):
+        if self._pending is not None:
+            self._pending[3] += time.perf_counter() - start
+            self._pending[4] += rows
+            if exhausted:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._started(sql, param_shape(parameters), start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        if isinstance(seq_of_parameters, (list, tuple)):
+            shape = f"{len(seq_of_parameters)} x " + (param_shape(seq_of_parameters[0]) if seq_of_parameters else '()')
+        else:
+            shape = 'iterator'
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._started(sql, shape, start)
+        return self
+
+    def executescript(self, sql_script):
+        self._finish()
+        start = time.perf_counter()
+        super().executescript(sql_script)
+        record(sql_script, '()', 0, (time.perf_counter() - start) * 1000)
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(row is not None, start, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), start, not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), start, True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(0, start, True)
+            raise
+        self._fetched(1, start, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class LoggedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors, including the ones created by the execute shortcuts, are :class:`LoggedCursor` objects.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fetching = weakref.WeakSet() # cursors with rows not fetched yet
+
+    def cursor(self, factory=LoggedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        # the commit is where the disk is synced, it usually dominates the cost of a write
+        start = time.perf_counter()
+        super().commit()
+        record('COMMIT', '()', 0, (time.perf_counter() - start) * 1000)
+
+    def close(self):
+        for cursor in list(self._fetching):
+            cursor._finish()
+        super().close()
+
+
+def connect(database, **kwargs):
+    """
+    Opens an instrumented connection, takes the same arguments as :func:`sqlite3.connect`.
+
+    :rtype: LoggedConnection
+    """
+    return sqlite3.connect(database, factory=LoggedConnection, **kwargs)
+
+
+if os.environ.get('SCHOOL_QUERY_STATS'):
+    dump_on_exit(os.environ['SCHOOL_QUERY_STATS'])
@@ -0,0 +1,212 @@
+"""
+Vectorized statistics over a :class:`classes.School`: age distribution, enrollments per course and course overlaps.
+
+A :class:`SchoolArrays` holds the school as NumPy arrays, built once from a School, a JSON file or a binary snapshot:
+the age of every student, and one (student number, course number) pair per enrollment. The statistics are then
+computed with whole-array operations (``bincount``, sorting, ``unique``) instead of loops over Student objects.
+NumPy is required by this module only (``pip install numpy``).
+
+Usage::
+
+    python school_analytics.py school.json --top 10
+    python school_analytics.py school.snap
+"""
+import argparse
+import itertools
+import json
+from operator import attrgetter, itemgetter
+
+import numpy as np
+
+from school_snapshot import Snapshot
+
+# layout of a STUDENT record of a snapshot, see school_snapshot.STUDENT
+_STUDENT_DTYPE = np.dtype([('id', '<u4'), ('name', '<u4'), ('age', '<u4'), ('email', '<u4'), ('first', '<u4'), ('count', '<u4')])
+# layout of a COURSE record of a snapshot, see school_snapshot.COURSE
+_COURSE_DTYPE = np.dtype([('id', '<u4'), ('name', '<u4'), ('instructor', '<i4'), ('first', '<u4'), ('count', '<u4')])
+
+
+class SchoolArrays(object):
+    """
+    Column arrays of a school. Students and courses are numbered by their position in the lists of the school.
+
+    **Sphinx-style documentation**
+
+    :param student_ids: ID of every student.
+    :type student_ids: list[str]
+    :param ages: Age of every student.
+    :type ages: numpy.ndarray
+    :param course_ids: ID of every course.
+    :type course_ids: list[str]
+    :param enrollment_student: Student number of every enrollment.
+    :type enrollment_student: numpy.ndarray
+    :param enrollment_course: Course number of every enrollment, in the same order.
+    :type enrollment_course: numpy.ndarray
+    """
+    def __init__(self, student_ids, ages, course_ids, enrollment_student, enrollment_course):
+        self.student_ids = student_ids
+        self.ages = np.asarray(ages, dtype=np.int32)
+        self.course_ids = course_ids
+        self.enrollment_student = np.asarray(enrollment_student, dtype=np.int32)
+        self.enrollment_course = np.asarray(enrollment_course, dtype=np.int32)
+
+    @classmethod
+    def _from_lists(cls, student_ids, ages, course_ids, counts, registered):
+        """
+        Builds the arrays from the number of registrations of every student and the registered course IDs of all the
+        students one after the other. Registrations to unknown courses are dropped.
+        """
+        course_number = {x: i for i, x in enumerate(course_ids)}
+        counts = np.fromiter(counts, dtype=np.int64, count=len(student_ids))
+        enrollment_course = np.fromiter(map(course_number.get, registered, itertools.repeat(-1)), dtype=np.int32, count=int(counts.sum()))
+        enrollment_student = np.repeat(np.arange(len(student_ids), dtype=np.int32), counts)
+        known = enrollment_course >= 0
+        if not known.all():
+            enrollment_student, enrollment_course = enrollment_student[known], enrollment_course[known]
+        return cls(student_ids, np.fromiter(ages, dtype=np.int32, count=len(student_ids)), course_ids, enrollment_student, enrollment_course)
+
+    @classmethod
+    def from_school(cls, school):
+        """
+        Converts a :class:`classes.School`.
+        """
+        registrations = list(map(attrgetter('registered_courses'), school.students))
+        return cls._from_lists(list(map(attrgetter('student_id'), school.students)), map(attrgetter('age'), school.students),
+                               list(map(attrgetter('course_id'), school.courses)), map(len, registrations),
+                               map(attrgetter('course_id'), itertools.chain.from_iterable(registrations)))
+
+    @classmethod
+    def from_json(cls, path):
+        """
+        Reads a JSON file of :meth:`classes.School.save_to_json` without building the School objects.
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        registrations = list(map(itemgetter('courses'), data['students']))
+        return cls._from_lists(list(map(itemgetter('id'), data['students'])), map(itemgetter('age'), data['students']),
+                               list(map(itemgetter('id'), data['courses'])), map(len, registrations),
+                               itertools.chain.from_iterable(registrations))
+
+    @classmethod
+    def from_snapshot(cls, path):
+        """
+        Reads a snapshot of :mod:`school_snapshot`, copying its student records and links into arrays without decoding them one by one.
+        """
+        snapshot = Snapshot(path)
+        try:
+            sections = snapshot.sections
+            def section(name, dtype, count):
+                start = sections[name]
+                return np.frombuffer(snapshot.map[start:start + count * dtype.itemsize], dtype=dtype)
+            students = section('students', _STUDENT_DTYPE, snapshot.n_students)
+            courses = section('courses', _COURSE_DTYPE, snapshot.n_courses)
+            counts = students['count'].astype(np.int64)
+            # the links of the students are stored one after the other in student order
+            links = section('student_links', np.dtype('<u4'), int(counts.sum()))
+            offsets = section('string_offsets', np.dtype('<u8'), snapshot.n_strings + 1).tolist()
+            pool = snapshot.map[sections['string_pool']:sections['students']]
+        finally:
+            snapshot.close()
+        def strings(numbers):
+            return [pool[offsets[x]:offsets[x + 1]].decode('utf-8') for x in numbers.tolist()]
+        return cls(strings(students['id']), students['age'], strings(courses['id']),
+                   np.repeat(np.arange(len(students), dtype=np.int32), counts), links)
+
+    def age_histogram(self):
+        """
+        :return: The distinct ages in increasing order and the number of students of each.
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        counts = np.bincount(self.ages)
+        ages = np.flatnonzero(counts)
+        return ages, counts[ages]
+
+    def age_summary(self):
+        """
+        :return: The number of students and the mean, standard deviation, minimum, median and maximum of their ages.
+        :rtype: dict
+        """
+        if len(self.ages) == 0:
+            return {'students': 0}
+        return {'students': len(self.ages), 'mean': float(self.ages.mean()), 'std': float(self.ages.std()),
+                'min': int(self.ages.min()), 'median': float(np.median(self.ages)), 'max': int(self.ages.max())}
+
+    def students_per_course(self):
+        """
+        :return: The number of students enrolled in every course, indexed by course number.
+        :rtype: numpy.ndarray
+        """
+        return np.bincount(self.enrollment_course, minlength=len(self.course_ids))
+
+    def courses_per_student(self):
+        """
+        :return: The number of courses of every student, indexed by student number.
+        :rtype: numpy.ndarray
+        """
+        return np.bincount(self.enrollment_student, minlength=len(self.student_ids))
+
+    def enrollment_histogram(self):
+        """
+        :return: ``counts[k]`` is the number of courses with exactly k students.
+        :rtype: numpy.ndarray
+        """
+        return np.bincount(self.students_per_course())
+
+    def course_overlap(self):
+        """
+        Counts, for every pair of courses, the students enrolled in both. Only the pairs sharing at least one student are returned.
+
+        The enrollments are sorted by student then course, so the pairs of a student are the enrollments ``d`` positions
+        apart within its run, for every distance ``d`` up to the largest number of courses of a student.
+
+        :return: ``(course_a, course_b, shared)`` arrays, with ``course_a < course_b``, ordered by pair.
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        n_courses = len(self.course_ids)
+        keys = np.sort(self.enrollment_student.astype(np.int64) * n_courses + self.enrollment_course)
+        students, courses = np.divmod(keys, n_courses)
+        codes = []
+        longest = int(self.courses_per_student().max()) if len(students) else 0
+        for d in range(1, longest):
+            same = students[d:] == students[:-d]
+            first, second = courses[:-d][same], courses[d:][same]
+            distinct = first != second # a course registered twice is not an overlap
+            codes.append(first[distinct] * n_courses + second[distinct])
+        if not codes:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+        pairs, shared = np.unique(np.concatenate(codes), return_counts=True)
+        return pairs // n_courses, pairs % n_courses, shared
+
+    def top_overlaps(self, n=10):
+        """
+        :return: The ``n`` pairs of courses sharing the most students, as ``(course_id, course_id, shared)`` tuples.
+        :rtype: list
+        """
+        first, second, shared = self.course_overlap()
+        top = np.argsort(-shared, kind='stable')[:n]
+        return [(self.course_ids[first[i]], self.course_ids[second[i]], int(shared[i])) for i in top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the age, enrollment and course overlap statistics of a School JSON file or snapshot.")
+    parser.add_argument('path', help="a .json file or a binary snapshot")
+    parser.add_argument('--top', type=int, default=10, help="number of course pairs with the most shared students to print")
+    args = parser.parse_args(argv)
+
+    arrays = SchoolArrays.from_json(args.path) if args.path.endswith('.json') else SchoolArrays.from_snapshot(args.path)
+    print("ages:", arrays.age_summary())
+    for age, count in zip(*arrays.age_histogram()):
+        print(f"  {age:>3} {count:>9}")
+    per_course = arrays.students_per_course()
+    print(f"enrollments: {len(arrays.enrollment_course)} in {len(arrays.course_ids)} courses, "
+          f"{int(np.count_nonzero(arrays.courses_per_student() == 0))} students without course")
+    if len(per_course):
+        print(f"students per course: min {per_course.min()}, mean {per_course.mean():.1f}, max {per_course.max()}")
+    print("courses sharing the most students:")
+    for first, second, shared in arrays.top_overlaps(args.top):
+        print(f"  {first} {second} {shared}")
+
+
+if __name__ == '__main__':
+    main()
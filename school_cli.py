@@ -0,0 +1,172 @@
+"""
+Headless command line interface to the school database of the PyQt application.
+
+It reuses the data layer of :mod:`school_db` for batch jobs that do not need a display: bulk import and export,
+bulk enrollment and assignment, search and backup. Files are CSV with a header line and are processed record by
+record, ``-`` stands for the standard input or output. With ``--format ndjson`` they are newline-delimited JSON
+instead, optionally compressed (see :mod:`ndjson_io`). Imported files are validated as a whole first (see
+:mod:`bulk_validation`) and nothing is written if a record is invalid, unless ``--skip-invalid`` is given.
+
+Examples::
+
+    python school_cli.py --db school.db import students students.csv
+    python school_cli.py --db school.db enroll enrollments.csv
+    python school_cli.py --db school.db export courses - > courses.csv
+    python school_cli.py --db school.db --format ndjson export students students.ndjson.gz
+    python school_cli.py --db school.db search smith
+    python school_cli.py --db school.db backup nightly.db
+"""
+import argparse
+import contextlib
+import csv
+import sys
+
+import ndjson_io
+import school_db
+from bulk_validation import validate_records
+
+# table of school_db.RECORD_COLUMNS -> type of its NDJSON records
+NDJSON_TYPES = {table: record_type for record_type, table in ndjson_io.TABLES.items()}
+
+
+@contextlib.contextmanager
+def open_stream(path, mode):
+    """
+    Opens a CSV file, or the standard input/output when ``path`` is ``-``.
+    """
+    if path == '-':
+        yield sys.stdin if mode == 'r' else sys.stdout
+    else:
+        with open(path, mode, newline='') as f:
+            yield f
+
+
+def read_rows(path, columns):
+    """
+    Streams the rows of a CSV file as tuples ordered like ``columns``, which must all be in the header.
+    """
+    with open_stream(path, 'r') as f:
+        reader = csv.DictReader(f)
+        missing = [x for x in columns if x not in (reader.fieldnames or [])]
+        if missing:
+            raise SystemExit(f"{path}: missing column(s) {', '.join(missing)}")
+        for row in reader:
+            yield tuple(row[x] for x in columns)
+
+
+def read_table(args, table):
+    """
+    Streams the records of ``table`` from the file of the command, CSV or NDJSON according to ``--format``.
+    """
+    if args.format == 'ndjson':
+        record_type = NDJSON_TYPES[table]
+        return ndjson_io.as_rows(ndjson_io.read_ndjson(args.file, types=[record_type]), record_type)
+    return read_rows(args.file, school_db.RECORD_COLUMNS[table])
+
+
+def cmd_init(args):
+    school_db.init_db()
+
+
+def cmd_import(args):
+    rows = read_table(args, args.table)
+    conn = school_db.connect()
+    # errors are reported by line, for NDJSON the line among the records of the table
+    report = validate_records(args.table, rows, conn, args.workers, first_line=2 if args.format == 'csv' else 1)
+    conn.close()
+    if args.report:
+        report.write_json(args.report)
+    if report.errors:
+        report.write(sys.stderr, args.file)
+        if not args.skip_invalid:
+            raise SystemExit("nothing imported: fix the errors or use --skip-invalid")
+    inserted, skipped = school_db.import_records(args.table, report.valid, args.batch_size)
+    print(f"{inserted} {args.table} imported, {skipped} already existing skipped", file=sys.stderr)
+
+
+def cmd_export(args):
+    if args.format == 'ndjson':
+        record_type = NDJSON_TYPES[args.table]
+        records = (ndjson_io.make_record(record_type, x) for x in school_db.iter_records(args.table, args.batch_size))
+        ndjson_io.write_ndjson(records, args.file)
+        return
+    with open_stream(args.file, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(school_db.RECORD_COLUMNS[args.table])
+        writer.writerows(school_db.iter_records(args.table, args.batch_size))
+
+
+def cmd_enroll(args):
+    pairs = read_table(args, 'enrollments')
+    report = school_db.enroll_many(pairs, args.batch_size)
+    for student_id, course_id, reason in report['skipped']:
+        print(f"skipped {student_id},{course_id}: {reason}", file=sys.stderr)
+    print(f"{report['enrolled']} enrollments created, {len(report['skipped'])} skipped", file=sys.stderr)
+
+
+def cmd_assign(args):
+    pairs = read_rows(args.file, ('instructor_id', 'course_id'))
+    assigned, skipped = school_db.assign_many(pairs, args.batch_size)
+    print(f"{assigned} courses assigned, {skipped} skipped (unknown instructor or course)", file=sys.stderr)
+
+
+def cmd_search(args):
+    writer = csv.writer(sys.stdout)
+    writer.writerow(('type', 'id', 'name', 'age', 'email'))
+    writer.writerows(school_db.search_records(args.query, args.batch_size))
+
+
+def cmd_backup(args):
+    school_db.backup_database_to(args.file)
+    print(f"database copied to {args.file}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch operations on the school database without a GUI.")
+    parser.add_argument('--db', default='school.db', help="database file (default: school.db)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="records per transaction or fetch")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv', help="format of the files imported, exported and enrolled (default: csv)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('init', help="create the tables").set_defaults(func=cmd_init)
+
+    p = commands.add_parser('import', help="insert students, instructors or courses from a CSV file")
+    p.add_argument('table', choices=['students', 'instructors', 'courses'])
+    p.add_argument('file', help="CSV file with a header line or NDJSON file, - for stdin")
+    p.add_argument('--skip-invalid', action='store_true', help="import the valid records even if others have errors")
+    p.add_argument('--report', metavar='FILE', help="write the validation errors to FILE as JSON")
+    p.add_argument('--workers', type=int, help="validation processes (default: one per CPU)")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser('export', help="write a table to a CSV or NDJSON file")
+    p.add_argument('table', choices=sorted(school_db.RECORD_COLUMNS))
+    p.add_argument('file', nargs='?', default='-', help="CSV or NDJSON file, - for stdout (default)")
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser('enroll', help="enroll students from a CSV file of student_id,course_id or the enrollments of an NDJSON file")
+    p.add_argument('file')
+    p.set_defaults(func=cmd_enroll)
+
+    p = commands.add_parser('assign', help="assign instructors from a CSV file of instructor_id,course_id")
+    p.add_argument('file')
+    p.set_defaults(func=cmd_assign)
+
+    p = commands.add_parser('search', help="print the records whose name or ID contains QUERY")
+    p.add_argument('query')
+    p.set_defaults(func=cmd_search)
+
+    p = commands.add_parser('backup', help="copy the database to FILE")
+    p.add_argument('file')
+    p.set_defaults(func=cmd_backup)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    school_db.DB_PATH = args.db
+    school_db.init_db() # creates the tables of a new database, does nothing otherwise
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1396 @@
+import sqlite3
+import re
+
+import query_log
+import timetable
+import trigram_index
+
+"""
+Data layer of the PyQt application. Every function opens its own connection to the SQLite database at :data:`DB_PATH`
+and takes the textual IDs (student_id, instructor_id, course_id) shown to the user.
+"""
+
+DB_PATH = 'school.db'
+
+def connect():
+    """
+    Opens a new connection to the school database, with the foreign keys enforced. The connection records its
+    statements in :mod:`query_log`.
+
+    :return: A connection to the database file at :data:`DB_PATH`.
+    :rtype: sqlite3.Connection
+    """
+    conn = query_log.connect(DB_PATH)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+# external ID column of the tables that have one
+ID_COLUMNS = {'students': 'student_id', 'instructors': 'instructor_id', 'courses': 'course_id'}
+
+class IdMap(object):
+    """
+    In-memory bidirectional map between the external IDs (student_id, instructor_id, course_id) and the integer rowids used as keys inside the database, plus the instructor names by rowid.
+
+    It is filled by :func:`warm_id_map` and kept up to date by the insert, update and delete functions of this module, so the write paths can use rowids directly and display code can turn ``courses.instructor_id`` into a name without a query.
+    Lookups that miss are resolved with a query and cached. The map belongs to one process: call :func:`warm_id_map` again if another program changed the IDs.
+
+    **docstring**
+    """
+    def __init__(self):
+        self.rowids = {table: {} for table in ID_COLUMNS}
+        self.external_ids = {table: {} for table in ID_COLUMNS}
+        self.instructor_names = {}
+        self.warm = False
+
+    def clear(self):
+        for table in ID_COLUMNS:
+            self.rowids[table].clear()
+            self.external_ids[table].clear()
+        self.instructor_names.clear()
+        self.warm = False
+
+    def load(self, conn):
+        """
+        Replaces the content of the map with the IDs stored in the database.
+        """
+        self.clear()
+        for table, column in ID_COLUMNS.items():
+            for external_id, rowid in conn.execute(f'SELECT {column}, id FROM {table}'):
+                self.put(table, external_id, rowid)
+        self.instructor_names.update(conn.execute('SELECT id, name FROM instructors'))
+        self.warm = True
+
+    def put(self, table, external_id, rowid):
+        self.rowids[table][external_id] = rowid
+        self.external_ids[table][rowid] = external_id
+
+    def discard(self, table, external_id):
+        rowid = self.rowids[table].pop(external_id, None)
+        if rowid is not None:
+            self.external_ids[table].pop(rowid, None)
+            if table == 'instructors':
+                self.instructor_names.pop(rowid, None)
+
+    def rename(self, table, old_id, new_id):
+        rowid = self.rowids[table].pop(old_id, None)
+        if rowid is not None:
+            self.put(table, new_id, rowid)
+
+    def rowid(self, conn, table, external_id):
+        """
+        Returns the rowid of an external ID, querying (and caching) it through ``conn`` when it is not in the map.
+
+        :return: The rowid, or None if the ID does not exist.
+        :rtype: int
+        """
+        rowid = self.rowids[table].get(external_id)
+        if rowid is None:
+            row = conn.execute(f'SELECT id FROM {table} WHERE {ID_COLUMNS[table]}=?', (external_id,)).fetchone()
+            if row is not None:
+                rowid = row[0]
+                self.put(table, external_id, rowid)
+        return rowid
+
+    def instructor_name(self, rowid):
+        """
+        Returns the name of the instructor with the given rowid, or None if it is unknown.
+        """
+        return self.instructor_names.get(rowid)
+
+id_map = IdMap()
+
+def warm_id_map():
+    """
+    Loads every external ID of the database into :data:`id_map`. Called once at startup by the applications.
+    """
+    conn = connect()
+    try:
+        id_map.load(conn)
+    finally:
+        conn.close()
+
+def init_db():
+    """
+    Initializes the SQLite database by creating necessary tables if they do not already exist.
+
+    **docstring** 
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            student_id TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS instructors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            instructor_id TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS courses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id TEXT NOT NULL UNIQUE,
+            course_name TEXT NOT NULL,
+            instructor_id INTEGER,
+            FOREIGN KEY (instructor_id) REFERENCES instructors(id)
+        )
+    ''')
+    # time slot of every course, computed by timetable.py
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS course_timeslots (
+            course_id INTEGER PRIMARY KEY,
+            timeslot INTEGER NOT NULL,
+            FOREIGN KEY (course_id) REFERENCES courses(id)
+        )
+    ''')
+    # NOCASE indexes so the dropdown completers can serve name prefixes with an index range scan
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_students_name ON students (name COLLATE NOCASE)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_instructors_name ON instructors (name COLLATE NOCASE)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_courses_name ON courses (course_name COLLATE NOCASE)')
+    conn.commit()
+    if conn.execute('PRAGMA user_version').fetchone()[0] < 1:
+        migrate_enrollments(conn)
+    if conn.execute('PRAGMA user_version').fetchone()[0] < 2:
+        create_summary_tables(conn)
+    if conn.execute('PRAGMA user_version').fetchone()[0] < 3:
+        # version 3: trigram index of the typo tolerant search, see trigram_index.py
+        trigram_index.create_index(conn, trigram_index.PYQT)
+        conn.execute('PRAGMA user_version = 3')
+        conn.commit()
+    if conn.execute('PRAGMA user_version').fetchone()[0] < 4:
+        migrate_delete_triggers(conn)
+    conn.close()
+
+# enrollments clustered on (course_id, student_id) for rosters, with the reverse index covering student schedules
+_ENROLLMENTS_DDL = '''
+    CREATE TABLE enrollments (
+        student_id INTEGER NOT NULL,
+        course_id INTEGER NOT NULL,
+        PRIMARY KEY (course_id, student_id),
+        FOREIGN KEY (student_id) REFERENCES students(id),
+        FOREIGN KEY (course_id) REFERENCES courses(id)
+    ) WITHOUT ROWID
+'''
+
+def migrate_enrollments(conn):
+    """
+    Brings the enrollments table of a database to schema version 1, in one transaction.
+
+    **Sphinx-style documentation**
+
+    Databases created before version 1 store enrollments in a table without key, which accepts duplicates and is
+    scanned by every roster or schedule lookup. Its rows are copied into the clustered table of :data:`_ENROLLMENTS_DDL`,
+    duplicate pairs and pairs with a NULL ID (left by enrollments of unknown students or courses) or the ID of a deleted
+    record being dropped.
+    A database without enrollments table just gets the new one.
+
+    :param conn: An open connection to the database, with no transaction in progress.
+    :type conn: sqlite3.Connection
+    :return: The number of legacy rows dropped.
+    :rtype: int
+    """
+    dropped = 0
+    conn.execute('BEGIN')
+    try:
+        legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='enrollments'").fetchone()
+        if legacy:
+            conn.execute('ALTER TABLE enrollments RENAME TO enrollments_legacy')
+        conn.execute(_ENROLLMENTS_DDL)
+        conn.execute('CREATE INDEX idx_enrollments_student ON enrollments (student_id, course_id)')
+        if legacy:
+            conn.execute('''
+                INSERT OR IGNORE INTO enrollments (student_id, course_id)
+                SELECT student_id, course_id FROM enrollments_legacy
+                WHERE student_id IN (SELECT id FROM students) AND course_id IN (SELECT id FROM courses)
+                ORDER BY course_id, student_id
+            ''')
+            kept = conn.execute('SELECT COUNT(*) FROM enrollments').fetchone()[0]
+            dropped = conn.execute('SELECT COUNT(*) FROM enrollments_legacy').fetchone()[0] - kept
+            conn.execute('DROP TABLE enrollments_legacy')
+        conn.execute('PRAGMA user_version = 1')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return dropped
+
+# Counters read by the reports, keyed by rowid and kept up to date by the triggers below. Deleting a student or a course
+# also deletes its enrollments, and deleting an instructor unassigns its courses, so no counter includes a deleted record.
+_SUMMARY_DDL = [
+    'CREATE TABLE course_enrollment_counts (course_id INTEGER PRIMARY KEY, students INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE instructor_course_load (instructor_id INTEGER PRIMARY KEY, courses INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE student_course_counts (student_id INTEGER PRIMARY KEY, courses INTEGER NOT NULL DEFAULT 0)',
+    'CREATE INDEX idx_student_course_counts_courses ON student_course_counts (courses)',
+    '''CREATE TRIGGER summary_enrollments_insert AFTER INSERT ON enrollments BEGIN
+        UPDATE course_enrollment_counts SET students = students + 1 WHERE course_id = new.course_id;
+        UPDATE student_course_counts SET courses = courses + 1 WHERE student_id = new.student_id;
+    END''',
+    '''CREATE TRIGGER summary_enrollments_delete AFTER DELETE ON enrollments BEGIN
+        UPDATE course_enrollment_counts SET students = students - 1 WHERE course_id = old.course_id;
+        UPDATE student_course_counts SET courses = courses - 1 WHERE student_id = old.student_id;
+    END''',
+    '''CREATE TRIGGER summary_students_insert AFTER INSERT ON students BEGIN
+        INSERT INTO student_course_counts (student_id) VALUES (new.id);
+    END''',
+    '''CREATE TRIGGER summary_instructors_insert AFTER INSERT ON instructors BEGIN
+        INSERT INTO instructor_course_load (instructor_id) VALUES (new.id);
+    END''',
+    '''CREATE TRIGGER summary_courses_insert AFTER INSERT ON courses BEGIN
+        INSERT INTO course_enrollment_counts (course_id) VALUES (new.id);
+        UPDATE instructor_course_load SET courses = courses + 1 WHERE instructor_id = new.instructor_id;
+    END''',
+    '''CREATE TRIGGER summary_courses_assign AFTER UPDATE OF instructor_id ON courses
+    WHEN new.instructor_id IS NOT old.instructor_id BEGIN
+        UPDATE instructor_course_load SET courses = courses - 1 WHERE instructor_id = old.instructor_id;
+        UPDATE instructor_course_load SET courses = courses + 1 WHERE instructor_id = new.instructor_id;
+    END''',
+]
+
+# The dependent rows go BEFORE the record itself, so the triggers of the enrollments (see school_sync.py) still find the
+# student and the course, and no enrollment or course references a deleted row at any point of the statement.
+_DELETE_TRIGGERS_DDL = [
+    '''CREATE TRIGGER summary_students_delete BEFORE DELETE ON students BEGIN
+        DELETE FROM enrollments WHERE student_id = old.id;
+        DELETE FROM student_course_counts WHERE student_id = old.id;
+    END''',
+    '''CREATE TRIGGER summary_instructors_delete BEFORE DELETE ON instructors BEGIN
+        UPDATE courses SET instructor_id = NULL WHERE instructor_id = old.id;
+        DELETE FROM instructor_course_load WHERE instructor_id = old.id;
+    END''',
+    '''CREATE TRIGGER summary_courses_delete BEFORE DELETE ON courses BEGIN
+        DELETE FROM enrollments WHERE course_id = old.id;
+        DELETE FROM course_timeslots WHERE course_id = old.id;
+        DELETE FROM course_enrollment_counts WHERE course_id = old.id;
+        UPDATE instructor_course_load SET courses = courses - 1 WHERE instructor_id = old.instructor_id;
+    END''',
+]
+
+def create_summary_tables(conn):
+    """
+    Brings a database at schema version 1 to version 2, in one transaction: creates the summary tables read by the
+    reports with their triggers, and fills them from the current data.
+
+    **Sphinx-style documentation**
+
+    Enrollments and course assignments left behind by records deleted before version 2 are removed first, as the
+    triggers now do when a record is deleted.
+
+    :param conn: An open connection to the database, with no transaction in progress.
+    :type conn: sqlite3.Connection
+    """
+    conn.execute('BEGIN')
+    try:
+        conn.execute('''
+            DELETE FROM enrollments
+            WHERE student_id NOT IN (SELECT id FROM students) OR course_id NOT IN (SELECT id FROM courses)
+        ''')
+        conn.execute('UPDATE courses SET instructor_id = NULL WHERE instructor_id NOT IN (SELECT id FROM instructors)')
+        for statement in _SUMMARY_DDL + _DELETE_TRIGGERS_DDL:
+            conn.execute(statement)
+        conn.execute('''
+            INSERT INTO course_enrollment_counts (course_id, students)
+            SELECT id, (SELECT COUNT(*) FROM enrollments WHERE enrollments.course_id = courses.id) FROM courses
+        ''')
+        conn.execute('''
+            INSERT INTO instructor_course_load (instructor_id, courses)
+            SELECT id, (SELECT COUNT(*) FROM courses WHERE courses.instructor_id = instructors.id) FROM instructors
+        ''')
+        conn.execute('''
+            INSERT INTO student_course_counts (student_id, courses)
+            SELECT id, (SELECT COUNT(*) FROM enrollments WHERE enrollments.student_id = students.id) FROM students
+        ''')
+        conn.execute('PRAGMA user_version = 2')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def migrate_delete_triggers(conn):
+    """
+    Brings a database at schema version 3 to version 4, in one transaction: the delete triggers of version 2 removed
+    the enrollments of a student or a course after the record itself, when the change log of :mod:`school_sync` can no
+    longer resolve their IDs. They are replaced by the triggers of :data:`_DELETE_TRIGGERS_DDL`.
+
+    **Sphinx-style documentation**
+
+    :param conn: An open connection to the database, with no transaction in progress.
+    :type conn: sqlite3.Connection
+    """
+    conn.execute('BEGIN')
+    try:
+        for table in ID_COLUMNS:
+            conn.execute(f'DROP TRIGGER IF EXISTS summary_{table}_delete')
+        for statement in _DELETE_TRIGGERS_DDL:
+            conn.execute(statement)
+        conn.execute('PRAGMA user_version = 4')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+# Write operations on an open connection, without commit. The *_to_db functions below run them in a transaction of
+# their own; write_queue.WriteBehindQueue runs many of them in one group commit.
+
+def insert_student(conn, name, age, email, student_id):
+    """
+    Inserts a student and records its rowid in :data:`id_map`.
+
+    :raises sqlite3.IntegrityError: If the student ID or email is already in use.
+    :return: The rowid of the new student.
+    :rtype: int
+    """
+    cursor = conn.execute('INSERT INTO students (name, age, email, student_id) VALUES (?, ?, ?, ?)', (name, age, email, student_id))
+    id_map.put('students', student_id, cursor.lastrowid)
+    return cursor.lastrowid
+
+def insert_instructor(conn, name, age, email, instructor_id):
+    """
+    Inserts an instructor and records its rowid and name in :data:`id_map`.
+
+    :raises sqlite3.IntegrityError: If the instructor ID or email is already in use.
+    :return: The rowid of the new instructor.
+    :rtype: int
+    """
+    cursor = conn.execute('INSERT INTO instructors (name, age, email, instructor_id) VALUES (?, ?, ?, ?)', (name, age, email, instructor_id))
+    id_map.put('instructors', instructor_id, cursor.lastrowid)
+    id_map.instructor_names[cursor.lastrowid] = name
+    return cursor.lastrowid
+
+def insert_course(conn, course_id, course_name):
+    """
+    Inserts a course and records its rowid in :data:`id_map`.
+
+    :raises sqlite3.IntegrityError: If the course ID already exists.
+    :return: The rowid of the new course.
+    :rtype: int
+    """
+    cursor = conn.execute('INSERT INTO courses (course_id, course_name) VALUES (?, ?)', (course_id, course_name))
+    id_map.put('courses', course_id, cursor.lastrowid)
+    return cursor.lastrowid
+
+def insert_enrollment(conn, student_id, course_id):
+    """
+    Enrolls a student in a course, the IDs being resolved through :data:`id_map`.
+
+    :raises sqlite3.IntegrityError: If the student is already enrolled in the course.
+    :return: False if the student or the course does not exist, True otherwise.
+    :rtype: bool
+    """
+    return _write_rowids(conn, 'INSERT INTO enrollments (student_id, course_id) VALUES (?, ?)',
+                         ('students', student_id), ('courses', course_id))
+
+def set_course_instructor(conn, instructor_id, course_id):
+    """
+    Assigns an instructor to a course, the IDs being resolved through :data:`id_map`.
+
+    :return: False if the instructor or the course does not exist, True otherwise.
+    :rtype: bool
+    """
+    return _write_rowids(conn, 'UPDATE courses SET instructor_id=? WHERE id=?',
+                         ('instructors', instructor_id), ('courses', course_id))
+
+def _write_rowids(conn, statement, *ids):
+    """
+    Runs a statement whose parameters are the rowids of ``(table, external ID)`` pairs, resolved through
+    :data:`id_map`. A cached rowid is stale when another program deleted the record since it was cached: the statement
+    then fails on a foreign key or changes no row, and the IDs are resolved again from the database before one retry.
+
+    :return: False if one of the IDs does not exist, True otherwise.
+    :rtype: bool
+    """
+    rowids = [id_map.rowid(conn, table, external_id) for table, external_id in ids]
+    for retry in (False, True):
+        if None in rowids:
+            return False
+        try:
+            if conn.execute(statement, rowids).rowcount:
+                return True
+        except sqlite3.IntegrityError:
+            if retry or not _resolve_again(conn, ids, rowids): # the rowids were right, e.g. a duplicate enrollment
+                raise
+            continue
+        if retry or not _resolve_again(conn, ids, rowids):
+            return False
+
+def _resolve_again(conn, ids, rowids):
+    """
+    Drops the IDs from :data:`id_map` and resolves them from the database into ``rowids``.
+
+    :return: True if one of the rowids changed.
+    :rtype: bool
+    """
+    for table, external_id in ids:
+        id_map.discard(table, external_id)
+    resolved = [id_map.rowid(conn, table, external_id) for table, external_id in ids]
+    changed = resolved != rowids
+    rowids[:] = resolved
+    return changed
+
+def add_student_to_db(name, age, email, student_id):
+    """
+    Adds a new student to the database.
+
+    **Sphinx-style documentation**
+
+    :param name: The student's full name.
+    :type name: str
+    :param age: The student's age, must be a positive integer.
+    :type age: int
+    :param email: The student's email address.
+    :type email: str
+    :param student_id: A unique identifier for the student.
+    :type student_id: str
+    :raises sqlite3.IntegrityError: If the student ID or email is already in use.
+    :return: True if the student is added successfully, False if there's an IntegrityError.
+    :rtype: bool
+    """
+    conn = connect()
+    try:
+        insert_student(conn, name, age, email, student_id)
+        conn.commit()
+    except sqlite3.IntegrityError:
+        conn.close()
+        return False
+    conn.close()
+    return True
+
+def add_instructor_to_db(name, age, email, instructor_id):
+    """
+    **Sphinx-style documentation**
+    Adds a new instructor to the database.
+
+    :param name: The instructor's full name.
+    :type name: str
+    :param age: The instructor's age, must be a positive integer.
+    :type age: int
+    :param email: The instructor's email address.
+    :type email: str
+    :param instructor_id: A unique identifier for the instructor.
+    :type instructor_id: str
+    :raises sqlite3.IntegrityError: If the instructor ID or email is already in use.
+    :return: True if the instructor is added successfully, False if there's an IntegrityError.
+    :rtype: bool
+    """
+    conn = connect()
+    try:
+        insert_instructor(conn, name, age, email, instructor_id)
+        conn.commit()
+    except sqlite3.IntegrityError:
+        conn.close()
+        return False
+    conn.close()
+    return True
+
+
+def add_course_to_db(course_id, course_name):
+    """
+    **Sphinx-style documentation**
+    Adds a new course to the database.
+
+    :param course_id: The unique ID for the course.
+    :type course_id: str
+    :param course_name: The name of the course.
+    :type course_name: str
+    :raises sqlite3.IntegrityError: If the course ID already exists.
+    :return: True if the course is added successfully, False if there's an IntegrityError.
+    :rtype: bool
+    """
+    conn = connect()
+    try:
+        insert_course(conn, course_id, course_name)
+        conn.commit()
+    except sqlite3.IntegrityError:
+        conn.close()
+        return False
+    conn.close()
+    return True
+
+def fetch_all_students():
+    """
+    Fetches all students from the database.
+
+    **Sphinx-style documentation** 
+
+    :return: A list of student records, where each record contains:
+        - ID (int)
+        - Name (str)
+        - Age (int)
+        - Email (str)
+        - Student ID (str)
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM students')
+    students = cursor.fetchall()
+    conn.close()
+    return students
+
+def update_student_in_db(old_student_id, new_student_id, new_name, new_age, new_email):
+    """
+    **Sphinx-style documentation** 
+    Updates an existing student's details in the database, including the ID.
+
+    :param old_student_id: The current student ID.
+    :type old_student_id: str
+    :param new_student_id: The updated student ID.
+    :type new_student_id: str
+    :param new_name: The updated student name.
+    :type new_name: str
+    :param new_age: The updated student age.
+    :type new_age: int
+    :param new_email: The updated student email address.
+    :type new_email: str
+    :raises sqlite3.IntegrityError: If the new student ID or email is not unique.
+    :return: None
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            UPDATE students
+            SET student_id=?, name=?, age=?, email=?
+            WHERE student_id=?
+        ''', (new_student_id, new_name, new_age, new_email, old_student_id))
+        conn.commit()
+        id_map.rename('students', old_student_id, new_student_id)
+    except sqlite3.IntegrityError:
+        conn.close()
+        return False
+    conn.close()
+    return True
+
+
+def delete_student_from_db(student_id):
+    """
+    Deletes a student from the database using the provided student ID.
+
+     **regular docstring** 
+    """
+    conn = connect()
+    try:
+        conn.execute('DELETE FROM students WHERE student_id=?', (student_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    id_map.discard('students', student_id)
+
+
+def update_instructor_in_db(old_instructor_id, new_instructor_id, new_name, new_age, new_email):
+    """
+    Updates an existing instructor's details in the database, including the ID.
+
+    **Sphinx-style documentation** 
+    :param old_instructor_id: The current instructor ID.
+    :type old_instructor_id: str
+    :param new_instructor_id: The updated instructor ID.
+    :type new_instructor_id: str
+    :param new_name: The updated instructor name.
+    :type new_name: str
+    :param new_age: The updated instructor age.
+    :type new_age: int
+    :param new_email: The updated instructor email address.
+    :type new_email: str
+    :raises sqlite3.IntegrityError: If the new instructor ID or email is not unique.
+    :return: None
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            UPDATE instructors
+            SET instructor_id=?, name=?, age=?, email=?
+            WHERE instructor_id=?
+        ''', (new_instructor_id, new_name, new_age, new_email, old_instructor_id))
+        conn.commit()
+        id_map.rename('instructors', old_instructor_id, new_instructor_id)
+        rowid = id_map.rowids['instructors'].get(new_instructor_id)
+        if rowid is not None:
+            id_map.instructor_names[rowid] = new_name
+    except sqlite3.IntegrityError as e:
+        raise sqlite3.IntegrityError(f"Update failed: {str(e)}")
+    finally:
+        conn.close()
+
+def fetch_all_instructors():
+    """
+    Fetches all instructors from the database.
+
+    **Sphinx-style documentation** 
+
+    :return: A list of instructor records, where each record contains:
+        - ID (int)
+        - Name (str)
+        - Age (int)
+        - Email (str)
+        - Instructor ID (str)
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM instructors')
+    instructors = cursor.fetchall()
+    conn.close()
+    return instructors
+
+
+def delete_instructor_from_db(instructor_id):
+    """
+    **docsting documentation**
+    Deletes an instructor from the database based on the provided instructor ID.
+    """
+    conn = connect()
+    try:
+        conn.execute('DELETE FROM instructors WHERE instructor_id=?', (instructor_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    id_map.discard('instructors', instructor_id)
+
+
+
+def update_course_in_db(old_course_id, new_course_id, new_name):
+    """
+    Updates the course's details in the database, including the course ID.
+
+    **Sphinx-style documentation**
+
+    :param old_course_id: The current course ID.
+    :type old_course_id: str
+    :param new_course_id: The updated course ID.
+    :type new_course_id: str
+    :param new_name: The updated course name.
+    :type new_name: str
+    :raises sqlite3.IntegrityError: If the new course ID already exists in the database.
+    :return: True if the update was successful, False if there was an IntegrityError.
+    :rtype: bool
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            UPDATE courses
+            SET course_id=?, course_name=?
+            WHERE course_id=?
+        ''', (new_course_id, new_name, old_course_id))
+        conn.commit()
+        id_map.rename('courses', old_course_id, new_course_id)
+        return True
+    except sqlite3.IntegrityError:
+        conn.close()
+        return False
+    finally:
+        conn.close()
+
+
+
+def fetch_all_courses():
+    """
+    Fetches all courses from the database.
+
+    **Sphinx-style documentation**
+
+    :return: A list of course records, where each record contains:
+        - ID (int)
+        - Course ID (str)
+        - Course Name (str)
+        - Instructor ID (int, nullable)
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM courses')
+    courses = cursor.fetchall()
+    conn.close()
+    return courses
+
+
+def delete_course_from_db(course_id):
+    """
+    **docstring documentation**
+    Deletes a course from the database using the provided course ID.
+    """
+    conn = connect()
+    try:
+        conn.execute('DELETE FROM courses WHERE course_id=?', (course_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    id_map.discard('courses', course_id)
+
+def assign_instructor_to_course(instructor_id, course_id):
+    """
+    Assigns an instructor to a course.
+
+     **Sphinx-style documentation**
+
+    :param instructor_id: The unique identifier of the instructor to assign.
+    :type instructor_id: str
+    :param course_id: The unique identifier of the course to which the instructor is assigned.
+    :type course_id: str
+    :raises sqlite3.IntegrityError: If there's an issue with the instructor or course ID.
+    :return: True if the instructor is assigned successfully, False if an IntegrityError occurs or one of the IDs does not exist.
+    :rtype: bool
+    """
+    conn = connect()
+    try:
+        assigned = set_course_instructor(conn, instructor_id, course_id)
+        conn.commit()
+    except sqlite3.IntegrityError:
+        conn.close()
+        return False
+    conn.close()
+    return assigned
+
+
+def enroll_student_in_course(student_id, course_id):
+    """
+    Enrolls a student in a course by adding a record to the enrollments table.
+
+    **Sphinx-style documentation** 
+
+    :param student_id: The unique identifier of the student to enroll.
+    :type student_id: str
+    :param course_id: The unique identifier of the course.
+    :type course_id: str
+    :raises sqlite3.IntegrityError: If the student is already enrolled in the course.
+    :return: True if the student was successfully enrolled, False otherwise (including when one of the IDs does not exist).
+    :rtype: bool
+    """
+    conn = connect()
+    try:
+        enrolled = insert_enrollment(conn, student_id, course_id)
+        conn.commit()
+    except sqlite3.IntegrityError:
+        conn.close()
+        return False
+    conn.close()
+    return enrolled
+
+# (external ID column, display name column) used to build the dropdown labels "<id> - <name>"
+DROPDOWN_COLUMNS = {
+    'students': ('student_id', 'name'),
+    'instructors': ('instructor_id', 'name'),
+    'courses': ('course_id', 'course_name'),
+}
+
+def prefix_upper_bound(prefix):
+    """
+    Returns the smallest string that sorts after every string starting with ``prefix``.
+
+    **Sphinx-style documentation**
+
+    ``column >= prefix AND column < prefix_upper_bound(prefix)`` is an index range scan, unlike ``LIKE 'prefix%'`` on a case sensitive column.
+
+    :param prefix: A non-empty prefix.
+    :type prefix: str
+    :return: The exclusive upper bound of the prefix range.
+    :rtype: str
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def fetch_dropdown_page(table, after_key, limit):
+    """
+    Fetches the next page of dropdown entries for a table, ordered by external ID.
+
+    **Sphinx-style documentation**
+
+    Pages are read with keyset pagination on the unique ID index, so every page costs the same no matter how far the user has scrolled.
+
+    :param table: One of ``students``, ``instructors`` or ``courses``.
+    :type table: str
+    :param after_key: The last ID of the previous page, or an empty string for the first page.
+    :type after_key: str
+    :param limit: The maximum number of entries to return.
+    :type limit: int
+    :return: A list of ``(id, label)`` tuples where label is ``"<id> - <name>"``.
+    :rtype: list
+    """
+    key, name = DROPDOWN_COLUMNS[table]
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT {key}, {key} || ' - ' || {name} FROM {table}
+        WHERE {key} > ?
+        ORDER BY {key}
+        LIMIT ?
+    ''', (after_key, limit))
+    page = cursor.fetchall()
+    conn.close()
+    return page
+
+def search_dropdown_labels(table, text, limit=50):
+    """
+    Finds the dropdown labels matching what the user typed.
+
+    **Sphinx-style documentation**
+
+    ID prefixes and name prefixes are answered by index range scans. When those give fewer than ``limit`` hits, the remaining slots are filled with name substring matches.
+
+    :param table: One of ``students``, ``instructors`` or ``courses``.
+    :type table: str
+    :param text: The text typed in the dropdown. A full label (``"<id> - <name>"``) is reduced to its ID.
+    :type text: str
+    :param limit: The maximum number of labels to return.
+    :type limit: int
+    :return: The matching labels, ID matches first.
+    :rtype: list
+    """
+    text = text.split(' - ')[0].strip()
+    if not text:
+        return []
+    key, name = DROPDOWN_COLUMNS[table]
+    label = f"{key} || ' - ' || {name}"
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT {label} FROM {table} WHERE {key} >= ? AND {key} < ? ORDER BY {key} LIMIT ?',
+                   (text, prefix_upper_bound(text), limit))
+    labels = dict.fromkeys(row[0] for row in cursor.fetchall())
+    if len(labels) < limit:
+        cursor.execute(f'SELECT {label} FROM {table} WHERE {name} LIKE ? LIMIT ?', (text + '%', limit))
+        labels.update(dict.fromkeys(row[0] for row in cursor.fetchall()))
+    if len(labels) < limit:
+        cursor.execute(f'SELECT {label} FROM {table} WHERE {name} LIKE ? LIMIT ?', ('%' + text + '%', limit))
+        labels.update(dict.fromkeys(row[0] for row in cursor.fetchall()))
+    conn.close()
+    return list(labels)[:limit]
+
+# compiled once, is_valid_email is called for every record of the bulk imports
+EMAIL_PATTERN = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+
+def is_valid_email(email):
+    """
+    **docstring**
+    Validates if the given email is in the correct format 
+    """
+    return EMAIL_PATTERN.match(email)
+
+def is_valid_age(age):
+    """
+    **docstring**
+    Validates if the given age is a positive integer.
+    """
+    return age.isdigit() and int(age) >= 0
+
+# columns of the records read and written by the bulk functions, IDs are always the external ones
+RECORD_COLUMNS = {
+    'students': ('student_id', 'name', 'age', 'email'),
+    'instructors': ('instructor_id', 'name', 'age', 'email'),
+    'courses': ('course_id', 'course_name', 'instructor_id'),
+    'enrollments': ('student_id', 'course_id'),
+}
+
+_EXPORT_QUERIES = {
+    'students': 'SELECT student_id, name, age, email FROM students ORDER BY id',
+    'instructors': 'SELECT instructor_id, name, age, email FROM instructors ORDER BY id',
+    'courses': '''
+        SELECT courses.course_id, courses.course_name, instructors.instructor_id
+        FROM courses LEFT JOIN instructors ON instructors.id = courses.instructor_id
+        ORDER BY courses.id
+    ''',
+    'enrollments': '''
+        SELECT students.student_id, courses.course_id
+        FROM enrollments
+        JOIN students ON students.id = enrollments.student_id
+        JOIN courses ON courses.id = enrollments.course_id
+    ''',
+}
+
+_IMPORT_STATEMENTS = {
+    'students': 'INSERT OR IGNORE INTO students (student_id, name, age, email) VALUES (?, ?, ?, ?)',
+    'instructors': 'INSERT OR IGNORE INTO instructors (instructor_id, name, age, email) VALUES (?, ?, ?, ?)',
+    'courses': '''
+        INSERT OR IGNORE INTO courses (course_id, course_name, instructor_id)
+        VALUES (?, ?, (SELECT id FROM instructors WHERE instructor_id=?))
+    ''',
+}
+
+def iter_records(table, batch_size=1000):
+    """
+    Streams the records of a table, ``batch_size`` rows being read from the database at a time.
+
+    **Sphinx-style documentation**
+
+    :param table: One of the keys of :data:`RECORD_COLUMNS`.
+    :type table: str
+    :param batch_size: The number of rows fetched at once.
+    :type batch_size: int
+    :return: A generator of tuples with the columns of :data:`RECORD_COLUMNS`.
+    :rtype: generator
+    """
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_EXPORT_QUERIES[table])
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+def _in_batches(conn, statement, records, batch_size):
+    """
+    Runs ``statement`` for every record, committing once per batch of ``batch_size`` records.
+
+    :return: The number of records processed and the number of rows changed.
+    :rtype: tuple[int, int]
+    """
+    processed = changed = 0
+    batch = []
+    for record in records:
+        batch.append(tuple(record))
+        if len(batch) == batch_size:
+            with conn: # rowcount, unlike total_changes, leaves out the rows changed by the summary triggers
+                changed += conn.executemany(statement, batch).rowcount
+            processed += len(batch)
+            batch = []
+    if batch:
+        with conn:
+            changed += conn.executemany(statement, batch).rowcount
+        processed += len(batch)
+    return processed, changed
+
+def import_records(table, records, batch_size=1000):
+    """
+    Inserts students, instructors or courses in bulk, with one transaction per batch.
+
+    **Sphinx-style documentation**
+
+    Records whose ID (or email) is already in use are skipped. The records are consumed lazily, so ``records`` can be a generator reading a file.
+
+    :param table: ``students``, ``instructors`` or ``courses``.
+    :type table: str
+    :param records: Tuples with the columns of :data:`RECORD_COLUMNS` (a course's instructor_id may be empty).
+    :type records: iterable
+    :param batch_size: The number of records inserted per transaction.
+    :type batch_size: int
+    :return: The number of inserted and skipped records.
+    :rtype: tuple[int, int]
+    """
+    conn = connect()
+    try:
+        processed, inserted = _in_batches(conn, _IMPORT_STATEMENTS[table], records, batch_size)
+        if id_map.warm and inserted:
+            id_map.load(conn)
+    finally:
+        conn.close()
+    return inserted, processed - inserted
+
+def _enroll_batch(conn, pairs):
+    """
+    Enrolls a batch of ``(student_id, course_id)`` pairs with set-based statements inside the caller's transaction.
+
+    The pairs are loaded into a temp table and resolved to rowids with one join against students and courses. After the checks,
+    every valid pair is inserted by a single INSERT ... SELECT.
+
+    :return: The number of enrollments created and the skipped ``(student_id, course_id, reason)`` tuples in request order.
+    :rtype: tuple[int, list]
+    """
+    conn.execute('DROP TABLE IF EXISTS temp.enroll_request')
+    conn.execute('DROP TABLE IF EXISTS temp.enroll_resolved')
+    conn.execute('CREATE TEMP TABLE enroll_request (pos INTEGER PRIMARY KEY, student_id TEXT, course_id TEXT)')
+    conn.executemany('INSERT INTO temp.enroll_request (student_id, course_id) VALUES (?, ?)', pairs)
+    conn.execute('''
+        CREATE TEMP TABLE enroll_resolved AS
+        SELECT enroll_request.pos, enroll_request.student_id, enroll_request.course_id,
+               students.id AS sid, courses.id AS cid,
+               CASE WHEN students.id IS NULL THEN 'unknown student'
+                    WHEN courses.id IS NULL THEN 'unknown course'
+               END AS reason
+        FROM temp.enroll_request
+        LEFT JOIN students ON students.student_id = enroll_request.student_id
+        LEFT JOIN courses ON courses.course_id = enroll_request.course_id
+    ''')
+    conn.execute('''
+        UPDATE temp.enroll_resolved SET reason = 'duplicate in request'
+        WHERE reason IS NULL AND pos NOT IN (
+            SELECT MIN(pos) FROM temp.enroll_resolved WHERE reason IS NULL GROUP BY sid, cid
+        )
+    ''')
+    # written as a join, not a correlated subquery, so SQLite indexes the small side instead of scanning enrollments per pair
+    conn.execute('''
+        UPDATE temp.enroll_resolved SET reason = 'already enrolled'
+        WHERE reason IS NULL AND pos IN (
+            SELECT enroll_resolved.pos FROM temp.enroll_resolved
+            JOIN enrollments ON enrollments.student_id = enroll_resolved.sid AND enrollments.course_id = enroll_resolved.cid
+        )
+    ''')
+    enrolled = conn.execute('''
+        INSERT INTO enrollments (student_id, course_id)
+        SELECT sid, cid FROM temp.enroll_resolved WHERE reason IS NULL ORDER BY pos
+    ''').rowcount
+    skipped = conn.execute('''
+        SELECT student_id, course_id, reason FROM temp.enroll_resolved WHERE reason IS NOT NULL ORDER BY pos
+    ''').fetchall()
+    conn.execute('DROP TABLE temp.enroll_request')
+    conn.execute('DROP TABLE temp.enroll_resolved')
+    return enrolled, skipped
+
+def enroll_pairs(pairs):
+    """
+    Enrolls many students in many courses in one transaction.
+
+    **Sphinx-style documentation**
+
+    A pair that cannot be enrolled is skipped with one of the reasons ``unknown student``, ``unknown course``, ``duplicate in request`` or ``already enrolled``. The other pairs are still enrolled.
+
+    :param pairs: ``(student_id, course_id)`` pairs of external IDs.
+    :type pairs: iterable
+    :return: ``{'enrolled': count, 'skipped': [(student_id, course_id, reason), ...]}``
+    :rtype: dict
+    """
+    conn = connect()
+    try:
+        with conn:
+            report = enroll_report(conn, pairs)
+    finally:
+        conn.close()
+    return report
+
+def enroll_report(conn, pairs):
+    """
+    Write operation behind :func:`enroll_pairs`, run on an open connection without commit.
+
+    :return: ``{'enrolled': count, 'skipped': [(student_id, course_id, reason), ...]}``
+    :rtype: dict
+    """
+    enrolled, skipped = _enroll_batch(conn, pairs)
+    return {'enrolled': enrolled, 'skipped': skipped}
+
+def enroll_students_in_course(student_ids, course_id):
+    """
+    Enrolls a cohort of students in one course in one transaction, see :func:`enroll_pairs`.
+
+    **Sphinx-style documentation**
+
+    :param student_ids: External IDs of the students.
+    :type student_ids: iterable
+    :param course_id: External ID of the course.
+    :type course_id: str
+    :return: ``{'enrolled': count, 'skipped': [(student_id, course_id, reason), ...]}``
+    :rtype: dict
+    """
+    return enroll_pairs((student_id, course_id) for student_id in student_ids)
+
+def enroll_many(pairs, batch_size=10000):
+    """
+    Enrolls a stream of pairs too large for one transaction, committing every ``batch_size`` pairs (see :func:`enroll_pairs`).
+
+    **Sphinx-style documentation**
+
+    :param pairs: ``(student_id, course_id)`` pairs, consumed lazily.
+    :type pairs: iterable
+    :param batch_size: The number of pairs per transaction.
+    :type batch_size: int
+    :return: ``{'enrolled': count, 'skipped': [(student_id, course_id, reason), ...]}``
+    :rtype: dict
+    """
+    report = {'enrolled': 0, 'skipped': []}
+    conn = connect()
+    try:
+        batch = []
+        for pair in pairs:
+            batch.append(tuple(pair))
+            if len(batch) == batch_size:
+                with conn:
+                    enrolled, skipped = _enroll_batch(conn, batch)
+                report['enrolled'] += enrolled
+                report['skipped'].extend(skipped)
+                batch = []
+        if batch:
+            with conn:
+                enrolled, skipped = _enroll_batch(conn, batch)
+            report['enrolled'] += enrolled
+            report['skipped'].extend(skipped)
+    finally:
+        conn.close()
+    return report
+
+def assign_many(pairs, batch_size=1000):
+    """
+    Assigns instructors to courses in bulk, with one transaction per batch.
+
+    **Sphinx-style documentation**
+
+    :param pairs: ``(instructor_id, course_id)`` pairs.
+    :type pairs: iterable
+    :param batch_size: The number of assignments per transaction.
+    :type batch_size: int
+    :return: The number of courses assigned and of pairs skipped because the instructor or the course does not exist.
+    :rtype: tuple[int, int]
+    """
+    conn = connect()
+    try:
+        processed, assigned = _in_batches(conn, '''
+            UPDATE courses SET instructor_id = (SELECT id FROM instructors WHERE instructor_id=?1)
+            WHERE course_id=?2 AND EXISTS (SELECT 1 FROM instructors WHERE instructor_id=?1)
+        ''', pairs, batch_size)
+    finally:
+        conn.close()
+    return assigned, processed - assigned
+
+def search_records(query, batch_size=1000):
+    """
+    Streams the students, instructors and courses whose name or ID contains ``query`` (case insensitive), like the search box of the PyQt application.
+
+    **Sphinx-style documentation**
+
+    :param query: The text to look for.
+    :type query: str
+    :return: A generator of ``(type, id, name, age, email)`` tuples, age and email are None for courses.
+    :rtype: generator
+    """
+    pattern = '%' + query + '%'
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT 'Student', student_id, name, age, email FROM students WHERE name LIKE ?1 OR student_id LIKE ?1
+            UNION ALL
+            SELECT 'Instructor', instructor_id, name, age, email FROM instructors WHERE name LIKE ?1 OR instructor_id LIKE ?1
+            UNION ALL
+            SELECT 'Course', course_id, course_name, NULL, NULL FROM courses WHERE course_name LIKE ?1 OR course_id LIKE ?1
+        ''', (pattern,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+def backup_database_to(path, pages=1024):
+    """
+    Copies the database to ``path`` with SQLite's online backup, ``pages`` pages at a time, so writers are only blocked for short steps.
+
+    **Sphinx-style documentation**
+
+    :param path: The file receiving the copy.
+    :type path: str
+    """
+    source = connect()
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target, pages=pages)
+    finally:
+        target.close()
+        source.close()
+
+_PAGE_QUERIES = {
+    'students': 'SELECT student_id, name, age, email FROM students WHERE student_id > ? ORDER BY student_id LIMIT ?',
+    'instructors': 'SELECT instructor_id, name, age, email FROM instructors WHERE instructor_id > ? ORDER BY instructor_id LIMIT ?',
+    'courses': '''
+        SELECT courses.course_id, courses.course_name, instructors.instructor_id
+        FROM courses LEFT JOIN instructors ON instructors.id = courses.instructor_id
+        WHERE courses.course_id > ?
+        ORDER BY courses.course_id
+        LIMIT ?
+    ''',
+}
+
+def fetch_records_page(table, after_key='', limit=100):
+    """
+    Fetches one page of students, instructors or courses ordered by external ID, using keyset pagination.
+
+    **Sphinx-style documentation**
+
+    :param table: ``students``, ``instructors`` or ``courses``.
+    :type table: str
+    :param after_key: The last ID of the previous page, empty for the first page.
+    :type after_key: str
+    :param limit: The maximum number of records to return.
+    :type limit: int
+    :return: Tuples with the columns of :data:`RECORD_COLUMNS`.
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(_PAGE_QUERIES[table], (after_key, limit))
+    page = cursor.fetchall()
+    conn.close()
+    return page
+
+def fetch_course_roster(course_id):
+    """
+    Fetches the students enrolled in a course.
+
+    **Sphinx-style documentation**
+
+    :param course_id: The external ID of the course.
+    :type course_id: str
+    :return: ``(student_id, name)`` tuples ordered by student ID.
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT students.student_id, students.name
+        FROM courses
+        JOIN enrollments ON enrollments.course_id = courses.id
+        JOIN students ON students.id = enrollments.student_id
+        WHERE courses.course_id = ?
+        ORDER BY students.student_id
+    ''', (course_id,))
+    roster = cursor.fetchall()
+    conn.close()
+    return roster
+
+def fetch_student_courses(student_id):
+    """
+    Fetches the courses a student is enrolled in.
+
+    **Sphinx-style documentation**
+
+    :param student_id: The external ID of the student.
+    :type student_id: str
+    :return: ``(course_id, course_name)`` tuples ordered by course ID.
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT courses.course_id, courses.course_name
+        FROM students
+        JOIN enrollments ON enrollments.student_id = students.id
+        JOIN courses ON courses.id = enrollments.course_id
+        WHERE students.student_id = ?
+        ORDER BY courses.course_id
+    ''', (student_id,))
+    schedule = cursor.fetchall()
+    conn.close()
+    return schedule
+
+def fetch_course_enrollment_counts():
+    """
+    Fetches the number of students enrolled in every course from the summary table, without counting the enrollments.
+
+    **Sphinx-style documentation**
+
+    :return: ``(course_id, course_name, students)`` tuples ordered by course ID.
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT courses.course_id, courses.course_name, counts.students
+        FROM course_enrollment_counts AS counts JOIN courses ON courses.id = counts.course_id
+        ORDER BY courses.course_id
+    ''')
+    counts = cursor.fetchall()
+    conn.close()
+    return counts
+
+def fetch_instructor_course_loads():
+    """
+    Fetches the number of courses assigned to every instructor from the summary table.
+
+    **Sphinx-style documentation**
+
+    :return: ``(instructor_id, name, courses)`` tuples ordered by instructor ID.
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT instructors.instructor_id, instructors.name, loads.courses
+        FROM instructor_course_load AS loads JOIN instructors ON instructors.id = loads.instructor_id
+        ORDER BY instructors.instructor_id
+    ''')
+    loads = cursor.fetchall()
+    conn.close()
+    return loads
+
+def fetch_students_without_courses():
+    """
+    Fetches the students enrolled in no course, found through the index on the counters of the summary table.
+
+    **Sphinx-style documentation**
+
+    :return: ``(student_id, name)`` tuples ordered by student ID.
+    :rtype: list
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT students.student_id, students.name
+        FROM student_course_counts AS counts JOIN students ON students.id = counts.student_id
+        WHERE counts.courses = 0
+        ORDER BY students.student_id
+    ''')
+    students = cursor.fetchall()
+    conn.close()
+    return students
+
+def generate_timetable():
+    """
+    Gives every course a time slot so that no student has two courses in the same slot, see :mod:`timetable`.
+
+    **Sphinx-style documentation**
+
+    :return: The number of slots used.
+    :rtype: int
+    """
+    conn = connect()
+    try:
+        return timetable.generate(conn, timetable.PYQT)
+    finally:
+        conn.close()
+
+def fetch_timetable():
+    """
+    Fetches the time slots computed by the last :func:`generate_timetable`.
+
+    **Sphinx-style documentation**
+
+    :return: ``(timeslot, course_id, course_name)`` tuples ordered by slot then course ID, slots numbered from 0.
+    :rtype: list
+    """
+    conn = connect()
+    slots = timetable.fetch(conn, timetable.PYQT)
+    conn.close()
+    return slots
+
+def fuzzy_search_records(query, limit=50):
+    """
+    Typo tolerant search of the students and instructors by name or email and of the courses by name, with the
+    trigram index of :mod:`trigram_index`.
+
+    **Sphinx-style documentation**
+
+    :param query: The text looked for, e.g. ``"jonh"`` finds John.
+    :type query: str
+    :param limit: The maximum number of records returned.
+    :type limit: int
+    :return: ``(type, record)`` pairs by decreasing similarity, type being ``Student``, ``Instructor`` or ``Course`` and
+        record a row like those of :func:`fetch_all_students`, :func:`fetch_all_instructors` or :func:`fetch_all_courses`.
+    :rtype: list
+    """
+    conn = connect()
+    try:
+        results = []
+        for _, kind, key, _ in trigram_index.search(conn, trigram_index.PYQT, query, limit=limit):
+            record = conn.execute(f"SELECT * FROM {trigram_index.PYQT[kind]['table']} WHERE id = ?", (key,)).fetchone()
+            results.append((kind.capitalize(), record))
+    finally:
+        conn.close()
+    return results
@@ -0,0 +1,307 @@
+"""
+Unit of work over the students, instructors and courses of the PyQt database (:mod:`school_db`).
+
+A :class:`Session` turns the rows into :class:`StudentRecord`, :class:`InstructorRecord` and :class:`CourseRecord`
+objects read by attribute (``student.email`` instead of ``student[3]``). Each table is read once per session and every
+row is held by a single object (identity map), so the table widget, the search results and the dialogs all see the
+same record. Assigning an attribute does not write anything: the record is marked dirty and :meth:`Session.flush`
+writes the changed columns of all the dirty records in one transaction.
+
+Example::
+
+    session = Session()
+    for student in session.students():
+        student.email = student.email.lower()
+    session.flush() # one commit for every changed student
+"""
+import trigram_index
+from school_db import connect, id_map
+
+
+class Record(object):
+    """
+    A row of a table, its columns being attributes. The rowid is ``id``, the other columns are tracked: the value they
+    had when the record was loaded is kept until the change is flushed or reverted.
+
+    **Sphinx-style documentation**
+
+    :param session: The session the record belongs to.
+    :type session: Session
+    :param row: The rowid followed by the values of :attr:`COLUMNS`.
+    :type row: tuple
+    """
+    TYPE = None # label shown in the application
+    TABLE = None
+    KEY = None # column of the external ID
+    COLUMNS = () # mapped columns besides the rowid
+
+    def __init__(self, session, row):
+        object.__setattr__(self, '_session', session)
+        object.__setattr__(self, '_original', {})
+        self._load(row)
+
+    def _load(self, row):
+        object.__setattr__(self, 'id', row[0])
+        for column, value in zip(self.COLUMNS, row[1:]):
+            object.__setattr__(self, column, value)
+
+    def __setattr__(self, name, value):
+        if name not in self.COLUMNS:
+            object.__setattr__(self, name, value)
+            return
+        old = getattr(self, name)
+        if value == old:
+            return
+        if name not in self._original:
+            self._original[name] = old
+        elif self._original[name] == value: # back to the loaded value
+            del self._original[name]
+        object.__setattr__(self, name, value)
+        self._session._changed(self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{x}={getattr(self, x)!r}' for x in ('id',) + self.COLUMNS)})"
+
+    @property
+    def key(self):
+        """
+        The external ID of the record.
+        """
+        return getattr(self, self.KEY)
+
+    @property
+    def stored_key(self):
+        """
+        The external ID of the record in the database, which differs from :attr:`key` while a new ID is not flushed.
+        """
+        return self._original.get(self.KEY, self.key)
+
+    @property
+    def dirty(self):
+        """
+        True if a column was changed since the record was loaded or flushed.
+        """
+        return bool(self._original)
+
+    def changes(self):
+        """
+        The changed columns as ``{column: (loaded value, current value)}``.
+        """
+        return {x: (old, getattr(self, x)) for x, old in self._original.items()}
+
+    def revert(self):
+        """
+        Gives the changed columns their loaded value back.
+        """
+        for column, old in list(self._original.items()):
+            object.__setattr__(self, column, old)
+        self._original.clear()
+        self._session._changed(self)
+
+    def values(self):
+        """
+        The values of :attr:`COLUMNS`, in order.
+        """
+        return tuple(getattr(self, x) for x in self.COLUMNS)
+
+
+class StudentRecord(Record):
+    TYPE = 'Student'
+    TABLE = 'students'
+    KEY = 'student_id'
+    COLUMNS = ('student_id', 'name', 'age', 'email')
+
+
+class InstructorRecord(Record):
+    TYPE = 'Instructor'
+    TABLE = 'instructors'
+    KEY = 'instructor_id'
+    COLUMNS = ('instructor_id', 'name', 'age', 'email')
+
+
+class CourseRecord(Record):
+    TYPE = 'Course'
+    TABLE = 'courses'
+    KEY = 'course_id'
+    COLUMNS = ('course_id', 'course_name', 'instructor_id') # instructor_id is the rowid of the instructor
+
+    @property
+    def instructor(self):
+        """
+        The :class:`InstructorRecord` of the course, or None.
+        """
+        return self._session.get(InstructorRecord, self.instructor_id) if self.instructor_id is not None else None
+
+    @instructor.setter
+    def instructor(self, instructor):
+        self.instructor_id = instructor.id if instructor is not None else None
+
+
+# label of the application -> record class
+RECORD_TYPES = {x.TYPE: x for x in (StudentRecord, InstructorRecord, CourseRecord)}
+
+# kind of trigram_index.PYQT -> record class
+_BY_KIND = {'student': StudentRecord, 'instructor': InstructorRecord, 'course': CourseRecord}
+
+
+def _select(cls):
+    return f"SELECT id, {', '.join(cls.COLUMNS)} FROM {cls.TABLE}"
+
+
+class Session(object):
+    """
+    Identity map of the records read from the database, with the records changed since the last flush.
+
+    **Sphinx-style documentation**
+
+    A table is read the first time its records are asked for, then served from memory until :meth:`refresh`. The
+    records changed by the application keep their changes through :meth:`refresh`, so unsaved edits survive the
+    reload that follows an insertion or a deletion.
+    """
+    def __init__(self):
+        self._records = {cls: {} for cls in RECORD_TYPES.values()} # class -> rowid -> record
+        self._loaded = set()
+        self._dirty = {} # (class, rowid) -> record, in the order of the changes
+
+    def _changed(self, record):
+        if record.dirty:
+            self._dirty[(type(record), record.id)] = record
+        else:
+            self._dirty.pop((type(record), record.id), None)
+
+    def _adopt(self, cls, row):
+        """
+        Returns the record of a row, the one already in the identity map if there is one. It takes the values of the
+        row, except in the columns changed and not flushed.
+        """
+        record = self._records[cls].get(row[0])
+        if record is None:
+            record = self._records[cls][row[0]] = cls(self, row)
+        else:
+            for column, value in zip(cls.COLUMNS, row[1:]):
+                if column not in record._original:
+                    object.__setattr__(record, column, value)
+        return record
+
+    def all(self, cls):
+        """
+        Returns every record of a class, in rowid order. The table is read once per session.
+
+        :param cls: :class:`StudentRecord`, :class:`InstructorRecord` or :class:`CourseRecord`.
+        :type cls: type
+        :rtype: list
+        """
+        if cls not in self._loaded:
+            conn = connect()
+            try:
+                rows = conn.execute(_select(cls) + ' ORDER BY id').fetchall()
+            finally:
+                conn.close()
+            records = {}
+            for row in rows:
+                records[row[0]] = self._adopt(cls, row)
+            for key in [k for k in self._dirty if k[0] is cls and k[1] not in records]: # deleted meanwhile
+                del self._dirty[key]
+            self._records[cls] = records
+            self._loaded.add(cls)
+        return list(self._records[cls].values())
+
+    def students(self):
+        return self.all(StudentRecord)
+
+    def instructors(self):
+        return self.all(InstructorRecord)
+
+    def courses(self):
+        return self.all(CourseRecord)
+
+    def get(self, cls, rowid):
+        """
+        Returns the record with a rowid, from the identity map or else from the database.
+
+        :return: The record, or None if there is no such row.
+        """
+        record = self._records[cls].get(rowid)
+        if record is None and cls not in self._loaded:
+            conn = connect()
+            try:
+                row = conn.execute(_select(cls) + ' WHERE id=?', (rowid,)).fetchone()
+            finally:
+                conn.close()
+            if row is not None:
+                record = self._adopt(cls, row)
+        return record
+
+    def fuzzy_search(self, query, limit=50):
+        """
+        Typo tolerant search of the records, see :func:`school_db.fuzzy_search_records`.
+
+        :return: The records by decreasing similarity.
+        :rtype: list
+        """
+        conn = connect()
+        try:
+            found = [(_BY_KIND[kind], key) for _, kind, key, _ in trigram_index.search(conn, trigram_index.PYQT, query, limit=limit)]
+        finally:
+            conn.close()
+        return [x for x in (self.get(cls, key) for cls, key in found) if x is not None]
+
+    @property
+    def dirty(self):
+        """
+        The records changed and not flushed yet.
+        """
+        return list(self._dirty.values())
+
+    def refresh(self):
+        """
+        Forgets the clean records so the tables are read again when next asked for, e.g. after records were inserted or
+        deleted. The dirty records are kept, their changes applied over the values read again.
+        """
+        for cls in self._records:
+            self._records[cls] = {rowid: x for rowid, x in self._records[cls].items() if x.dirty}
+        self._loaded.clear()
+
+    def revert(self):
+        """
+        Reverts the changes of every dirty record.
+        """
+        for record in self.dirty:
+            record.revert()
+
+    def flush(self, records=None):
+        """
+        Writes the changes of the dirty records in one transaction and updates :data:`school_db.id_map` with the
+        changed IDs and instructor names. Only the changed columns are written, with one ``executemany`` per table and
+        set of changed columns, so a change made to another column since the record was read is not overwritten.
+
+        **Sphinx-style documentation**
+
+        :param records: The records to write, all the dirty records by default. The clean ones are ignored.
+        :type records: list
+        :raises sqlite3.IntegrityError: If a new ID or email is already used. Nothing is written and the records stay dirty.
+        :return: The number of records written.
+        :rtype: int
+        """
+        records = [x for x in (self.dirty if records is None else records) if x.dirty]
+        if not records:
+            return 0
+        conn = connect()
+        try:
+            statements = {} # (class, changed columns) -> parameters
+            for x in records:
+                columns = tuple(c for c in x.COLUMNS if c in x._original)
+                statements.setdefault((type(x), columns), []).append(tuple(getattr(x, c) for c in columns) + (x.id,))
+            with conn:
+                for (cls, columns), rows in statements.items():
+                    conn.executemany(f"UPDATE {cls.TABLE} SET {', '.join(c + '=?' for c in columns)} WHERE id=?", rows)
+        finally:
+            conn.close()
+        for x in records:
+            if x.KEY in x._original:
+                id_map.rename(x.TABLE, x._original[x.KEY], x.key)
+            if isinstance(x, InstructorRecord) and 'name' in x._original:
+                id_map.instructor_names[x.id] = x.name
+            x._original.clear()
+            self._changed(x)
+        return len(records)
@@ -0,0 +1,369 @@
+"""
+Local JSON/HTTP service over the school database of the PyQt application, built on :mod:`school_db` and asyncio.
+
+Reads run in a bounded pool of threads, writes are put on a :class:`write_queue.WriteBehindQueue` whose single
+writer applies them in group commits, so SQLite never sees two writers of this process at once and a burst of
+writes costs one commit per batch instead of one per request. List endpoints are paginated by ID and streamed
+to the client as they are read.
+
+Endpoints (IDs are the external ones shown in the GUIs)::
+
+    GET  /students?after=ID&limit=N        also /instructors and /courses
+    GET  /students/ID/courses              courses of a student
+    GET  /courses/ID/students              students enrolled in a course
+    GET  /search?q=TEXT
+    POST /students     {"student_id", "name", "age", "email"}
+    POST /instructors  {"instructor_id", "name", "age", "email"}
+    POST /courses      {"course_id", "course_name"}
+    POST /enrollments  {"student_id", "course_id"}
+                       {"course_id", "student_ids": [...]} or {"pairs": [[student_id, course_id], ...]} enroll in bulk
+                       and answer with the number enrolled and the skipped pairs
+    POST /assignments  {"instructor_id", "course_id"}
+
+Usage::
+
+    python school_service.py serve --db school.db --port 8080
+    python school_service.py load --port 8080 --path "/students?limit=100" --concurrency 32 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import school_db
+from write_queue import WriteBehindQueue
+
+MAX_PAGE_SIZE = 10000
+# rows read from the database per streamed chunk
+STREAM_CHUNK = 500
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    """
+    Error turned into an HTTP response with the given status.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SchoolService(object):
+    """
+    The HTTP service. Blocking :mod:`school_db` calls are run in a bounded pool of reader threads or, for writes,
+    queued on the write-behind queue.
+
+    :param readers: Number of reader threads, also the number of reads in flight at once.
+    :type readers: int
+    """
+    def __init__(self, readers=4):
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='school-reader')
+        self.reader_slots = asyncio.Semaphore(readers)
+        self.write_queue = None
+
+    async def read(self, fn, *args):
+        """
+        Runs a blocking read in the reader pool, waiting for a free slot first.
+        """
+        async with self.reader_slots:
+            return await asyncio.get_running_loop().run_in_executor(self.readers, fn, *args)
+
+    async def write(self, fn, *args):
+        """
+        Queues a write operation ``fn(conn, *args)`` of :mod:`school_db` and waits until it is committed.
+
+        :return: The result of the operation, False if the database rejected it.
+        """
+        try:
+            return await asyncio.wrap_future(self.write_queue.call(fn, *args))
+        except sqlite3.IntegrityError:
+            return False
+
+    # request handling
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves the requests of one client connection, keeping it open between requests.
+        """
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    await self.dispatch(method, target, body, writer)
+                except HTTPError as e:
+                    send_json(writer, e.status, {'error': str(e)})
+                except ConnectionError:
+                    raise # aborted, e.g. a stream that failed after its status line: nothing more can be sent
+                except Exception as e:
+                    send_json(writer, 500, {'error': repr(e)})
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body, writer):
+        url = urlsplit(target)
+        parts = [unquote(x) for x in url.path.strip('/').split('/') if x]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if method == 'GET':
+            if len(parts) == 1 and parts[0] in ('students', 'instructors', 'courses'):
+                return await self.stream_table(writer, parts[0], query)
+            if len(parts) == 3 and parts[0] == 'students' and parts[2] == 'courses':
+                rows = await self.read(school_db.fetch_student_courses, parts[1])
+                return send_json(writer, 200, {'items': [{'course_id': x[0], 'course_name': x[1]} for x in rows]})
+            if len(parts) == 3 and parts[0] == 'courses' and parts[2] == 'students':
+                rows = await self.read(school_db.fetch_course_roster, parts[1])
+                return send_json(writer, 200, {'items': [{'student_id': x[0], 'name': x[1]} for x in rows]})
+            if parts == ['search']:
+                rows = await self.read(lambda q: list(school_db.search_records(q)), query.get('q', ''))
+                return send_json(writer, 200, {'items': [dict(zip(('type', 'id', 'name', 'age', 'email'), x)) for x in rows]})
+            raise HTTPError(404, "unknown resource")
+
+        if method == 'POST':
+            data = parse_body(body)
+            resource = parts[0] if len(parts) == 1 else None
+            if resource == 'students':
+                ok = await self.write(school_db.insert_student, *person_fields(data, 'student_id'))
+            elif resource == 'instructors':
+                ok = await self.write(school_db.insert_instructor, *person_fields(data, 'instructor_id'))
+            elif resource == 'courses':
+                ok = await self.write(school_db.insert_course, required(data, 'course_id'), required(data, 'course_name'))
+            elif resource == 'enrollments' and 'pairs' in data:
+                report = await self.write(school_db.enroll_report, [tuple(x) for x in data['pairs']])
+                return send_json(writer, 200, report)
+            elif resource == 'enrollments' and 'student_ids' in data:
+                course_id = required(data, 'course_id')
+                report = await self.write(school_db.enroll_report, [(x, course_id) for x in data['student_ids']])
+                return send_json(writer, 200, report)
+            elif resource == 'enrollments':
+                ok = await self.write(school_db.insert_enrollment, required(data, 'student_id'), required(data, 'course_id'))
+            elif resource == 'assignments':
+                ok = await self.write(school_db.set_course_instructor, required(data, 'instructor_id'), required(data, 'course_id'))
+            else:
+                raise HTTPError(404, "unknown resource")
+            if not ok:
+                raise HTTPError(409, "rejected by the database (duplicate or unknown ID)")
+            return send_json(writer, 201, {'ok': True})
+
+        raise HTTPError(405, "only GET and POST are supported")
+
+    async def stream_table(self, writer, table, query):
+        """
+        Streams one page of a table as ``{"items": [...], "next": ID}`` with chunked transfer encoding, reading it
+        from the database in chunks of :data:`STREAM_CHUNK` rows. ``next`` is the ``after`` value of the next page,
+        null on the last page.
+
+        Once the status line is sent an error can no longer be reported to the client: the connection is aborted, so
+        the client sees a truncated body instead of a second response inside this one.
+        """
+        try:
+            limit = min(int(query.get('limit', 100)), MAX_PAGE_SIZE)
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        if limit <= 0:
+            raise HTTPError(400, "limit must be positive")
+        after = query.get('after', '')
+
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nTransfer-Encoding: chunked\r\n\r\n')
+        try:
+            await self.stream_rows(writer, table, after, limit)
+        except Exception as e:
+            writer.transport.abort()
+            raise ConnectionAbortedError(f"{table} stream aborted") from e
+
+    async def stream_rows(self, writer, table, after, limit):
+        """
+        Writes the chunked body of :meth:`stream_table`.
+        """
+        columns = school_db.RECORD_COLUMNS[table]
+        write_chunk(writer, b'{"items": [')
+        sent = 0
+        exhausted = False
+        while sent < limit:
+            wanted = min(STREAM_CHUNK, limit - sent)
+            rows = await self.read(school_db.fetch_records_page, table, after, wanted)
+            if rows:
+                items = ', '.join(json.dumps(dict(zip(columns, x))) for x in rows)
+                write_chunk(writer, ((', ' if sent else '') + items).encode())
+                await writer.drain()
+                sent += len(rows)
+                after = rows[-1][0]
+            if len(rows) < wanted:
+                exhausted = True
+                break
+        write_chunk(writer, ('], "next": ' + json.dumps(None if exhausted else after) + '}').encode())
+        write_chunk(writer, b'')
+
+    async def serve(self, host, port):
+        self.write_queue = WriteBehindQueue(school_db.connect, on_rollback=school_db.warm_id_map)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"serving {school_db.DB_PATH} on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.write_queue.close()
+
+
+def required(data, field):
+    if data.get(field) in (None, ''):
+        raise HTTPError(400, f"missing field {field}")
+    return data[field]
+
+
+def person_fields(data, id_field):
+    """
+    Validates a student/instructor body like the GUI does and returns the arguments of the add_*_to_db functions.
+    """
+    name, email, person_id = required(data, 'name'), required(data, 'email'), required(data, id_field)
+    age = str(required(data, 'age'))
+    if not school_db.is_valid_age(age) or not school_db.is_valid_email(email):
+        raise HTTPError(400, "invalid age or email")
+    return name, int(age), email, person_id
+
+
+def parse_body(body):
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, "body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return data
+
+
+async def read_request(reader):
+    """
+    Reads one HTTP/1.1 request.
+
+    :return: ``(method, target, headers, body)``, or None when the client closed the connection.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise ConnectionError("malformed request line")
+    headers = await read_headers(reader)
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return method.upper(), target, headers, body
+
+
+async def read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+def send_json(writer, status, payload):
+    body = json.dumps(payload).encode()
+    writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+
+
+def write_chunk(writer, data):
+    writer.write(f"{len(data):x}\r\n".encode() + data + b'\r\n')
+
+
+# load generator
+
+async def read_response(reader):
+    """
+    Reads one HTTP response of the service (Content-Length or chunked body).
+
+    :return: ``(status, body)``
+    """
+    status = int((await reader.readline()).split()[1])
+    headers = await read_headers(reader)
+    if headers.get('transfer-encoding') == 'chunked':
+        body = b''
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            chunk = await reader.readexactly(size + 2)
+            if size == 0:
+                return status, body
+            body += chunk[:-2]
+    return status, await reader.readexactly(int(headers.get('content-length', 0)))
+
+
+async def load(host, port, path, concurrency, requests, method='GET', body=None):
+    """
+    Sends ``requests`` requests over ``concurrency`` keep-alive connections and measures the throughput and latencies.
+
+    :return: A summary with the request rate and latency percentiles in milliseconds.
+    :rtype: dict
+    """
+    latencies = []
+    statuses = {}
+    remaining = [requests]
+    payload = body.encode() if body else b''
+    request = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            writer.write(request)
+            status, _ = await read_response(reader)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    pick = lambda p: round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+    return {'requests': len(latencies), 'seconds': round(elapsed, 3), 'requests_per_second': round(len(latencies) / elapsed, 1),
+            'p50_ms': pick(0.5), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99), 'statuses': statuses}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local JSON/HTTP service over the school database.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="run the service")
+    serve.add_argument('--db', default='school.db')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--readers', type=int, default=4, help="reader threads")
+    gen = commands.add_parser('load', help="run a local load generator against the service")
+    gen.add_argument('--host', default='127.0.0.1')
+    gen.add_argument('--port', type=int, default=8080)
+    gen.add_argument('--path', default='/students?limit=100')
+    gen.add_argument('--method', default='GET', choices=['GET', 'POST'])
+    gen.add_argument('--body', help="JSON body sent with every request")
+    gen.add_argument('--concurrency', type=int, default=16)
+    gen.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        school_db.DB_PATH = args.db
+        school_db.init_db()
+        school_db.warm_id_map()
+        try:
+            asyncio.run(SchoolService(args.readers).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(asyncio.run(load(args.host, args.port, args.path, args.concurrency, args.requests, args.method, args.body)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,394 @@
+"""
+Compact binary snapshot of a :class:`classes.School`, opened with mmap and decoded lazily.
+
+Loading a School from JSON parses the whole file and builds every object before the first query. A snapshot is read
+through a memory map instead: opening it only reads the header, and a record is decoded the first time it is
+accessed. Its links (the courses of a student, the students of a course...) are decoded on first access too.
+
+Layout (little-endian), every section starting at the offset given in the header::
+
+    header           magic, version, counts, section offsets (see HEADER)
+    string offsets   n_strings + 1 uint64, string i is pool[offsets[i]:offsets[i + 1]] in UTF-8
+    string pool
+    students         STUDENT records: id, name, age, email, first link, number of links (courses)
+    instructors      INSTRUCTOR records: id, name, age, email, first link, number of links (courses)
+    courses          COURSE records: id, name, instructor (-1 if none), first link, number of links (students)
+    student links    uint32 course numbers
+    instructor links uint32 course numbers
+    course links     uint32 student numbers
+    3 ID indexes     uint32 student, instructor and course numbers sorted by ID, for binary search
+
+Strings are referenced by number, records by their position in the JSON lists, whose order is kept.
+
+Usage::
+
+    python school_snapshot.py to-snapshot school.json school.snap
+    python school_snapshot.py to-json school.snap school.json
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from classes import School, Student, Instructor, Course
+
+MAGIC = b'SCHLSNAP'
+VERSION = 1
+# magic, version, n_strings, n_students, n_instructors, n_courses, then the offsets of the 11 sections
+HEADER = struct.Struct('<8sIIIII11Q')
+STUDENT = struct.Struct('<IIIIII')
+INSTRUCTOR = struct.Struct('<IIIIII')
+COURSE = struct.Struct('<IIiII')
+LINK = struct.Struct('<I')
+
+_SECTIONS = ('string_offsets', 'string_pool', 'students', 'instructors', 'courses', 'student_links',
+             'instructor_links', 'course_links', 'student_index', 'instructor_index', 'course_index')
+
+
+def _write(path, students, instructors, courses):
+    """
+    Writes a snapshot from plain records: ``(id, name, age, email, course_ids)`` students, ``(id, name, age, email)``
+    instructors and ``(id, name, instructor_id)`` courses, ``""`` meaning no instructor. Links to unknown IDs are dropped,
+    as :class:`classes.School` does when loading JSON. The file is replaced atomically.
+    """
+    strings = []
+    def string(value):
+        strings.append(value.encode('utf-8'))
+        return len(strings) - 1
+
+    course_number = {x[0]: i for i, x in enumerate(courses)}
+    instructor_number = {x[0]: i for i, x in enumerate(instructors)}
+    instructor_links = [[] for _ in instructors]
+    course_links = [[] for _ in courses]
+
+    course_records = bytearray()
+    for i, (course_id, name, instructor_id) in enumerate(courses):
+        instructor = instructor_number.get(instructor_id, -1) if instructor_id else -1
+        if instructor >= 0:
+            instructor_links[instructor].append(i)
+        course_records += COURSE.pack(string(course_id), string(name), instructor, 0, 0)
+
+    student_records = bytearray()
+    student_links = array('I')
+    for i, (student_id, name, age, email, course_ids) in enumerate(students):
+        first = len(student_links)
+        for course_id in course_ids:
+            number = course_number.get(course_id)
+            if number is not None:
+                student_links.append(number)
+                course_links[number].append(i)
+        student_records += STUDENT.pack(string(student_id), string(name), age, string(email), first, len(student_links) - first)
+
+    instructor_records = bytearray()
+    flat_instructor_links = array('I')
+    for i, (instructor_id, name, age, email) in enumerate(instructors):
+        instructor_records += INSTRUCTOR.pack(string(instructor_id), string(name), age, string(email),
+                                              len(flat_instructor_links), len(instructor_links[i]))
+        flat_instructor_links.extend(instructor_links[i])
+
+    flat_course_links = array('I')
+    for i in range(len(courses)):
+        start = len(flat_course_links)
+        flat_course_links.extend(course_links[i])
+        struct.pack_into('<II', course_records, i * COURSE.size + 12, start, len(course_links[i]))
+
+    offsets = array('Q', [0])
+    total = 0
+    for x in strings:
+        total += len(x)
+        offsets.append(total)
+
+    def index(records):
+        return array('I', sorted(range(len(records)), key=lambda i: records[i][0]))
+
+    sections = [offsets.tobytes(), b''.join(strings), bytes(student_records), bytes(instructor_records), bytes(course_records),
+                student_links.tobytes(), flat_instructor_links.tobytes(), flat_course_links.tobytes(),
+                index(students).tobytes(), index(instructors).tobytes(), index(courses).tobytes()]
+    positions = []
+    position = HEADER.size
+    for section in sections:
+        positions.append(position)
+        position += len(section)
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(strings), len(students), len(instructors), len(courses), *positions))
+        for section in sections:
+            f.write(section)
+    os.replace(temporary, path)
+
+
+def write_snapshot(school, path):
+    """
+    Writes the content of a :class:`classes.School` (or of a :class:`SnapshotSchool`) to a snapshot file.
+    """
+    _write(path,
+           [(x.student_id, x.name, x.age, x._email, [c.course_id for c in x.registered_courses]) for x in school.students],
+           [(x.instructor_id, x.name, x.age, x._email) for x in school.instructors],
+           [(x.course_id, x.course_name, x.instructor.instructor_id if x.instructor is not None else "") for x in school.courses])
+
+
+def json_to_snapshot(json_path, path):
+    """
+    Converts a JSON file of :meth:`classes.School.save_to_json` to a snapshot without building the School objects.
+    """
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    _write(path,
+           [(x['id'], x['name'], x['age'], x['email'], x['courses']) for x in data['students']],
+           [(x['id'], x['name'], x['age'], x['email']) for x in data['instructors']],
+           [(x['id'], x['name'], x['instructor_id']) for x in data['courses']])
+
+
+def snapshot_to_json(path, json_path):
+    """
+    Converts a snapshot back to the JSON format of :meth:`classes.School.save_to_json`, decoding its sections in bulk.
+    """
+    snapshot = Snapshot(path)
+    strings = snapshot.all_strings()
+    sections = snapshot.sections
+    def records(struct_, section, count):
+        return struct_.iter_unpack(snapshot.map[sections[section]:sections[section] + count * struct_.size])
+    student_links = snapshot.links('student_links', 0, (sections['instructor_links'] - sections['student_links']) // LINK.size)
+    courses = list(records(COURSE, 'courses', snapshot.n_courses))
+    instructors = list(records(INSTRUCTOR, 'instructors', snapshot.n_instructors))
+    data = {'students': [], 'instructors': [], 'courses': []}
+    for student_id, name, age, email, first, count in records(STUDENT, 'students', snapshot.n_students):
+        data['students'].append({'id': strings[student_id], 'name': strings[name], 'age': age, 'email': strings[email],
+                                 'courses': [strings[courses[j][0]] for j in student_links[first:first + count]]})
+    for instructor_id, name, age, email, first, count in instructors:
+        data['instructors'].append({'id': strings[instructor_id], 'name': strings[name], 'age': age, 'email': strings[email]})
+    for course_id, name, instructor, first, count in courses:
+        data['courses'].append({'id': strings[course_id], 'name': strings[name],
+                                'instructor_id': strings[instructors[instructor][0]] if instructor >= 0 else ""})
+    snapshot.close()
+    with open(json_path, 'w') as f:
+        json.dump(data, f)
+
+
+class Snapshot(object):
+    """
+    Read access to the records of a snapshot file through a memory map.
+
+    :param path: The snapshot file.
+    :type path: str
+    :raises ValueError: If the file is not a snapshot of a supported version.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n_strings, self.n_students, self.n_instructors, self.n_courses, *positions = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {VERSION} school snapshot")
+        self.sections = dict(zip(_SECTIONS, positions))
+
+    def close(self):
+        self.map.close()
+
+    def string(self, number):
+        start, end = struct.unpack_from('<QQ', self.map, self.sections['string_offsets'] + 8 * number)
+        pool = self.sections['string_pool']
+        return self.map[pool + start:pool + end].decode('utf-8')
+
+    def all_strings(self):
+        """
+        Decodes the whole string pool at once, for conversions that read every record.
+        """
+        offsets = array('Q', self.map[self.sections['string_offsets']:self.sections['string_pool']])
+        pool = self.map[self.sections['string_pool']:self.sections['students']]
+        return [pool[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.n_strings)]
+
+    def student_record(self, i):
+        """
+        :return: ``(id, name, age, email, first link, number of links)``
+        """
+        id_, name, age, email, first, count = STUDENT.unpack_from(self.map, self.sections['students'] + i * STUDENT.size)
+        return self.string(id_), self.string(name), age, self.string(email), first, count
+
+    def instructor_record(self, i):
+        """
+        :return: ``(id, name, age, email, first link, number of links)``
+        """
+        id_, name, age, email, first, count = INSTRUCTOR.unpack_from(self.map, self.sections['instructors'] + i * INSTRUCTOR.size)
+        return self.string(id_), self.string(name), age, self.string(email), first, count
+
+    def course_record(self, i):
+        """
+        :return: ``(id, name, instructor number or -1, first link, number of links)``
+        """
+        id_, name, instructor, first, count = COURSE.unpack_from(self.map, self.sections['courses'] + i * COURSE.size)
+        return self.string(id_), self.string(name), instructor, first, count
+
+    def links(self, section, first, count):
+        start = self.sections[section] + first * LINK.size
+        return array('I', self.map[start:start + count * LINK.size])
+
+    def find(self, kind, id):
+        """
+        Binary search of an ID in the index of ``kind`` (``student``, ``instructor`` or ``course``).
+
+        :return: The record number, or None if the ID is not in the snapshot.
+        """
+        count = {'student': self.n_students, 'instructor': self.n_instructors, 'course': self.n_courses}[kind]
+        index = self.sections[kind + '_index']
+        id_field = {'student': STUDENT, 'instructor': INSTRUCTOR, 'course': COURSE}[kind]
+        records = self.sections[kind + 's']
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            number = LINK.unpack_from(self.map, index + middle * LINK.size)[0]
+            key = self.string(id_field.unpack_from(self.map, records + number * id_field.size)[0])
+            if key == id:
+                return number
+            if key < id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+
+class _Lazy(object):
+    """
+    Attribute of a decoded record computed by ``load(record)`` on first access, then stored on the record like a normal attribute.
+    """
+    def __init__(self, load):
+        self.load = load
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.name] = self.load(obj)
+        return value
+
+
+class SnapshotStudent(Student):
+    registered_courses = _Lazy(lambda x: [x._school.courses[i] for i in x._school.snapshot.links('student_links', *x._links)])
+
+
+class SnapshotInstructor(Instructor):
+    assigned_courses = _Lazy(lambda x: [x._school.courses[i] for i in x._school.snapshot.links('instructor_links', *x._links)])
+
+
+class SnapshotCourse(Course):
+    instructor = _Lazy(lambda x: x._school.instructors[x._instructor] if x._instructor >= 0 else None)
+    enrolled_student = _Lazy(lambda x: [x._school.students[i] for i in x._school.snapshot.links('course_links', *x._links)])
+
+
+class SnapshotList(object):
+    """
+    List-like view of the students, instructors or courses of a snapshot. A record is decoded on first access and the object
+    is kept, so the same record always gives the same object. Appended objects are kept in memory after the snapshot records.
+    """
+    def __init__(self, school, kind, count, decode):
+        self.school = school
+        self.kind = kind
+        self.count = count
+        self.decode = decode
+        self.decoded = {}
+        self.appended = []
+
+    def __len__(self):
+        return self.count + len(self.appended)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i >= self.count:
+            return self.appended[i - self.count]
+        if i < 0:
+            raise IndexError(i)
+        obj = self.decoded.get(i)
+        if obj is None:
+            obj = self.decoded[i] = self.decode(i)
+        return obj
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, obj):
+        self.appended.append(obj)
+
+    def find(self, id, id_attribute):
+        number = self.school.snapshot.find(self.kind, id)
+        if number is not None:
+            return self[number]
+        for x in self.appended:
+            if getattr(x, id_attribute) == id:
+                return x
+        return None
+
+
+class SnapshotSchool(School):
+    """
+    A :class:`classes.School` opened from a snapshot file. The students, instructors and courses lists are
+    :class:`SnapshotList` views decoding the records on access, and the ID lookups use the indexes of the snapshot.
+
+    :param path: The snapshot file.
+    :type path: str
+    """
+    def __init__(self, path):
+        School.__init__(self)
+        self.fileName = ""
+        self.snapshot_file = path
+        self.snapshot = Snapshot(path)
+        self.students = SnapshotList(self, 'student', self.snapshot.n_students, self._student)
+        self.instructors = SnapshotList(self, 'instructor', self.snapshot.n_instructors, self._instructor)
+        self.courses = SnapshotList(self, 'course', self.snapshot.n_courses, self._course)
+
+    def _student(self, i):
+        x = SnapshotStudent.__new__(SnapshotStudent)
+        x.student_id, x.name, x.age, x._email, first, count = self.snapshot.student_record(i)
+        x._school, x._links = self, (first, count)
+        return x
+
+    def _instructor(self, i):
+        x = SnapshotInstructor.__new__(SnapshotInstructor)
+        x.instructor_id, x.name, x.age, x._email, first, count = self.snapshot.instructor_record(i)
+        x._school, x._links = self, (first, count)
+        return x
+
+    def _course(self, i):
+        x = SnapshotCourse.__new__(SnapshotCourse)
+        x.course_id, x.course_name, x._instructor, first, count = self.snapshot.course_record(i)
+        x._school, x._links = self, (first, count)
+        return x
+
+    def find_student(self, id):
+        return self.students.find(id, 'student_id')
+
+    def find_instructor(self, id):
+        return self.instructors.find(id, 'instructor_id')
+
+    def find_course(self, id):
+        return self.courses.find(id, 'course_id')
+
+    def save_to_snapshot(self, path=None):
+        """
+        Writes the school, including the changes made since it was opened, to ``path`` (by default the file it was opened from).
+        """
+        write_snapshot(self, path or self.snapshot_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert School JSON files to and from binary snapshots.")
+    parser.add_argument('direction', choices=['to-snapshot', 'to-json'])
+    parser.add_argument('source')
+    parser.add_argument('target')
+    args = parser.parse_args(argv)
+    if args.direction == 'to-snapshot':
+        json_to_snapshot(args.source, args.target)
+    else:
+        snapshot_to_json(args.source, args.target)
+
+
+if __name__ == '__main__':
+    main()
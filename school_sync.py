@@ -0,0 +1,325 @@
+"""
+Incremental synchronization between the database of the tkinter application (:mod:`DDL_sql` schema, mySchool.db) and
+the database of the PyQt application (:func:`school_db.init_db` schema, school.db).
+
+Change capture: :func:`install` adds to a database a ``_changes`` log fed by triggers on every table. Each row names
+the entity (``student``, ``instructor``, ``course`` or ``enrollment``), its external ID(s) and whether it was
+upserted or deleted. The log is seeded with the existing records the first time, so the first sync copies them.
+
+Sync: :func:`sync` reads the log of the source past the watermark recorded in the target for this source, in batches.
+For every batch the last operation of each record wins, and the current state of the upserted records is read from the
+source and written in the target's schema. The deletes are applied first, children before parents, then the upserts,
+parents first, so a record removed and another one added with the same email in one batch do not collide. The target's
+triggers are muted during the apply (a row in ``_sync_lock``, only visible inside the apply transaction), so applied
+changes are not sent back. The new watermark is committed with the data, and the source's log is then pruned. A
+database is therefore expected to be synchronized with one peer. When the same record changed on both sides, the side
+synchronized last wins.
+
+Usage::
+
+    python school_sync.py --tkinter mySchool.db --pyqt school.db
+    python school_sync.py --tkinter mySchool.db --pyqt school.db --direction to-pyqt --batch-size 5000
+"""
+import argparse
+import sqlite3
+import uuid
+
+import query_log
+import school_db
+from DDL_sql import create_tables
+
+# parents first: the order of the upserts, reversed for the deletes
+ENTITIES = ('instructor', 'student', 'course', 'enrollment')
+
+_LOG_TABLES = [
+    '''CREATE TABLE IF NOT EXISTS _changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity TEXT NOT NULL,
+        key TEXT,
+        key2 TEXT NOT NULL DEFAULT '',
+        op TEXT NOT NULL
+    )''',
+    'CREATE TABLE IF NOT EXISTS _sync_state (source TEXT PRIMARY KEY, last_seq INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS _sync_lock (locked INTEGER)',
+    'CREATE TABLE IF NOT EXISTS _sync_identity (id TEXT NOT NULL)',
+]
+
+
+def _triggers(entity, table, key, key2="''", renamed=None):
+    """
+    Builds the insert, update and delete triggers logging the changes of one table.
+
+    ``key`` and ``key2`` are SQL expressions of the external IDs where ``{row}`` stands for NEW or OLD. When an
+    update changes the key, the old key is logged as deleted and ``renamed`` (a SELECT of entity, key, key2, op using
+    NEW and OLD) logs the dependent records to upsert under the new key.
+    """
+    guard = 'WHEN NOT EXISTS (SELECT 1 FROM _sync_lock)'
+    log = 'INSERT INTO _changes (entity, key, key2, op)'
+    new = (key.format(row='NEW'), key2.format(row='NEW'))
+    old = (key.format(row='OLD'), key2.format(row='OLD'))
+    update = [f"{log} SELECT '{entity}', {old[0]}, {old[1]}, 'delete' WHERE {old[0]} IS NOT {new[0]} OR {old[1]} IS NOT {new[1]};",
+              f"{log} VALUES ('{entity}', {new[0]}, {new[1]}, 'upsert');"]
+    if renamed:
+        update.append(f"{log} {renamed};")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS _sync_{table}_insert AFTER INSERT ON {table} {guard} "
+        f"BEGIN {log} VALUES ('{entity}', {new[0]}, {new[1]}, 'upsert'); END",
+        f"CREATE TRIGGER IF NOT EXISTS _sync_{table}_update AFTER UPDATE ON {table} {guard} BEGIN {' '.join(update)} END",
+        f"CREATE TRIGGER IF NOT EXISTS _sync_{table}_delete AFTER DELETE ON {table} {guard} "
+        f"BEGIN {log} VALUES ('{entity}', {old[0]}, {old[1]}, 'delete'); END",
+    ]
+
+
+class TkinterSchema(object):
+    """
+    Reads and writes the records of the tkinter database (text primary keys, ``registered_courses``).
+
+    Records are exchanged as ``(id, name, age, email)`` for students and instructors, ``(id, name, instructor_id)``
+    for courses and ``(student_id, course_id)`` for enrollments, with external IDs only.
+    """
+    name = 'tkinter'
+
+    triggers = (
+        _triggers('student', 'students', '{row}.student_id', renamed=
+                  "SELECT 'enrollment', NEW.student_id, course_id, 'upsert' FROM registered_courses "
+                  "WHERE student_id = NEW.student_id AND OLD.student_id IS NOT NEW.student_id")
+        + _triggers('instructor', 'instructors', '{row}.instructor_id')
+        + _triggers('course', 'courses', '{row}.course_id', renamed=
+                    "SELECT 'enrollment', student_id, NEW.course_id, 'upsert' FROM registered_courses "
+                    "WHERE course_id = NEW.course_id AND OLD.course_id IS NOT NEW.course_id")
+        + _triggers('enrollment', 'registered_courses', '{row}.student_id', '{row}.course_id')
+    )
+
+    seed = {
+        'instructor': "SELECT 'instructor', instructor_id, '', 'upsert' FROM instructors",
+        'student': "SELECT 'student', student_id, '', 'upsert' FROM students",
+        'course': "SELECT 'course', course_id, '', 'upsert' FROM courses",
+        'enrollment': "SELECT 'enrollment', student_id, course_id, 'upsert' FROM registered_courses",
+    }
+
+    read_queries = {
+        'student': 'SELECT student_id, name, age, email FROM students WHERE student_id=?',
+        'instructor': 'SELECT instructor_id, name, age, email FROM instructors WHERE instructor_id=?',
+        'course': 'SELECT course_id, name, instructor_id FROM courses WHERE course_id=?',
+        'enrollment': 'SELECT student_id, course_id FROM registered_courses WHERE student_id=? AND course_id=?',
+    }
+
+    upserts = {
+        'student': '''INSERT INTO students (student_id, name, age, email) VALUES (?, ?, ?, ?)
+                      ON CONFLICT (student_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email''',
+        'instructor': '''INSERT INTO instructors (instructor_id, name, age, email) VALUES (?, ?, ?, ?)
+                         ON CONFLICT (instructor_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email''',
+        'course': '''INSERT INTO courses (course_id, name, instructor_id)
+                     VALUES (?, ?, (SELECT instructor_id FROM instructors WHERE instructor_id=?))
+                     ON CONFLICT (course_id) DO UPDATE SET name=excluded.name, instructor_id=excluded.instructor_id''',
+        'enrollment': 'INSERT OR IGNORE INTO registered_courses (student_id, course_id) VALUES (?, ?)',
+    }
+
+    # the foreign keys cascade to the registrations and unassign the courses
+    deletes = {
+        'student': ['DELETE FROM students WHERE student_id=?'],
+        'instructor': ['DELETE FROM instructors WHERE instructor_id=?'],
+        'course': ['DELETE FROM courses WHERE course_id=?'],
+        'enrollment': ['DELETE FROM registered_courses WHERE student_id=? AND course_id=?'],
+    }
+
+    @staticmethod
+    def connect(path):
+        conn = query_log.connect(path)
+        create_tables(conn) # also turns the foreign keys on
+        return conn
+
+
+class PyqtSchema(object):
+    """
+    Reads and writes the records of the PyQt database, whose tables reference each other by integer rowid.
+    """
+    name = 'pyqt'
+
+    triggers = (
+        _triggers('student', 'students', '{row}.student_id', renamed=
+                  "SELECT 'enrollment', NEW.student_id, courses.course_id, 'upsert' FROM enrollments "
+                  "JOIN courses ON courses.id = enrollments.course_id "
+                  "WHERE enrollments.student_id = NEW.id AND OLD.student_id IS NOT NEW.student_id")
+        + _triggers('instructor', 'instructors', '{row}.instructor_id')
+        + _triggers('course', 'courses', '{row}.course_id', renamed=
+                    "SELECT 'enrollment', students.student_id, NEW.course_id, 'upsert' FROM enrollments "
+                    "JOIN students ON students.id = enrollments.student_id "
+                    "WHERE enrollments.course_id = NEW.id AND OLD.course_id IS NOT NEW.course_id")
+        + _triggers('enrollment', 'enrollments', '(SELECT student_id FROM students WHERE id = {row}.student_id)',
+                    '(SELECT course_id FROM courses WHERE id = {row}.course_id)')
+    )
+
+    seed = {
+        'instructor': "SELECT 'instructor', instructor_id, '', 'upsert' FROM instructors",
+        'student': "SELECT 'student', student_id, '', 'upsert' FROM students",
+        'course': "SELECT 'course', course_id, '', 'upsert' FROM courses",
+        'enrollment': '''SELECT 'enrollment', students.student_id, courses.course_id, 'upsert' FROM enrollments
+                         JOIN students ON students.id = enrollments.student_id
+                         JOIN courses ON courses.id = enrollments.course_id''',
+    }
+
+    read_queries = {
+        'student': 'SELECT student_id, name, age, email FROM students WHERE student_id=?',
+        'instructor': 'SELECT instructor_id, name, age, email FROM instructors WHERE instructor_id=?',
+        'course': '''SELECT courses.course_id, courses.course_name, instructors.instructor_id
+                     FROM courses LEFT JOIN instructors ON instructors.id = courses.instructor_id
+                     WHERE courses.course_id=?''',
+        'enrollment': '''SELECT students.student_id, courses.course_id FROM enrollments
+                         JOIN students ON students.id = enrollments.student_id
+                         JOIN courses ON courses.id = enrollments.course_id
+                         WHERE students.student_id=? AND courses.course_id=?''',
+    }
+
+    upserts = {
+        'student': '''INSERT INTO students (student_id, name, age, email) VALUES (?, ?, ?, ?)
+                      ON CONFLICT (student_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email''',
+        'instructor': '''INSERT INTO instructors (instructor_id, name, age, email) VALUES (?, ?, ?, ?)
+                         ON CONFLICT (instructor_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email''',
+        'course': '''INSERT INTO courses (course_id, course_name, instructor_id)
+                     VALUES (?, ?, (SELECT id FROM instructors WHERE instructor_id=?))
+                     ON CONFLICT (course_id) DO UPDATE SET course_name=excluded.course_name, instructor_id=excluded.instructor_id''',
+        'enrollment': '''INSERT OR IGNORE INTO enrollments (student_id, course_id)
+                         SELECT students.id, courses.id FROM students, courses
+                         WHERE students.student_id=? AND courses.course_id=?''',
+    }
+
+    # no foreign key actions here, the dependent rows are removed or unassigned first
+    deletes = {
+        'student': ['DELETE FROM enrollments WHERE student_id = (SELECT id FROM students WHERE student_id=?)',
+                    'DELETE FROM students WHERE student_id=?'],
+        'instructor': ['UPDATE courses SET instructor_id = NULL WHERE instructor_id = (SELECT id FROM instructors WHERE instructor_id=?)',
+                       'DELETE FROM instructors WHERE instructor_id=?'],
+        'course': ['DELETE FROM enrollments WHERE course_id = (SELECT id FROM courses WHERE course_id=?)',
+                   'DELETE FROM courses WHERE course_id=?'],
+        'enrollment': ['''DELETE FROM enrollments WHERE student_id = (SELECT id FROM students WHERE student_id=?)
+                          AND course_id = (SELECT id FROM courses WHERE course_id=?)'''],
+    }
+
+    @staticmethod
+    def connect(path):
+        school_db.DB_PATH = path
+        school_db.init_db() # creates the tables or migrates the enrollments if needed
+        return school_db.connect()
+
+
+SCHEMAS = {'tkinter': TkinterSchema, 'pyqt': PyqtSchema}
+
+
+def install(conn, schema):
+    """
+    Adds the change log tables and triggers to a database if they are not there yet. A new log is seeded with an
+    upsert of every existing record.
+
+    :param schema: :class:`TkinterSchema` or :class:`PyqtSchema`.
+    :return: True if the change capture was installed by this call.
+    :rtype: bool
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='_changes'").fetchone():
+        return False
+    with conn:
+        for statement in _LOG_TABLES:
+            conn.execute(statement)
+        conn.execute('INSERT INTO _sync_identity (id) VALUES (?)', (uuid.uuid4().hex,))
+        for statement in schema.triggers:
+            conn.execute(statement)
+        for entity in ENTITIES:
+            conn.execute('INSERT INTO _changes (entity, key, key2, op) ' + schema.seed[entity])
+    return True
+
+
+def _apply(source, source_schema, target, target_schema, changes, report):
+    """
+    Applies the last change of every record of a batch to the target, the deletes first (children first), then the
+    upserts (parents first).
+    """
+    for op, order in (('delete', ENTITIES[::-1]), ('upsert', ENTITIES)):
+        for entity in order:
+            for (kind, key, key2), last_op in changes.items():
+                if kind != entity or last_op != op or key is None:
+                    continue
+                keys = (key, key2) if entity == 'enrollment' else (key,)
+                try:
+                    if op == 'upsert':
+                        record = source.execute(source_schema.read_queries[entity], keys).fetchone()
+                        if record is None: # removed since, a later change of the log deletes it
+                            continue
+                        target.execute(target_schema.upserts[entity], record)
+                    else:
+                        for statement in target_schema.deletes[entity]:
+                            target.execute(statement, keys)
+                except sqlite3.IntegrityError as e:
+                    report['conflicts'].append((entity, key, key2, op, str(e)))
+                else:
+                    report['applied'] += 1
+
+
+def sync(source, source_schema, target, target_schema, batch_size=1000):
+    """
+    Applies to ``target`` the changes logged in ``source`` since the last sync between them.
+
+    **Sphinx-style documentation**
+
+    Every batch of ``batch_size`` log entries is applied in one transaction of the target together with the new
+    watermark. The records the target rejects (e.g. an email already used by another student of the PyQt database)
+    are skipped and reported.
+
+    :param source: Connection to the database the changes are read from, with the change capture installed.
+    :type source: sqlite3.Connection
+    :param target: Connection to the database the changes are written to, with the change capture installed.
+    :type target: sqlite3.Connection
+    :return: ``{'applied': count, 'conflicts': [(entity, key, key2, op, error), ...], 'watermark': seq}``
+    :rtype: dict
+    """
+    source_id = source.execute('SELECT id FROM _sync_identity').fetchone()[0]
+    row = target.execute('SELECT last_seq FROM _sync_state WHERE source=?', (source_id,)).fetchone()
+    last = row[0] if row else 0
+    report = {'applied': 0, 'conflicts': [], 'watermark': last}
+    while True:
+        rows = source.execute('SELECT seq, entity, key, key2, op FROM _changes WHERE seq > ? ORDER BY seq LIMIT ?',
+                              (last, batch_size)).fetchall()
+        if not rows:
+            break
+        changes = {}
+        for seq, entity, key, key2, op in rows:
+            changes.pop((entity, key, key2), None) # keeps the records in the order of their last change
+            changes[(entity, key, key2)] = op
+        last = rows[-1][0]
+        with target:
+            target.execute('INSERT INTO _sync_lock (locked) VALUES (1)')
+            _apply(source, source_schema, target, target_schema, changes, report)
+            target.execute('INSERT INTO _sync_state (source, last_seq) VALUES (?, ?) ON CONFLICT (source) DO UPDATE SET last_seq=excluded.last_seq',
+                           (source_id, last))
+            target.execute('DELETE FROM _sync_lock')
+        with source:
+            source.execute('DELETE FROM _changes WHERE seq <= ?', (last,))
+        report['watermark'] = last
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synchronize the tkinter and PyQt school databases incrementally.")
+    parser.add_argument('--tkinter', required=True, help="database of the tkinter application (e.g. mySchool.db)")
+    parser.add_argument('--pyqt', required=True, help="database of the PyQt application (e.g. school.db)")
+    parser.add_argument('--direction', choices=['both', 'to-pyqt', 'to-tkinter'], default='both')
+    parser.add_argument('--batch-size', type=int, default=1000, help="log entries applied per transaction")
+    args = parser.parse_args(argv)
+
+    conns = {}
+    for name, path in (('tkinter', args.tkinter), ('pyqt', args.pyqt)):
+        conns[name] = SCHEMAS[name].connect(path)
+        if install(conns[name], SCHEMAS[name]):
+            print(f"change capture installed in {path}")
+
+    directions = {'to-pyqt': [('tkinter', 'pyqt')], 'to-tkinter': [('pyqt', 'tkinter')]}
+    for source, target in directions.get(args.direction, [('tkinter', 'pyqt'), ('pyqt', 'tkinter')]):
+        report = sync(conns[source], SCHEMAS[source], conns[target], SCHEMAS[target], args.batch_size)
+        for entity, key, key2, op, error in report['conflicts']:
+            print(f"{source} -> {target}: {op} {entity} {key} {key2} rejected: {error}".replace('  ', ' '))
+        print(f"{source} -> {target}: {report['applied']} changes applied, {len(report['conflicts'])} rejected")
+    for conn in conns.values():
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
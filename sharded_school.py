@@ -0,0 +1,367 @@
+"""
+Optional sharded storage for very large student populations, e.g. a multi-campus deployment.
+
+Students and their enrollments are partitioned across N SQLite files by a hash (CRC-32) of the student ID, so writes
+for different students mostly go to different files and do not wait for each other. Instructors and courses are kept
+once in a shared catalog database. A :class:`ShardedSchool` routes every per-student call to the shard of the student,
+and fans the calls that concern all students (search, course rosters, counts) out to the shards in parallel, merging
+their sorted results.
+
+Layout of the directory::
+
+    catalog.db      instructors, courses and the number of shards
+    shard_0.db ...  students, enrollments (student rowid, course ID)
+
+The shard count is fixed when the directory is created. Uniqueness of emails is only enforced within a shard.
+"""
+import heapq
+import os
+import sqlite3
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import query_log
+
+_CATALOG_TABLES = [
+    'CREATE TABLE IF NOT EXISTS shard_meta (shards INTEGER NOT NULL)',
+    '''CREATE TABLE IF NOT EXISTS instructors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        age INTEGER NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        instructor_id TEXT NOT NULL UNIQUE
+    )''',
+    '''CREATE TABLE IF NOT EXISTS courses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        course_id TEXT NOT NULL UNIQUE,
+        course_name TEXT NOT NULL,
+        instructor_id INTEGER,
+        FOREIGN KEY (instructor_id) REFERENCES instructors(id)
+    )''',
+]
+
+_SHARD_TABLES = [
+    '''CREATE TABLE IF NOT EXISTS students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        age INTEGER NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        student_id TEXT NOT NULL UNIQUE
+    )''',
+    # the course is referenced by its external ID since it lives in the catalog
+    '''CREATE TABLE IF NOT EXISTS enrollments (
+        student_id INTEGER NOT NULL,
+        course_id TEXT NOT NULL,
+        PRIMARY KEY (course_id, student_id),
+        FOREIGN KEY (student_id) REFERENCES students(id)
+    ) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS idx_enrollments_student ON enrollments (student_id, course_id)',
+    'CREATE INDEX IF NOT EXISTS idx_students_name ON students (name COLLATE NOCASE)',
+]
+
+
+def shard_of(student_id, shards):
+    """
+    Returns the shard number of a student ID, the same in every process and Python version.
+    """
+    return zlib.crc32(student_id.encode('utf-8')) % shards
+
+
+class ShardedSchool(object):
+    """
+    Router over a catalog database and ``shards`` student databases stored in ``directory``.
+
+    **Sphinx-style documentation**
+
+    :param directory: Directory of the databases, created if needed.
+    :type directory: str
+    :param shards: Number of student databases. Only used when the directory is new, an existing one keeps its count.
+    :type shards: int
+    :raises ValueError: If ``shards`` differs from the count of an existing directory.
+    """
+    def __init__(self, directory, shards=4):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        conn = self.catalog()
+        try:
+            with conn:
+                for statement in _CATALOG_TABLES:
+                    conn.execute(statement)
+                row = conn.execute('SELECT shards FROM shard_meta').fetchone()
+                if row is None:
+                    conn.execute('INSERT INTO shard_meta (shards) VALUES (?)', (shards,))
+        finally:
+            conn.close()
+        if row is not None and row[0] != shards:
+            raise ValueError(f"{directory} has {row[0]} shards, not {shards}")
+        self.shards = shards
+        for number in range(shards):
+            conn = self.shard(number)
+            try:
+                with conn:
+                    for statement in _SHARD_TABLES:
+                        conn.execute(statement)
+            finally:
+                conn.close()
+        self.pool = ThreadPoolExecutor(max_workers=shards, thread_name_prefix='school-shard')
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def catalog(self):
+        """
+        Opens a new connection to the catalog database, with the foreign keys enforced.
+        """
+        conn = query_log.connect(os.path.join(self.directory, 'catalog.db'))
+        conn.execute('PRAGMA foreign_keys = ON')
+        return conn
+
+    def shard(self, number):
+        """
+        Opens a new connection to a student database, with the foreign keys enforced.
+        """
+        conn = query_log.connect(os.path.join(self.directory, f'shard_{number}.db'))
+        conn.execute('PRAGMA foreign_keys = ON')
+        return conn
+
+    def _fan_out(self, fn, *args):
+        """
+        Runs ``fn(conn, *args)`` on every shard in parallel, each call with its own connection.
+
+        :return: The results in shard order.
+        :rtype: list
+        """
+        def run(number):
+            conn = self.shard(number)
+            try:
+                return fn(conn, *args)
+            finally:
+                conn.close()
+        return list(self.pool.map(run, range(self.shards)))
+
+    def _course_exists(self, course_id):
+        conn = self.catalog()
+        try:
+            row = conn.execute('SELECT 1 FROM courses WHERE course_id=?', (course_id,)).fetchone()
+        finally:
+            conn.close()
+        return row is not None
+
+    # catalog
+
+    def add_instructor(self, name, age, email, instructor_id):
+        """
+        :return: True if the instructor is added, False if the ID or email is already in use.
+        :rtype: bool
+        """
+        conn = self.catalog()
+        try:
+            with conn:
+                conn.execute('INSERT INTO instructors (name, age, email, instructor_id) VALUES (?, ?, ?, ?)', (name, age, email, instructor_id))
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            conn.close()
+        return True
+
+    def add_course(self, course_id, course_name):
+        """
+        :return: True if the course is added, False if the ID is already in use.
+        :rtype: bool
+        """
+        conn = self.catalog()
+        try:
+            with conn:
+                conn.execute('INSERT INTO courses (course_id, course_name) VALUES (?, ?)', (course_id, course_name))
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            conn.close()
+        return True
+
+    def assign_instructor(self, instructor_id, course_id):
+        """
+        :return: True if the course was assigned, False if the instructor or the course does not exist.
+        :rtype: bool
+        """
+        conn = self.catalog()
+        try:
+            with conn:
+                changed = conn.execute('''
+                    UPDATE courses SET instructor_id = (SELECT id FROM instructors WHERE instructor_id=?)
+                    WHERE course_id=? AND EXISTS (SELECT 1 FROM instructors WHERE instructor_id=?)
+                ''', (instructor_id, course_id, instructor_id)).rowcount
+        finally:
+            conn.close()
+        return changed == 1
+
+    def fetch_courses(self):
+        """
+        :return: ``(course_id, course_name, instructor_id)`` tuples ordered by course ID.
+        :rtype: list
+        """
+        conn = self.catalog()
+        try:
+            rows = conn.execute('''
+                SELECT courses.course_id, courses.course_name, instructors.instructor_id
+                FROM courses LEFT JOIN instructors ON instructors.id = courses.instructor_id
+                ORDER BY courses.course_id
+            ''').fetchall()
+        finally:
+            conn.close()
+        return rows
+
+    # students, routed to their shard
+
+    def add_student(self, name, age, email, student_id):
+        """
+        :return: True if the student is added, False if the ID or email is already in use in its shard.
+        :rtype: bool
+        """
+        conn = self.shard(shard_of(student_id, self.shards))
+        try:
+            with conn:
+                conn.execute('INSERT INTO students (name, age, email, student_id) VALUES (?, ?, ?, ?)', (name, age, email, student_id))
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            conn.close()
+        return True
+
+    def update_student(self, student_id, name, age, email):
+        """
+        Updates the name, age and email of a student. The ID of a sharded student cannot change since it selects its shard.
+
+        :return: True if the student exists and was updated, False otherwise.
+        :rtype: bool
+        """
+        conn = self.shard(shard_of(student_id, self.shards))
+        try:
+            with conn:
+                changed = conn.execute('UPDATE students SET name=?, age=?, email=? WHERE student_id=?', (name, age, email, student_id)).rowcount
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            conn.close()
+        return changed == 1
+
+    def delete_student(self, student_id):
+        """
+        Deletes a student and its enrollments.
+        """
+        conn = self.shard(shard_of(student_id, self.shards))
+        try:
+            with conn:
+                conn.execute('DELETE FROM enrollments WHERE student_id = (SELECT id FROM students WHERE student_id=?)', (student_id,))
+                conn.execute('DELETE FROM students WHERE student_id=?', (student_id,))
+        finally:
+            conn.close()
+
+    def enroll(self, student_id, course_id):
+        """
+        :return: True if the student was enrolled, False if the student or the course does not exist or the student is already enrolled.
+        :rtype: bool
+        """
+        if not self._course_exists(course_id):
+            return False
+        conn = self.shard(shard_of(student_id, self.shards))
+        try:
+            with conn:
+                changed = conn.execute('''
+                    INSERT INTO enrollments (student_id, course_id) SELECT id, ? FROM students WHERE student_id=?
+                ''', (course_id, student_id)).rowcount
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            conn.close()
+        return changed == 1
+
+    def enroll_many(self, pairs):
+        """
+        Enrolls ``(student_id, course_id)`` pairs, grouped by shard and written to the shards in parallel, one transaction per shard.
+        Pairs with an unknown student or course and existing enrollments are skipped.
+
+        :return: The number of enrollments created.
+        :rtype: int
+        """
+        conn = self.catalog()
+        try:
+            courses = set(x[0] for x in conn.execute('SELECT course_id FROM courses'))
+        finally:
+            conn.close()
+        groups = [[] for _ in range(self.shards)]
+        for student_id, course_id in pairs:
+            if course_id in courses:
+                groups[shard_of(student_id, self.shards)].append((course_id, student_id))
+
+        def write(number):
+            conn = self.shard(number)
+            try:
+                with conn:
+                    before = conn.total_changes
+                    conn.executemany('INSERT OR IGNORE INTO enrollments (student_id, course_id) SELECT id, ? FROM students WHERE student_id=?', groups[number])
+                    return conn.total_changes - before
+            finally:
+                conn.close()
+        return sum(self.pool.map(write, range(self.shards)))
+
+    def fetch_student_courses(self, student_id):
+        """
+        :return: ``(course_id, course_name)`` tuples ordered by course ID.
+        :rtype: list
+        """
+        conn = self.shard(shard_of(student_id, self.shards))
+        try:
+            course_ids = [x[0] for x in conn.execute('''
+                SELECT enrollments.course_id FROM students JOIN enrollments ON enrollments.student_id = students.id
+                WHERE students.student_id=?
+            ''', (student_id,))]
+        finally:
+            conn.close()
+        conn = self.catalog()
+        try:
+            placeholders = ', '.join('?' * len(course_ids))
+            rows = conn.execute(f'SELECT course_id, course_name FROM courses WHERE course_id IN ({placeholders}) ORDER BY course_id', course_ids).fetchall()
+        finally:
+            conn.close()
+        return rows
+
+    # fan-out
+
+    def fetch_course_roster(self, course_id):
+        """
+        :return: ``(student_id, name)`` tuples of the students enrolled in a course, ordered by student ID.
+        :rtype: list
+        """
+        def roster(conn, course_id):
+            return conn.execute('''
+                SELECT students.student_id, students.name FROM enrollments JOIN students ON students.id = enrollments.student_id
+                WHERE enrollments.course_id=? ORDER BY students.student_id
+            ''', (course_id,)).fetchall()
+        return list(heapq.merge(*self._fan_out(roster, course_id)))
+
+    def search_students(self, query, limit=None):
+        """
+        Searches the students whose name or ID contains ``query`` in every shard at once.
+
+        :param limit: Maximum number of results, all of them if None.
+        :type limit: int
+        :return: ``(student_id, name, age, email)`` tuples ordered by student ID.
+        :rtype: list
+        """
+        def search(conn, pattern):
+            sql = 'SELECT student_id, name, age, email FROM students WHERE name LIKE ?1 OR student_id LIKE ?1 ORDER BY student_id'
+            if limit is not None:
+                sql += f' LIMIT {int(limit)}'
+            return conn.execute(sql, (pattern,)).fetchall()
+        merged = heapq.merge(*self._fan_out(search, '%' + query + '%'))
+        return list(merged if limit is None else (x for _, x in zip(range(limit), merged)))
+
+    def count_students(self):
+        return sum(self._fan_out(lambda conn: conn.execute('SELECT COUNT(*) FROM students').fetchone()[0]))
@@ -0,0 +1,56 @@
+import gc
+import unittest
+
+import query_log
+
+
+class QueryLogTest(unittest.TestCase):
+    def setUp(self):
+        query_log.reset()
+        self.conn = query_log.connect(':memory:')
+        self.conn.execute('CREATE TABLE students (student_id TEXT PRIMARY KEY, name TEXT NOT NULL)')
+        self.conn.executemany('INSERT INTO students VALUES (?, ?)', [('S1', 'Ann'), ('S2', 'Bob'), ('S3', 'Cid')])
+
+    def tearDown(self):
+        self.conn.close()
+        query_log.reset()
+
+    def entry(self, sql):
+        return next(x for x in query_log.statistics() if x['sql'] == sql)
+
+    def test_fetchone_on_a_throwaway_cursor_is_recorded(self):
+        row = self.conn.execute('SELECT name FROM students WHERE student_id=?', ('S2',)).fetchone()
+        self.assertEqual(row, ('Bob',))
+        gc.collect()
+        entry = self.entry('SELECT name FROM students WHERE student_id=?')
+        self.assertEqual(entry['count'], 1)
+        self.assertEqual(entry['rows'], 1)
+        self.assertEqual(entry['param_shapes'], ['(str)'])
+        self.assertEqual(sum(entry['histogram'].values()), 1)
+
+    def test_select_is_recorded_before_its_rows_are_fetched(self):
+        cursor = self.conn.execute('SELECT name FROM students ORDER BY student_id')
+        self.assertEqual(self.entry('SELECT name FROM students ORDER BY student_id')['count'], 1)
+        cursor.fetchone()
+        cursor.fetchone()
+        self.conn.close()
+        entry = self.entry('SELECT name FROM students ORDER BY student_id')
+        self.assertEqual((entry['count'], entry['rows']), (1, 2))
+        self.assertEqual(sum(entry['histogram'].values()), 1)
+
+    def test_exhausted_select_is_counted_once(self):
+        sql = 'SELECT student_id FROM students'
+        for _ in range(2):
+            self.assertEqual(len(list(self.conn.execute(sql))), 3)
+        entry = self.entry(sql)
+        self.assertEqual((entry['count'], entry['rows']), (2, 6))
+        self.assertEqual(sum(entry['histogram'].values()), 2)
+
+    def test_write_rows_and_parameter_shape(self):
+        entry = self.entry('INSERT INTO students VALUES (?, ?)')
+        self.assertEqual((entry['count'], entry['rows']), (1, 3))
+        self.assertEqual(entry['param_shapes'], ['3 x (str, str)'])
+
+
+if __name__ == '__main__':
+    unittest.main()
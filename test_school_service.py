@@ -0,0 +1,60 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import query_log
+import school_db
+import school_service
+
+
+class StreamTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path, school_db.DB_PATH = school_db.DB_PATH, os.path.join(self.directory.name, 'school.db')
+        school_db.init_db()
+        conn = school_db.connect()
+        with conn:
+            conn.executemany('INSERT INTO students (name, age, email, student_id) VALUES (?, ?, ?, ?)',
+                             [('Ann', 20, 'ann@school.edu', 'S1'), ('Bob', 21, 'bob@school.edu', 'S2')])
+        conn.close()
+
+    def tearDown(self):
+        school_db.DB_PATH = self.path
+        query_log.reset()
+        self.directory.cleanup()
+
+    async def get(self, path):
+        service = school_service.SchoolService()
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return response
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.readers.shutdown()
+
+    def test_stream_failing_after_its_headers_is_truncated(self):
+        fetch = school_db.fetch_records_page
+        pages = [fetch, mock.Mock(side_effect=RuntimeError("disk I/O error"))]
+        with mock.patch.object(school_service, 'STREAM_CHUNK', 1), \
+                mock.patch.object(school_db, 'fetch_records_page', lambda *args: pages.pop(0)(*args)), \
+                mock.patch.object(school_service, 'send_json', wraps=school_service.send_json) as send_json:
+            response = asyncio.run(self.get('/students?limit=2'))
+        # no error response is written on the aborted transport
+        send_json.assert_not_called()
+        head, _, body = response.partition(b'\r\n\r\n')
+        self.assertTrue(head.startswith(b'HTTP/1.1 200 OK'))
+        self.assertIn(b'Transfer-Encoding: chunked', head)
+        self.assertIn(b'"student_id": "S1"', body)
+        self.assertNotIn(b'HTTP/1.1', body)
+        self.assertFalse(body.endswith(b'0\r\n\r\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
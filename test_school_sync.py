@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+import query_log
+import school_db
+import school_sync
+
+
+class SyncTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = school_db.DB_PATH
+        self.tkinter = school_sync.TkinterSchema.connect(os.path.join(self.directory.name, 'mySchool.db'))
+        self.pyqt = school_sync.PyqtSchema.connect(os.path.join(self.directory.name, 'school.db'))
+        school_sync.install(self.tkinter, school_sync.TkinterSchema)
+        school_sync.install(self.pyqt, school_sync.PyqtSchema)
+
+    def tearDown(self):
+        self.tkinter.close()
+        self.pyqt.close()
+        school_db.DB_PATH = self.path
+        query_log.reset()
+        self.directory.cleanup()
+
+    def to_pyqt(self):
+        return school_sync.sync(self.tkinter, school_sync.TkinterSchema, self.pyqt, school_sync.PyqtSchema)
+
+    def test_email_reused_after_a_delete_in_the_same_batch(self):
+        with self.tkinter:
+            self.tkinter.execute("INSERT INTO students VALUES ('S1', 'Ann', 20, 'ann@school.edu')")
+        self.to_pyqt()
+        with self.tkinter:
+            self.tkinter.execute("DELETE FROM students WHERE student_id='S1'")
+            self.tkinter.execute("INSERT INTO students VALUES ('S2', 'Ann', 20, 'ann@school.edu')")
+        report = self.to_pyqt()
+        self.assertEqual(report['conflicts'], [])
+        self.assertEqual(self.pyqt.execute('SELECT student_id, email FROM students').fetchall(),
+                         [('S2', 'ann@school.edu')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import sqlite3
+import tempfile
+import unittest
+
+import query_log
+from sharded_school import ShardedSchool
+
+
+class ShardedSchoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.school = ShardedSchool(self.directory.name, shards=2)
+
+    def tearDown(self):
+        self.school.close()
+        query_log.reset()
+        self.directory.cleanup()
+
+    def test_delete_student_removes_its_enrollments(self):
+        self.assertTrue(self.school.add_course('C1', 'Algebra'))
+        self.assertTrue(self.school.add_student('Ann', 20, 'ann@school.edu', 'S1'))
+        self.assertTrue(self.school.enroll('S1', 'C1'))
+        self.school.delete_student('S1')
+        self.assertEqual(self.school.fetch_course_roster('C1'), [])
+        self.assertEqual(self.school.count_students(), 0)
+
+    def test_foreign_keys_are_enforced(self):
+        for conn in (self.school.catalog(), self.school.shard(0)):
+            try:
+                self.assertEqual(conn.execute('PRAGMA foreign_keys').fetchone(), (1,))
+            finally:
+                conn.close()
+        conn = self.school.shard(0)
+        try:
+            with self.assertRaises(sqlite3.IntegrityError):
+                conn.execute("INSERT INTO enrollments (student_id, course_id) VALUES (42, 'C1')")
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
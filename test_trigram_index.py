@@ -0,0 +1,45 @@
+import itertools
+import os
+import tempfile
+import unittest
+
+import query_log
+import school_db
+import trigram_index
+
+
+class FuzzySearchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path, school_db.DB_PATH = school_db.DB_PATH, os.path.join(self.directory.name, 'school.db')
+        school_db.init_db()
+
+    def tearDown(self):
+        school_db.DB_PATH = self.path
+        query_log.reset()
+        self.directory.cleanup()
+
+    def add_students(self, names):
+        conn = school_db.connect()
+        with conn:
+            conn.executemany('INSERT INTO students (name, age, email, student_id) VALUES (?, ?, ?, ?)',
+                             [(name, 20, f'student{i}@school.edu', f'S{i}') for i, name in enumerate(names)])
+        conn.close()
+
+    def names(self, query):
+        return [record[1] for _, record in school_db.fuzzy_search_records(query)]
+
+    def test_swapped_letters_are_found(self):
+        self.add_students(['John Smith', 'Mary Brown'])
+        self.assertEqual(self.names('Jonh'), ['John Smith'])
+
+    def test_swapped_letters_are_found_when_the_first_trigrams_are_common(self):
+        # "Jo" names past the frequency cap: "  j" and " jo", the only trigrams "jonh" shares with "john", are common
+        names = [f'Jo{"".join(x)} Doe' for x in itertools.product('abcdefgik', repeat=4)]
+        self.assertGreater(len(names), trigram_index.FREQUENCY_CAP)
+        self.add_students(names + ['John Smith'])
+        self.assertEqual(self.names('Jonh')[:1], ['John Smith'])
+
+
+if __name__ == '__main__':
+    unittest.main()
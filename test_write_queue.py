@@ -0,0 +1,54 @@
+import sqlite3
+import threading
+import unittest
+
+from write_queue import WriteBehindQueue
+
+
+def connect():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.execute('CREATE TABLE students (student_id TEXT PRIMARY KEY)')
+    return conn
+
+
+class WriteBehindQueueTest(unittest.TestCase):
+    def test_failed_operation_is_rolled_back_alone(self):
+        with WriteBehindQueue(connect) as queue:
+            first = queue.submit('INSERT INTO students VALUES (?)', ('S1',))
+            again = queue.submit('INSERT INTO students VALUES (?)', ('S1',))
+            self.assertEqual(first.result(timeout=5), 1)
+            self.assertIsInstance(again.exception(timeout=5), sqlite3.IntegrityError)
+            count = queue.call(lambda conn: conn.execute('SELECT COUNT(*) FROM students').fetchone()[0])
+            self.assertEqual(count.result(timeout=5), 1)
+
+    def test_connection_failure_fails_the_calls(self):
+        queued = threading.Event()
+
+        def refuse():
+            queued.wait(5)
+            raise sqlite3.OperationalError("unable to open database file")
+
+        queue = WriteBehindQueue(refuse)
+        pending = queue.submit('INSERT INTO students VALUES (?)', ('S1',))
+        queued.set()
+        self.assertIsInstance(pending.exception(timeout=5), sqlite3.OperationalError)
+        with self.assertRaises(RuntimeError):
+            queue.submit('INSERT INTO students VALUES (?)', ('S1',))
+        queue.close()
+
+    def test_failing_rollback_handler_fails_the_queued_calls(self):
+        def on_rollback():
+            raise RuntimeError("cache reload failed")
+
+        queue = WriteBehindQueue(connect, on_rollback=on_rollback)
+        # committing inside an operation breaks the transaction, which is rolled back
+        broken = queue.call(lambda conn: conn.execute('COMMIT'))
+        self.assertIsInstance(broken.exception(timeout=5), sqlite3.OperationalError)
+        queue._thread.join(timeout=5)
+        with self.assertRaises(RuntimeError):
+            queue.submit('INSERT INTO students VALUES (?)', ('S2',))
+        queue.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Timetable generator: gives every course a time slot so that no student has two courses in the same slot.
+
+Two courses conflict when at least one student is registered in both. The conflict graph is stored as one bitset per
+course (a Python int whose bit ``j`` is set when the course conflicts with course ``j``), built with one OR per
+enrollment: the bitset of the courses of a student is OR-ed into the row of each of its courses. Slots are then given
+by the Welsh-Powell heuristic: courses are taken by decreasing number of conflicts and put in the first slot whose
+bitset of courses does not intersect their row, a single AND per slot tried.
+
+The slots are stored in the ``course_timeslots`` table of the database of either application, see :data:`TKINTER`
+and :data:`PYQT`.
+
+Usage::
+
+    python timetable.py --tkinter mySchool.db
+    python timetable.py --pyqt school.db
+"""
+import argparse
+import time
+
+import query_log
+
+# queries of the tkinter database (DDL_sql.py), courses identified by their course ID
+TKINTER = {
+    'courses': 'SELECT course_id FROM courses ORDER BY course_id',
+    'enrollments': 'SELECT student_id, course_id FROM registered_courses',
+    'insert': 'INSERT INTO course_timeslots (course_id, timeslot) VALUES (?, ?)',
+    'fetch': '''SELECT course_timeslots.timeslot, courses.course_id, courses.name
+                FROM course_timeslots JOIN courses ON courses.course_id = course_timeslots.course_id
+                ORDER BY course_timeslots.timeslot, courses.course_id''',
+}
+
+# queries of the PyQt database (school_db.init_db), courses identified by their rowid
+PYQT = {
+    'courses': 'SELECT id FROM courses ORDER BY course_id',
+    'enrollments': 'SELECT student_id, course_id FROM enrollments',
+    'insert': 'INSERT INTO course_timeslots (course_id, timeslot) VALUES (?, ?)',
+    'fetch': '''SELECT course_timeslots.timeslot, courses.course_id, courses.course_name
+                FROM course_timeslots JOIN courses ON courses.id = course_timeslots.course_id
+                ORDER BY course_timeslots.timeslot, courses.course_id''',
+}
+
+
+def conflict_graph(courses, enrollments):
+    """
+    Builds the bitset rows of the conflict graph.
+
+    :param courses: The course keys, course ``i`` being bit ``i`` of the rows.
+    :type courses: list
+    :param enrollments: ``(student key, course key)`` pairs. Pairs of unknown courses are ignored.
+    :type enrollments: iterable
+    :return: The row of every course, without its own bit.
+    :rtype: list[int]
+    """
+    number = {course: i for i, course in enumerate(courses)}
+    schedules = {} # bitset of the courses of every student
+    pairs = []
+    for student, course in enrollments:
+        i = number.get(course)
+        if i is not None:
+            schedules[student] = schedules.get(student, 0) | (1 << i)
+            pairs.append((student, i))
+    rows = [0] * len(courses)
+    for student, i in pairs:
+        rows[i] |= schedules[student]
+    return [row & ~(1 << i) for i, row in enumerate(rows)]
+
+
+def colour(rows):
+    """
+    Welsh-Powell colouring of a conflict graph.
+
+    :param rows: The bitset row of every course, as returned by :func:`conflict_graph`.
+    :type rows: list[int]
+    :return: The slot of every course, numbered from 0.
+    :rtype: list[int]
+    """
+    order = sorted(range(len(rows)), key=lambda i: -bin(rows[i]).count('1'))
+    slots = [0] * len(rows)
+    members = [] # bitset of the courses of every slot
+    for i in order:
+        for slot, courses in enumerate(members):
+            if not courses & rows[i]:
+                members[slot] |= 1 << i
+                break
+        else:
+            slot = len(members)
+            members.append(1 << i)
+        slots[i] = slot
+    return slots
+
+
+def generate(conn, schema):
+    """
+    Computes a timetable from the registrations of a database and replaces the content of its course_timeslots table,
+    in one transaction.
+
+    :param conn: An open connection to the database, with no transaction in progress.
+    :type conn: sqlite3.Connection
+    :param schema: :data:`TKINTER` or :data:`PYQT`.
+    :type schema: dict
+    :return: The number of slots used.
+    :rtype: int
+    """
+    courses = [x[0] for x in conn.execute(schema['courses'])]
+    slots = colour(conflict_graph(courses, conn.execute(schema['enrollments'])))
+    try:
+        conn.execute('DELETE FROM course_timeslots')
+        conn.executemany(schema['insert'], zip(courses, slots))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return max(slots) + 1 if slots else 0
+
+
+def fetch(conn, schema):
+    """
+    :return: ``(timeslot, course_id, course name)`` tuples ordered by slot then course ID. Courses added since the
+        last :func:`generate` have no slot and are not included.
+    :rtype: list
+    """
+    return conn.execute(schema['fetch']).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Give every course a time slot so that no student has two courses at the same time.")
+    database = parser.add_mutually_exclusive_group(required=True)
+    database.add_argument('--tkinter', metavar='PATH', help="database of the tkinter application")
+    database.add_argument('--pyqt', metavar='PATH', help="database of the PyQt application")
+    args = parser.parse_args(argv)
+
+    if args.tkinter:
+        from DDL_sql import create_tables
+        conn = query_log.connect(args.tkinter)
+        create_tables(conn)
+        schema = TKINTER
+    else:
+        import school_db
+        school_db.DB_PATH = args.pyqt
+        school_db.init_db()
+        conn = school_db.connect()
+        schema = PYQT
+    start = time.perf_counter()
+    slots = generate(conn, schema)
+    print(f"{slots} time slots computed in {time.perf_counter() - start:.2f} s")
+    for slot, course_id, name in fetch(conn, schema):
+        print(f"  slot {slot + 1:>3}  {course_id}  {name}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
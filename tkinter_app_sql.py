@@ -5,24 +5,234 @@ from tkinter import ttk
 from tkinter import filedialog
 from tkinter import messagebox
 import sqlite3
+import sys
+import pathlib
+from contextlib import contextmanager
+
+import query_log
+from DDL_sql import create_tables
+from school_db import prefix_upper_bound
+import timetable
+import trigram_index
+
+class CourseCache(object):
+    """
+    In-process cache of the "course_id : name" labels shown in the course drop down lists. It is loaded once from the database
+    and then kept up to date by the functions that add, rename or delete courses, which report their change through :meth:`publish`.
+    Every subscribed callback receives the change so the widgets can update themselves without re-querying the courses table.
+
+    Args:
+        type rows: list of (str, str)
+        rows: the (course_id, name) pairs initially present in the database
+    """
+    def __init__(self, rows):
+        self.names = dict(rows) # course_id -> course name, kept in insertion order
+        self.subscribers = []
+
+    def label(self, course_id):
+        """
+        Returns the drop down label of a cached course
+        """
+        return course_id + " : " + self.names[course_id]
+
+    def labels(self):
+        """
+        Returns the drop down labels of all cached courses
+        """
+        return [self.label(x) for x in self.names]
+
+    def subscribe(self, callback):
+        """
+        Registers a function called as callback(event, old_label, new_label) after every change
+        """
+        self.subscribers.append(callback)
+
+    def publish(self, event, course_id, name=None):
+        """
+        Applies a change to the cache and notifies the subscribers
+
+        Args:
+            type event: str
+            event: "added", "renamed" or "removed"
+            type course_id: str
+            course_id: id of the changed course
+            type name: str
+            name: new name of the course, not needed when it is removed
+        """
+        old_label = self.label(course_id) if course_id in self.names else None
+        if event == "removed":
+            self.names.pop(course_id, None)
+            new_label = None
+        else:
+            self.names[course_id] = name
+            new_label = self.label(course_id)
+            if old_label == new_label:
+                return
+        for callback in self.subscribers:
+            callback(event, old_label, new_label)
+
+def courseBoxUpdater(box):
+    """
+    Builds a :class:`CourseCache` subscriber that edits the values of a course combobox in place
+
+    Args:
+        type box: ttk.Combobox
+        box: drop down list of courses to keep up to date
+    """
+    def update(event, old_label, new_label):
+        values = list(box['values'])
+        if event == "added":
+            values.append(new_label)
+        elif old_label in values:
+            if event == "renamed":
+                values[values.index(old_label)] = new_label
+            else:
+                values.remove(old_label)
+        box['values'] = values
+        if old_label is not None and box.get() == old_label: # the selected course changed
+            box.set(new_label if event == "renamed" else "")
+    return update
+
+# record type shown in the Edit and Delete drop down lists -> table and key column looked up by the autocompletion
+ID_TABLES = {
+    "Student Records": ("students", "student_id"),
+    "Instructor Records": ("instructors", "instructor_id"),
+    "Course Records": ("courses", "course_id"),
+}
+
+class IdCompleter(object):
+    """
+    Autocompletion of an ID text box: while the user types, the first IDs starting with the text of the box are listed in a popup under it.
+    Clicking a suggestion, or selecting it with the arrow keys and pressing Enter, copies it into the box; Escape closes the popup.
+
+    The suggestions are read with a range on the primary key (key >= prefix AND key < next prefix), which SQLite answers from the index of
+    the key in well under a millisecond whatever the number of records, so they are looked up again at every key stroke.
+
+    Args:
+        type box: Text
+        box: the one line ID box to complete
+        type source: callable
+        source: function returning the (table, key column) of the IDs to suggest, or None when no type of record is selected
+        type limit: int
+        limit: maximum number of suggestions shown
+    """
+    def __init__(self, box, source, limit=8):
+        self.box = box
+        self.source = source
+        self.limit = limit
+        self.popup = None
+        self.listbox = None
+        box.bind("<KeyRelease>", self.update, add="+")
+        box.bind("<Down>", self.focusList, add="+")
+        box.bind("<Return>", self.accept, add="+")
+        box.bind("<Escape>", lambda e: self.hide(), add="+")
+        box.bind("<FocusOut>", self.focusOut, add="+")
+
+    def suggestions(self, prefix):
+        """
+        Returns the first IDs of the current table starting with prefix, in order
+        """
+        source = self.source()
+        if source is None or not prefix:
+            return []
+        table, key = source
+        readCursor.execute("SELECT " + key + " FROM " + table + " WHERE " + key + " >= ? AND " + key + " < ? ORDER BY " + key + " LIMIT ?",
+                           (prefix, prefix_upper_bound(prefix), self.limit))
+        return [x[0] for x in readCursor.fetchall()]
+
+    def update(self, e):
+        if e.keysym in ("Down", "Up", "Return", "Escape", "Tab"):
+            return
+        values = self.suggestions(self.box.get(1.0, "end-1c").strip())
+        if not values:
+            self.hide()
+            return
+        if self.popup is None:
+            self.popup = Toplevel(self.box)
+            self.popup.overrideredirect(True) # no title bar
+            self.listbox = Listbox(self.popup, height=self.limit, exportselection=False)
+            self.listbox.pack(fill=BOTH, expand=True)
+            self.listbox.bind("<ButtonRelease-1>", self.accept)
+            self.listbox.bind("<Return>", self.accept)
+            self.listbox.bind("<Escape>", lambda e: self.hide())
+            self.listbox.bind("<FocusOut>", self.focusOut)
+        self.listbox.delete(0, END)
+        for x in values:
+            self.listbox.insert(END, x)
+        self.listbox.configure(height=len(values))
+        self.popup.geometry("+%d+%d" % (self.box.winfo_rootx(), self.box.winfo_rooty() + self.box.winfo_height()))
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def focusList(self, e):
+        if self.popup is not None and self.popup.winfo_viewable():
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, END)
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+            return "break"
+
+    def accept(self, e):
+        if self.popup is None or not self.popup.winfo_viewable():
+            return
+        selection = self.listbox.curselection()
+        if selection:
+            self.box.delete(1.0, END)
+            self.box.insert(1.0, self.listbox.get(selection[0]))
+        self.hide()
+        self.box.focus_set()
+        return "break" # Enter must not add a new line to the box
+
+    def focusOut(self, e):
+        # the box loses the focus when a suggestion is clicked, the popup must stay open for the click to be handled
+        if self.listbox is not None and self.box.winfo_containing(*self.box.winfo_pointerxy()) is self.listbox:
+            return
+        if e.widget is self.listbox and self.box.focus_get() is self.box:
+            return
+        self.hide()
+
+    def hide(self):
+        if self.popup is not None:
+            self.popup.withdraw()
+
+@contextmanager
+def readSnapshot():
+    """
+    Runs the reads of a with block in one transaction of the reader connection, so they all see the database as it was when the block started
+    even if registrations are committed in the meantime. Yields the reader cursor.
+    """
+    readConn.execute("BEGIN")
+    try:
+        yield readCursor
+    finally:
+        readConn.rollback()
 
 """
-Initializing the connection with the selected database, configuring the graphical user interface, getting a 
+Initializing the connection with the selected database (given on the command line or chosen in a dialog), configuring the graphical user interface, getting a 
 list of all the courses as it will be used in many places, and creating all the tabs of the application
 """
-conn = sqlite3.connect(filedialog.askopenfilename())
+databasePath = sys.argv[1] if len(sys.argv) > 1 else filedialog.askopenfilename()
+# single writer connection, used by every function that modifies the database
+conn = query_log.connect(databasePath) # records every statement, see query_log.py
 conn.execute("PRAGMA foreign_keys = ON;")
+# WAL lets the readers keep reading their snapshot while a writer commits, and the writer commit while a long read is running
+conn.execute("PRAGMA journal_mode = WAL;")
 
 cursor = conn.cursor()
+create_tables(conn) # only adds what is missing, e.g. the summary tables of the reports in older databases
+
+# read-only connection used by the display, search and lookup queries
+readConn = query_log.connect(pathlib.Path(databasePath).resolve().as_uri() + "?mode=ro", uri=True)
+readCursor = readConn.cursor()
 
 root = Tk()
 root.title("School Management System")
 root.geometry("640x350")
 root.configure(background="#c9c8c7")
 
-# list of already existing courses
-cursor.execute("SELECT course_id, name from courses")
-courses = [x[0] + " : " + x[1] for x in cursor.fetchall()] # will be used many times later
+# cache of already existing courses, it will be used many times later
+readCursor.execute("SELECT course_id, name from courses")
+courseCache = CourseCache(readCursor.fetchall())
 
 # setting up the tabs
 tabControl = ttk.Notebook(root)
@@ -34,6 +244,8 @@ displayTab = Frame(tabControl)
 searchTab = Frame(tabControl)
 editTab = Frame(tabControl)
 deleteTab = Frame(tabControl)
+reportsTab = Frame(tabControl)
+timetableTab = Frame(tabControl)
 tabControl.add(addStuffTab, text="Add")
 tabControl.add(registerCoursesTab, text="Register")
 tabControl.add(assignCoursesTab, text="Assign")
@@ -41,6 +253,8 @@ tabControl.add(displayTab, text="Display")
 tabControl.add(searchTab, text="Search")
 tabControl.add(editTab, text="Edit")
 tabControl.add(deleteTab, text="Delete")
+tabControl.add(reportsTab, text="Reports")
+tabControl.add(timetableTab, text="Timetable")
 tabControl.pack(expand=1, fill=BOTH)
 
 #Delete Records
@@ -87,10 +301,10 @@ def deleteRecord(id, category):
             if messagebox.askyesno("Delete Record", "Are you sure you want to delete this record"):
                 cursor.execute("DELETE FROM courses WHERE course_id=?", (id, ))
                 conn.commit()
+                courseCache.publish("removed", id)
     
     deleteIdBox.delete('1.0', "end")
-    treeview.delete(*treeview.get_children())
-    fillTreeview()
+    refreshTreeview()
     return
 
 def changeLabel2(e):
@@ -109,21 +323,27 @@ def changeLabel2(e):
     else:
         label2.config(text="Enter ID:")
 #frame in which we choose the type of record to modify (student, instructor, course)
-delete = Frame(deleteTab, height=30)
-delete.pack(side="top", padx=3,pady=5, fill=X)
-Label(delete, text="Edit:").pack(side="left", padx=3)
-deleteBox = ttk.Combobox(delete, values=["Student Records", "Instructor Records" , "Course Records"], width=30, state="readonly")
-deleteBox.pack(side="left")
-deleteBox.bind("<<ComboboxSelected>>", changeLabel2)
-
-#frame to search for specific record according to ID (must enter the full ID)
-searchFrame2 = Frame(deleteTab, height=30)
-searchFrame2.pack(side="top", padx=3,pady=5, fill=X)
-label2 = Label(searchFrame2, text="Enter ID:")
-label2.pack(side="left", padx=3)
-deleteIdBox = Text(searchFrame2, height=1, width=22)
-deleteIdBox.pack(side="left", padx=3)
-Button(searchFrame2, text="Delete", relief="raised", command=lambda: deleteRecord(deleteIdBox.get(1.0, "end-1c"), deleteBox.get())).pack(side="left")
+def buildDeleteTab():
+    """
+    Builds the widgets of the Delete tab
+    """
+    global delete, deleteBox, searchFrame2, label2, deleteIdBox
+    delete = Frame(deleteTab, height=30)
+    delete.pack(side="top", padx=3,pady=5, fill=X)
+    Label(delete, text="Edit:").pack(side="left", padx=3)
+    deleteBox = ttk.Combobox(delete, values=["Student Records", "Instructor Records" , "Course Records"], width=30, state="readonly")
+    deleteBox.pack(side="left")
+    deleteBox.bind("<<ComboboxSelected>>", changeLabel2)
+
+    #frame to search for specific record according to ID (must enter the full ID, suggested while typing)
+    searchFrame2 = Frame(deleteTab, height=30)
+    searchFrame2.pack(side="top", padx=3,pady=5, fill=X)
+    label2 = Label(searchFrame2, text="Enter ID:")
+    label2.pack(side="left", padx=3)
+    deleteIdBox = Text(searchFrame2, height=1, width=22)
+    deleteIdBox.pack(side="left", padx=3)
+    IdCompleter(deleteIdBox, lambda: ID_TABLES.get(deleteBox.get()))
+    Button(searchFrame2, text="Delete", relief="raised", command=lambda: deleteRecord(deleteIdBox.get(1.0, "end-1c"), deleteBox.get())).pack(side="left")
 
 
 #Edit Records
@@ -180,120 +400,121 @@ def lookFor(id, category):
 
     global object_to_modify, fields, toRemove
     
-    if category=="Student Records":
-        cursor.execute("SELECT * FROM students WHERE student_id=?", (id,))
-        record2 = cursor.fetchone()
-        if record2 is None:
-            messagebox.showerror("ERROR", "Student ID " + id + " does not exist!")
-            return
-        else:
-            object_to_modify = ("Student", id)
-            for widget in record.winfo_children():
-                widget.destroy()
-            toRemove = []
-            idFrame = Frame(record)
-            idFrame.pack(side="top", fill=X)
-            Label(idFrame, text="Student ID: "+id).pack(side="left") #ID cannot be changed
-
-            nameFrame = Frame(record)
-            nameFrame.pack(side="top", fill=X, pady=5)
-            Label(nameFrame, text="Student name: ").pack(side="left")
-            nameBox = Text(nameFrame, height=1, width=20)
-            nameBox.pack(side="left", padx=5)
-            nameBox.insert('1.0', record2[1])
-
-            ageFrame = Frame(record)
-            ageFrame.pack(side="top", fill=X, pady=5)
-            Label(ageFrame, text="Student age: ").pack(side="left")
-            ageBox = Text(ageFrame, height=1, width=20)
-            ageBox.pack(side="left", padx=5)
-            ageBox.insert('1.0', record2[2])
-
-            emailFrame = Frame(record)
-            emailFrame.pack(side="top", fill=X, pady=5)
-            Label(emailFrame, text="Student email: ").pack(side="left")
-            emailBox = Text(emailFrame, height=1, width=25)
-            emailBox.pack(side="left", padx=5)
-            emailBox.insert('1.0', record2[3])
-
-            cursor.execute("SELECT course_id FROM registered_courses WHERE student_id=?", (id,))
-            data = cursor.fetchall()
-            coursesFrame = Frame(record)
-            coursesFrame.pack(side="top", fill=X, pady=5)
-            Label(coursesFrame, text="Student courses: ").pack(side="left")
-            remainingCourses = ttk.Combobox(coursesFrame, values=[x[0] for x in data], width=30, state="readonly")
-            remainingCourses.pack(side="left", padx=5)
-            Button(coursesFrame, text="X", command=lambda:removeFromList(remainingCourses.get())).pack(side="left")
-            fields = [nameBox, ageBox, emailBox, remainingCourses]
+    with readSnapshot():
+        if category=="Student Records":
+            readCursor.execute("SELECT * FROM students WHERE student_id=?", (id,))
+            record2 = readCursor.fetchone()
+            if record2 is None:
+                messagebox.showerror("ERROR", "Student ID " + id + " does not exist!")
+                return
+            else:
+                object_to_modify = ("Student", id)
+                for widget in record.winfo_children():
+                    widget.destroy()
+                toRemove = []
+                idFrame = Frame(record)
+                idFrame.pack(side="top", fill=X)
+                Label(idFrame, text="Student ID: "+id).pack(side="left") #ID cannot be changed
+
+                nameFrame = Frame(record)
+                nameFrame.pack(side="top", fill=X, pady=5)
+                Label(nameFrame, text="Student name: ").pack(side="left")
+                nameBox = Text(nameFrame, height=1, width=20)
+                nameBox.pack(side="left", padx=5)
+                nameBox.insert('1.0', record2[1])
+
+                ageFrame = Frame(record)
+                ageFrame.pack(side="top", fill=X, pady=5)
+                Label(ageFrame, text="Student age: ").pack(side="left")
+                ageBox = Text(ageFrame, height=1, width=20)
+                ageBox.pack(side="left", padx=5)
+                ageBox.insert('1.0', record2[2])
+
+                emailFrame = Frame(record)
+                emailFrame.pack(side="top", fill=X, pady=5)
+                Label(emailFrame, text="Student email: ").pack(side="left")
+                emailBox = Text(emailFrame, height=1, width=25)
+                emailBox.pack(side="left", padx=5)
+                emailBox.insert('1.0', record2[3])
+
+                readCursor.execute("SELECT course_id FROM registered_courses WHERE student_id=?", (id,))
+                data = readCursor.fetchall()
+                coursesFrame = Frame(record)
+                coursesFrame.pack(side="top", fill=X, pady=5)
+                Label(coursesFrame, text="Student courses: ").pack(side="left")
+                remainingCourses = ttk.Combobox(coursesFrame, values=[x[0] for x in data], width=30, state="readonly")
+                remainingCourses.pack(side="left", padx=5)
+                Button(coursesFrame, text="X", command=lambda:removeFromList(remainingCourses.get())).pack(side="left")
+                fields = [nameBox, ageBox, emailBox, remainingCourses]
         
-    elif category == "Instructor Records":
-        cursor.execute("SELECT * FROM instructors WHERE instructor_id=?", (id,))
-        record2 = cursor.fetchone()
-        if record2 is None:
-            messagebox.showerror("ERROR", "Instructor ID " + id + " does not exist!")
-            return
-        else:
-            object_to_modify = ("Instructor", id)
-            for widget in record.winfo_children():
-                widget.destroy()
-
-            idFrame = Frame(record)
-            idFrame.pack(side="top", fill=X)
-            Label(idFrame, text="Instructor ID: "+id).pack(side="left") #ID cannot be changed
-
-            nameFrame = Frame(record)
-            nameFrame.pack(side="top", fill=X, pady=5)
-            Label(nameFrame, text="Instructor name: ").pack(side="left")
-            nameBox = Text(nameFrame, height=1, width=20)
-            nameBox.pack(side="left", padx=5)
-            nameBox.insert('1.0', record2[1])
-
-            ageFrame = Frame(record)
-            ageFrame.pack(side="top", fill=X, pady=5)
-            Label(ageFrame, text="Instructor age: ").pack(side="left")
-            ageBox = Text(ageFrame, height=1, width=20)
-            ageBox.pack(side="left", padx=5)
-            ageBox.insert('1.0', record2[2])
-
-            emailFrame = Frame(record)
-            emailFrame.pack(side="top", fill=X, pady=5)
-            Label(emailFrame, text="Instructor email: ").pack(side="left")
-            emailBox = Text(emailFrame, height=1, width=25)
-            emailBox.pack(side="left", padx=5)
-            emailBox.insert('1.0', record2[3])
-            fields = [nameBox, ageBox, emailBox]
-
-    elif category == "Course Records":
-        cursor.execute("SELECT * FROM courses WHERE course_id=?", (id,))
-        record2 = cursor.fetchone()
-        if record2 is None:
-            messagebox.showerror("ERROR", "Course ID " + id + " does not exist!")
-            return
-        else:
-            object_to_modify = ("Course", id, record2[2])
-
-            for widget in record.winfo_children():
-                widget.destroy()
-
-            idFrame = Frame(record)
-            idFrame.pack(side="top", fill=X)
-            Label(idFrame, text="Course ID: "+id).pack(side="left") #ID cannot be changed
-
-            nameFrame = Frame(record)
-            nameFrame.pack(side="top", fill=X, pady=5)
-            Label(nameFrame, text="Course name: ").pack(side="left")
-            nameBox = Text(nameFrame, height=1, width=20)
-            nameBox.pack(side="left", padx=5)
-            nameBox.insert('1.0', record2[1])
-
-            instructorFrame = Frame(record)
-            instructorFrame.pack(side="top", fill=X, pady=5)
-            Label(instructorFrame, text="Instructor ID: ").pack(side="left")
-            instructorBox = Text(instructorFrame, height=1, width=20)
-            instructorBox.pack(side="left", padx=5)
-            if record2[2] is not None:
-                instructorBox.insert('1.0', record2[2])
-            fields = [nameBox, instructorBox]
+        elif category == "Instructor Records":
+            readCursor.execute("SELECT * FROM instructors WHERE instructor_id=?", (id,))
+            record2 = readCursor.fetchone()
+            if record2 is None:
+                messagebox.showerror("ERROR", "Instructor ID " + id + " does not exist!")
+                return
+            else:
+                object_to_modify = ("Instructor", id)
+                for widget in record.winfo_children():
+                    widget.destroy()
+
+                idFrame = Frame(record)
+                idFrame.pack(side="top", fill=X)
+                Label(idFrame, text="Instructor ID: "+id).pack(side="left") #ID cannot be changed
+
+                nameFrame = Frame(record)
+                nameFrame.pack(side="top", fill=X, pady=5)
+                Label(nameFrame, text="Instructor name: ").pack(side="left")
+                nameBox = Text(nameFrame, height=1, width=20)
+                nameBox.pack(side="left", padx=5)
+                nameBox.insert('1.0', record2[1])
+
+                ageFrame = Frame(record)
+                ageFrame.pack(side="top", fill=X, pady=5)
+                Label(ageFrame, text="Instructor age: ").pack(side="left")
+                ageBox = Text(ageFrame, height=1, width=20)
+                ageBox.pack(side="left", padx=5)
+                ageBox.insert('1.0', record2[2])
+
+                emailFrame = Frame(record)
+                emailFrame.pack(side="top", fill=X, pady=5)
+                Label(emailFrame, text="Instructor email: ").pack(side="left")
+                emailBox = Text(emailFrame, height=1, width=25)
+                emailBox.pack(side="left", padx=5)
+                emailBox.insert('1.0', record2[3])
+                fields = [nameBox, ageBox, emailBox]
+
+        elif category == "Course Records":
+            readCursor.execute("SELECT * FROM courses WHERE course_id=?", (id,))
+            record2 = readCursor.fetchone()
+            if record2 is None:
+                messagebox.showerror("ERROR", "Course ID " + id + " does not exist!")
+                return
+            else:
+                object_to_modify = ("Course", id, record2[2])
+
+                for widget in record.winfo_children():
+                    widget.destroy()
+
+                idFrame = Frame(record)
+                idFrame.pack(side="top", fill=X)
+                Label(idFrame, text="Course ID: "+id).pack(side="left") #ID cannot be changed
+
+                nameFrame = Frame(record)
+                nameFrame.pack(side="top", fill=X, pady=5)
+                Label(nameFrame, text="Course name: ").pack(side="left")
+                nameBox = Text(nameFrame, height=1, width=20)
+                nameBox.pack(side="left", padx=5)
+                nameBox.insert('1.0', record2[1])
+
+                instructorFrame = Frame(record)
+                instructorFrame.pack(side="top", fill=X, pady=5)
+                Label(instructorFrame, text="Instructor ID: ").pack(side="left")
+                instructorBox = Text(instructorFrame, height=1, width=20)
+                instructorBox.pack(side="left", padx=5)
+                if record2[2] is not None:
+                    instructorBox.insert('1.0', record2[2])
+                fields = [nameBox, instructorBox]
     return
 
 def editAndSave():
@@ -312,12 +533,10 @@ def editAndSave():
         except:
             messagebox.showerror("ERROR", "Invalid data type! Age must be an integer!")
             return
+        # the update and the unregistrations are committed together
         cursor.execute("UPDATE students SET name=?, age=?, email=? WHERE student_id=?", (fields[0].get(1.0, 'end-1c'), int(fields[1].get(1.0, 'end-1c')), fields[2].get(1.0, 'end-1c'), object_to_modify[1],))
+        cursor.executemany("DELETE FROM registered_courses WHERE student_id=? AND course_id=?", [(object_to_modify[1], x) for x in toRemove])
         conn.commit()
-
-        for x in toRemove:
-            cursor.execute("DELETE FROM registered_courses WHERE student_id=? AND course_id=?", (object_to_modify[1], x,))
-            conn.commit()
     elif object_to_modify[0] == "Instructor":
         try:
             int(fields[1].get(1.0, 'end-1c'))
@@ -337,43 +556,51 @@ def editAndSave():
             messagebox.showerror("ERROR", "Instructor with ID " + fields[1].get(1.0, 'end-1c') + " does not exist! Course will be unassigned.")
             cursor.execute("UPDATE courses SET name=?, instructor_id=? WHERE course_id=?", (fields[0].get(1.0, 'end-1c'), None, object_to_modify[1]))
             conn.commit()
+        courseCache.publish("renamed", object_to_modify[1], fields[0].get(1.0, 'end-1c'))
         
     object_to_modify = None
     fields = None
     toRemove = []
     for widget in record.winfo_children():
         widget.destroy()
-    treeview.delete(*treeview.get_children())
-    fillTreeview()
+    refreshTreeview()
     return
 
-#frame in which we choose the type of record to modify (student, instructor, course)
-edit = Frame(editTab, height=30)
-edit.pack(side="top", padx=3,pady=5, fill=X)
-Label(edit, text="Edit:").pack(side="left", padx=3)
-editBox = ttk.Combobox(edit, values=["Student Records", "Instructor Records" , "Course Records"], width=30, state="readonly")
-editBox.pack(side="left")
-editBox.bind("<<ComboboxSelected>>", changeLabel)
+# record being edited, set by lookFor and cleared by editAndSave
 object_to_modify = None
 fields = None
 toRemove = []
 
-#frame to search for specific record according to ID (must enter the full ID)
-searchFrame = Frame(editTab, height=30)
-searchFrame.pack(side="top", padx=3,pady=5, fill=X)
-label = Label(searchFrame, text="Enter ID:")
-label.pack(side="left", padx=3)
-editIdBox = Text(searchFrame, height=1, width=22)
-editIdBox.pack(side="left", padx=3)
-Button(searchFrame, text="Search", relief="raised", command=lambda: lookFor(editIdBox.get(1.0, "end-1c"), editBox.get())).pack(side="left")
-
-#frame to display record information
-record = Frame(editTab, highlightbackground='black', highlightthickness=1)
-record.pack(side='top', padx=5, pady=5, fill=X)
-
-tempEdit = Frame(editTab)
-tempEdit.pack(side="top", fill=X)
-Button(tempEdit, text="Edit and Save", relief="raised", command=lambda:editAndSave()).pack(side="left", padx=5)
+#frame in which we choose the type of record to modify (student, instructor, course)
+def buildEditTab():
+    """
+    Builds the widgets of the Edit tab
+    """
+    global edit, editBox, searchFrame, label, editIdBox, record, tempEdit
+    edit = Frame(editTab, height=30)
+    edit.pack(side="top", padx=3,pady=5, fill=X)
+    Label(edit, text="Edit:").pack(side="left", padx=3)
+    editBox = ttk.Combobox(edit, values=["Student Records", "Instructor Records" , "Course Records"], width=30, state="readonly")
+    editBox.pack(side="left")
+    editBox.bind("<<ComboboxSelected>>", changeLabel)
+
+    #frame to search for specific record according to ID (must enter the full ID, suggested while typing)
+    searchFrame = Frame(editTab, height=30)
+    searchFrame.pack(side="top", padx=3,pady=5, fill=X)
+    label = Label(searchFrame, text="Enter ID:")
+    label.pack(side="left", padx=3)
+    editIdBox = Text(searchFrame, height=1, width=22)
+    editIdBox.pack(side="left", padx=3)
+    IdCompleter(editIdBox, lambda: ID_TABLES.get(editBox.get()))
+    Button(searchFrame, text="Search", relief="raised", command=lambda: lookFor(editIdBox.get(1.0, "end-1c"), editBox.get())).pack(side="left")
+
+    #frame to display record information
+    record = Frame(editTab, highlightbackground='black', highlightthickness=1)
+    record.pack(side='top', padx=5, pady=5, fill=X)
+
+    tempEdit = Frame(editTab)
+    tempEdit.pack(side="top", fill=X)
+    Button(tempEdit, text="Edit and Save", relief="raised", command=lambda:editAndSave()).pack(side="left", padx=5)
 
 #Search and Filter
 #function to change the filter according to the search category
@@ -405,7 +632,8 @@ def search(category, attribute, keyword):
         type attribute: str
         attribute: the filter used for searching, different options for each category
         type keyword: str
-        keyword: keyword to be looked for in the specified table. We search for the records where the field contains the keyword but is not necessarilly equal to it
+        keyword: keyword to be looked for in the specified table. We search for the records where the field contains the keyword but is not necessarilly equal to it.
+        When the Fuzzy box is checked, names and emails close to the keyword are found too (typos included), the closest first
 
     Returns:
         :return: none  
@@ -415,53 +643,64 @@ def search(category, attribute, keyword):
     rows = []
     if category == "":
         messagebox.showerror("ERROR", "No category selected!")
+    elif fuzzy.get() and attribute in ("Name", "Email"): #typo tolerant search with the trigram index, closest records first
+        kind = category[:-1].lower()
+        spec = trigram_index.TKINTER[kind]
+        if category == "Courses":
+            rows.append(("Course ID", "Course Name", "Instructor"))
+        else:
+            rows.append(("ID", "Name", "Age", "Email"))
+        with readSnapshot():
+            for _, _, key, _ in trigram_index.search(readConn, trigram_index.TKINTER, keyword, kinds=[kind], fields=[attribute.lower()]):
+                readCursor.execute(f"SELECT * FROM {spec['table']} WHERE {spec['key']}=?", (key,))
+                rows.append(readCursor.fetchone())
     elif category=="Students": #searching among students records
         rows.append(("ID", "Name", "Age", "Email"))
         if attribute=="Name":
-            cursor.execute("SELECT * FROM students WHERE name LIKE ?", (f'%{keyword}%',))
+            readCursor.execute("SELECT * FROM students WHERE name LIKE ?", (f'%{keyword}%',))
         elif attribute=="ID":
-            cursor.execute("SELECT * FROM students WHERE student_id LIKE ?", (f'%{keyword}%',))
+            readCursor.execute("SELECT * FROM students WHERE student_id LIKE ?", (f'%{keyword}%',))
         elif attribute=="Email":
-            cursor.execute("SELECT * FROM students WHERE email LIKE ?", (f'%{keyword}%',))
+            readCursor.execute("SELECT * FROM students WHERE email LIKE ?", (f'%{keyword}%',))
         elif attribute=="Age":
             try:
                 keyword = int(keyword)
-                cursor.execute("SELECT * FROM students WHERE age=?", (keyword,))
+                readCursor.execute("SELECT * FROM students WHERE age=?", (keyword,))
             except:
                 messagebox.showerror("ERROR", "Invalid data type passed! Must be integer!")
                 return
         elif attribute=="Course enrolled":
-            cursor.execute("SELECT DISTINCT students.student_id, students.name, students.age, students.email FROM students JOIN registered_courses ON students.student_id = registered_courses.student_id WHERE registered_courses.course_id LIKE ?", (f'%{keyword}%',))
-        for x in cursor.fetchall():
+            readCursor.execute("SELECT DISTINCT students.student_id, students.name, students.age, students.email FROM students JOIN registered_courses ON students.student_id = registered_courses.student_id WHERE registered_courses.course_id LIKE ?", (f'%{keyword}%',))
+        for x in readCursor.fetchall():
             rows.append(x)
             
     elif category=="Instructors": #searching among instructor records
         rows.append(("ID", "Name", "Age", "Email"))
         if attribute=="Name":
-            cursor.execute("SELECT * FROM instructors WHERE name LIKE ?", (f'%{keyword}%',))
+            readCursor.execute("SELECT * FROM instructors WHERE name LIKE ?", (f'%{keyword}%',))
         elif attribute=="ID":
-            cursor.execute("SELECT * FROM instructors WHERE instructor_id LIKE ?", (f'%{keyword}%',))
+            readCursor.execute("SELECT * FROM instructors WHERE instructor_id LIKE ?", (f'%{keyword}%',))
         elif attribute=="Email":
-            cursor.execute("SELECT * FROM instructors WHERE email LIKE ?", (f'%{keyword}%',))
+            readCursor.execute("SELECT * FROM instructors WHERE email LIKE ?", (f'%{keyword}%',))
         elif attribute=="Age":
             try:
                 keyword = int(keyword)
-                cursor.execute("SELECT * FROM instructors WHERE age=?", (keyword,))
+                readCursor.execute("SELECT * FROM instructors WHERE age=?", (keyword,))
             except:
                 messagebox.showerror("ERROR", "Invalid data type passed! Must be integer!")
                 return
-        for x in cursor.fetchall():
+        for x in readCursor.fetchall():
             rows.append(x)
 
     elif category=="Courses": #searching among courses records
         rows.append(("Course ID", "Course Name", "Instructor"))
         if attribute=="Name":
-            cursor.execute("SELECT * FROM courses WHERE name LIKE ?", (f'%{keyword}%',))
+            readCursor.execute("SELECT * FROM courses WHERE name LIKE ?", (f'%{keyword}%',))
         elif attribute=="ID":
-            cursor.execute("SELECT * FROM courses WHERE course_id LIKE ?", (f'%{keyword}%',))
+            readCursor.execute("SELECT * FROM courses WHERE course_id LIKE ?", (f'%{keyword}%',))
         elif attribute=="Instructor":
-            cursor.execute("SELECT courses.course_id, courses.name, instructors.name FROM courses JOIN instructors ON instructors.instructor_id=courses.instructor_id WHERE instructors.name LIKE ?", (f'%{keyword}%',))
-        for x in cursor.fetchall():
+            readCursor.execute("SELECT courses.course_id, courses.name, instructors.name FROM courses JOIN instructors ON instructors.instructor_id=courses.instructor_id WHERE instructors.name LIKE ?", (f'%{keyword}%',))
+        for x in readCursor.fetchall():
             rows.append(x)
     
     for widget in results.winfo_children(): #deleting all the previously displayed rows
@@ -482,39 +721,47 @@ def search(category, attribute, keyword):
     
 
 #Choosing whether to search in students, instructors, or courses records
-categories = Frame(searchTab, height=30)
-categories.pack(side="top", padx=3,pady=5, fill=X)
-Label(categories, text="Search by:").pack(side="left", padx=3)
-categoryBox = ttk.Combobox(categories, values=["Students", "Instructors" , "Courses"], width=30, state="readonly")
-categoryBox.pack(side="left")
-categoryBox.bind("<<ComboboxSelected>>", changeFilters)
-
-#Filtering data according to specific attributes for each entity
-attributes = Frame(searchTab, height=30, highlightbackground='black', highlightthickness=1)
-attributes.pack(side="top", padx=3, pady=5, fill=X)
-Label(attributes, text="Filter by:").pack(side="left", padx=3, pady=5)
-attributesBox = ttk.Combobox(attributes, values=[], width=30, state="readonly")
-attributesBox.pack(side="left", pady=5)
-Label(attributes, text="Keyword:").pack(side="left", padx=3)
-keyword = Text(attributes, height=1, width=22)
-keyword.pack(side="left", pady=5)
-Button(attributes, text="Search", width=10, relief="raised", command=lambda: search(categoryBox.get(), attributesBox.get(), keyword.get(1.0, "end-1c"))).pack(side="left", padx=3, pady=5)
-
-#creating a scrollable area to display the search results
-def on_frame_configure(event):
-    # Reset the scroll region to encompass the inner frame
-    canvas.configure(scrollregion=canvas.bbox("all"))
-resultFrame = Frame(searchTab, width=440, height=30, highlightbackground='black', highlightthickness=1)
-resultFrame.pack(side="top", fill=BOTH, expand=True, padx=3, pady=5)
-canvas = Canvas(resultFrame)
-canvas.pack(side="left", fill=BOTH, expand=True)
-scrollbar = Scrollbar(resultFrame, orient=VERTICAL, command=canvas.yview)
-scrollbar.pack(side="right", fill=Y)
-canvas.configure(yscrollcommand=scrollbar.set)
-
-results = Frame(canvas, width=590)
-canvas.create_window((0, 0), window=results, anchor="nw")
-results.bind("<Configure>", on_frame_configure)
+def buildSearchTab():
+    """
+    Builds the widgets of the Search tab
+    """
+    global categories, categoryBox, attributes, attributesBox, keyword, fuzzy, resultFrame, canvas, scrollbar, results
+    categories = Frame(searchTab, height=30)
+    categories.pack(side="top", padx=3,pady=5, fill=X)
+    Label(categories, text="Search by:").pack(side="left", padx=3)
+    categoryBox = ttk.Combobox(categories, values=["Students", "Instructors" , "Courses"], width=30, state="readonly")
+    categoryBox.pack(side="left")
+    categoryBox.bind("<<ComboboxSelected>>", changeFilters)
+
+    #Filtering data according to specific attributes for each entity
+    attributes = Frame(searchTab, height=30, highlightbackground='black', highlightthickness=1)
+    attributes.pack(side="top", padx=3, pady=5, fill=X)
+    Label(attributes, text="Filter by:").pack(side="left", padx=3, pady=5)
+    attributesBox = ttk.Combobox(attributes, values=[], width=30, state="readonly")
+    attributesBox.pack(side="left", pady=5)
+    Label(attributes, text="Keyword:").pack(side="left", padx=3)
+    keyword = Text(attributes, height=1, width=22)
+    keyword.pack(side="left", pady=5)
+    Button(attributes, text="Search", width=10, relief="raised", command=lambda: search(categoryBox.get(), attributesBox.get(), keyword.get(1.0, "end-1c"))).pack(side="left", padx=3, pady=5)
+    #typo tolerant search, only for the names and emails
+    fuzzy = IntVar()
+    Checkbutton(attributes, text="Fuzzy", variable=fuzzy).pack(side="left", padx=3, pady=5)
+
+    #creating a scrollable area to display the search results
+    def on_frame_configure(event):
+        # Reset the scroll region to encompass the inner frame
+        canvas.configure(scrollregion=canvas.bbox("all"))
+    resultFrame = Frame(searchTab, width=440, height=30, highlightbackground='black', highlightthickness=1)
+    resultFrame.pack(side="top", fill=BOTH, expand=True, padx=3, pady=5)
+    canvas = Canvas(resultFrame)
+    canvas.pack(side="left", fill=BOTH, expand=True)
+    scrollbar = Scrollbar(resultFrame, orient=VERTICAL, command=canvas.yview)
+    scrollbar.pack(side="right", fill=Y)
+    canvas.configure(yscrollcommand=scrollbar.set)
+
+    results = Frame(canvas, width=590)
+    canvas.create_window((0, 0), window=results, anchor="nw")
+    results.bind("<Configure>", on_frame_configure)
 
 #Displaying all records in a treeview
 def fillTreeview(): # this function can be used to reset the treeview when data is added/modified
@@ -524,50 +771,76 @@ def fillTreeview(): # this function can be used to reset the treeview when data
     Returns:
         :return: none
     """
-    students = treeview.insert("", END, text="Students") #adding all students info
-    cursor.execute("SELECT * FROM students")
-    for x in cursor.fetchall():
-        temp_row = treeview.insert(students, END, text=x[0]) #show ids first as they are unique to each student
-        treeview.insert(temp_row, END, text="Name: "+ x[1]) #student's name
-        treeview.insert(temp_row, END, text="Age: "+ str(x[2])) #student's age
-        treeview.insert(temp_row, END, text="Email: "+ x[3]) #student's email
-        cursor.execute("SELECT course_id FROM registered_courses WHERE student_id=?", (x[0],))
-        coursesRegistered = treeview.insert(temp_row, END, text="Registered Courses") #student's courses
-        for y in cursor.fetchall():
-            treeview.insert(coursesRegistered, END, text=y[0])
-
-    instructors = treeview.insert("", END, text="Instructors")
-    cursor.execute("SELECT * FROM instructors")
-    for z in cursor.fetchall():
-        temp_row2 = treeview.insert(instructors, END, text=z[0]) #show ids first as they are unique to each instructor
-        treeview.insert(temp_row2, END, text="Name: "+ z[1]) #instructor's name
-        treeview.insert(temp_row2, END, text="Age: "+ str(z[2])) #instructor's age
-        treeview.insert(temp_row2, END, text="Email: "+ z[3]) #instructor's email
-        coursesAssigned = treeview.insert(temp_row2, END, text="Assigned Courses") #instructor's courses
-        cursor.execute("SELECT course_id FROM courses WHERE instructor_id=?", (z[0], ))
-        for t in cursor.fetchall():
-            treeview.insert(coursesAssigned, END, text=t[0])
-
-    courses = treeview.insert("", END, text="Courses")
-    cursor.execute("SELECT courses.course_id, courses.name, courses.instructor_id, instructors.name FROM courses LEFT JOIN instructors ON courses.instructor_id=instructors.instructor_id")
-    for s in cursor.fetchall(): 
-        temp_row3 = treeview.insert(courses, END, text=s[0]) #show course ID first as it should be unique
-        treeview.insert(temp_row3, END, text="Name: " + s[1]) # course name
-        if s[2] is not None:
-            treeview.insert(temp_row3, END, text="Instructor ID: " + s[2]) # course instructor ID
-            treeview.insert(temp_row3, END, text="Instructor Name: " + s[3]) # course instructor name
-        else:
-            treeview.insert(temp_row3, END, text="Instructor ID: TBA")
-            treeview.insert(temp_row3, END, text="Instructor Name: TBA")
+    with readSnapshot():
+        students = treeview.insert("", END, text="Students") #adding all students info
+        readCursor.execute("SELECT * FROM students")
+        for x in readCursor.fetchall():
+            temp_row = treeview.insert(students, END, text=x[0]) #show ids first as they are unique to each student
+            treeview.insert(temp_row, END, text="Name: "+ x[1]) #student's name
+            treeview.insert(temp_row, END, text="Age: "+ str(x[2])) #student's age
+            treeview.insert(temp_row, END, text="Email: "+ x[3]) #student's email
+            readCursor.execute("SELECT course_id FROM registered_courses WHERE student_id=?", (x[0],))
+            coursesRegistered = treeview.insert(temp_row, END, text="Registered Courses") #student's courses
+            for y in readCursor.fetchall():
+                treeview.insert(coursesRegistered, END, text=y[0])
+
+        instructors = treeview.insert("", END, text="Instructors")
+        readCursor.execute("SELECT * FROM instructors")
+        for z in readCursor.fetchall():
+            temp_row2 = treeview.insert(instructors, END, text=z[0]) #show ids first as they are unique to each instructor
+            treeview.insert(temp_row2, END, text="Name: "+ z[1]) #instructor's name
+            treeview.insert(temp_row2, END, text="Age: "+ str(z[2])) #instructor's age
+            treeview.insert(temp_row2, END, text="Email: "+ z[3]) #instructor's email
+            coursesAssigned = treeview.insert(temp_row2, END, text="Assigned Courses") #instructor's courses
+            readCursor.execute("SELECT course_id FROM courses WHERE instructor_id=?", (z[0], ))
+            for t in readCursor.fetchall():
+                treeview.insert(coursesAssigned, END, text=t[0])
+
+        courses = treeview.insert("", END, text="Courses")
+        readCursor.execute("SELECT courses.course_id, courses.name, courses.instructor_id, instructors.name FROM courses LEFT JOIN instructors ON courses.instructor_id=instructors.instructor_id")
+        for s in readCursor.fetchall(): 
+            temp_row3 = treeview.insert(courses, END, text=s[0]) #show course ID first as it should be unique
+            treeview.insert(temp_row3, END, text="Name: " + s[1]) # course name
+            if s[2] is not None:
+                treeview.insert(temp_row3, END, text="Instructor ID: " + s[2]) # course instructor ID
+                treeview.insert(temp_row3, END, text="Instructor Name: " + s[3]) # course instructor name
+            else:
+                treeview.insert(temp_row3, END, text="Instructor ID: TBA")
+                treeview.insert(temp_row3, END, text="Instructor Name: TBA")
         
-        enrolledStudents = treeview.insert(temp_row3, END, text="Enrolled students")
-        cursor.execute("SELECT student_id FROM registered_courses WHERE course_id=?", (s[0],))
-        for i in cursor.fetchall():
-            treeview.insert(enrolledStudents, END, text=i[0])
-    treeview.pack(fill=BOTH, expand=True)
+            enrolledStudents = treeview.insert(temp_row3, END, text="Enrolled students")
+            readCursor.execute("SELECT student_id FROM registered_courses WHERE course_id=?", (s[0],))
+            for i in readCursor.fetchall():
+                treeview.insert(enrolledStudents, END, text=i[0])
+        treeview.pack(fill=BOTH, expand=True)
 
-treeview = ttk.Treeview(displayTab) #creating the treeview
-fillTreeview()
+def buildDisplayTab():
+    """
+    Builds the treeview of the Display tab and fills it
+    """
+    global treeview, treeviewStale
+    treeview = ttk.Treeview(displayTab) #creating the treeview
+    fillTreeview()
+    treeviewStale = False
+
+treeview = None # built on the first visit of the Display tab
+treeviewStale = False # True when the database changed while the Display tab was hidden
+
+def refreshTreeview():
+    """
+    Reloads the treeview after a change of the database. Filling it reads every record, so when the Display tab is not shown
+    the treeview is only marked as stale and reloaded the next time the tab is selected.
+    
+    Returns:
+        :return: none
+    """
+    global treeviewStale
+    if treeview is not None and tabControl.select() == str(displayTab):
+        treeview.delete(*treeview.get_children())
+        fillTreeview()
+        treeviewStale = False
+    else:
+        treeviewStale = True
 
 #Assign courses to instructors
 def assign(instructor_id, course):
@@ -599,21 +872,27 @@ def assign(instructor_id, course):
         return
 
     coursesBox.set("")
-    treeview.delete(*treeview.get_children())
-    fillTreeview()        
+    refreshTreeview()
     return
 
-top_box = Frame(assignCoursesTab, width=440, height=30, relief='raised', highlightbackground='black', highlightthickness=1)
-top_box.pack(side="top", padx=3,pady=3, fill=X)
-Label(top_box, text="Enter your instructor ID: ").pack(side="left", padx=5)
-IDbox_instructors = Text(top_box, height=1, width=15) # box for instructor ID
-IDbox_instructors.pack(side="left", padx=2, pady=2)
-
-top_box2 = Frame(assignCoursesTab, width=440, height=30) # frame for drop down list and asssign button
-top_box2.pack(side="top", padx=3,pady=3, fill=X)
-coursesBox = ttk.Combobox(top_box2, values=courses, width=30, state="readonly") #drop down list of courses
-coursesBox.pack(side="left", padx=8)
-Button(top_box2, text="Assign Course", relief="raised", command=lambda: assign(IDbox_instructors.get(1.0, "end-1c"), coursesBox.get())).pack(side="left")
+def buildAssignTab():
+    """
+    Builds the widgets of the Assign tab
+    """
+    global top_box, IDbox_instructors, top_box2, coursesBox
+    top_box = Frame(assignCoursesTab, width=440, height=30, relief='raised', highlightbackground='black', highlightthickness=1)
+    top_box.pack(side="top", padx=3,pady=3, fill=X)
+    Label(top_box, text="Enter your instructor ID: ").pack(side="left", padx=5)
+    IDbox_instructors = Text(top_box, height=1, width=15) # box for instructor ID
+    IDbox_instructors.pack(side="left", padx=2, pady=2)
+    IdCompleter(IDbox_instructors, lambda: ID_TABLES["Instructor Records"])
+
+    top_box2 = Frame(assignCoursesTab, width=440, height=30) # frame for drop down list and asssign button
+    top_box2.pack(side="top", padx=3,pady=3, fill=X)
+    coursesBox = ttk.Combobox(top_box2, values=courseCache.labels(), width=30, state="readonly") #drop down list of courses
+    coursesBox.pack(side="left", padx=8)
+    courseCache.subscribe(courseBoxUpdater(coursesBox))
+    Button(top_box2, text="Assign Course", relief="raised", command=lambda: assign(IDbox_instructors.get(1.0, "end-1c"), coursesBox.get())).pack(side="left")
 
 #Register courses for students
 def register(student_id, course):
@@ -642,22 +921,28 @@ def register(student_id, course):
         return
     
     courseBox.set("")
-    treeview.delete(*treeview.get_children())
-    fillTreeview()
+    refreshTreeview()
     return
 
 #input box for user ID. We assume that user's ID are unique and enough to distinguish between students
-temp = Frame(registerCoursesTab, width=440, height=30, relief='raised', highlightbackground='black', highlightthickness=1)
-temp.pack(side="top", padx=3,pady=3, fill=X)
-Label(temp, text="Enter your student ID: ").pack(side="left", padx=5)
-IDbox = Text(temp, height=1, width=15) # box for student ID
-IDbox.pack(side="left", padx=2, pady=2)
-
-temp2 = Frame(registerCoursesTab, width=440, height=30) # frame for drop down list and register button
-temp2.pack(side="top", padx=3,pady=3, fill=X)
-courseBox = ttk.Combobox(temp2, values=courses, width=30, state="readonly") #drop down list of courses
-courseBox.pack(side="left", padx=8)
-Button(temp2, text="Register Course", relief="raised", command=lambda: register(IDbox.get(1.0, "end-1c"), courseBox.get())).pack(side="left")
+def buildRegisterTab():
+    """
+    Builds the widgets of the Register tab
+    """
+    global temp, IDbox, temp2, courseBox
+    temp = Frame(registerCoursesTab, width=440, height=30, relief='raised', highlightbackground='black', highlightthickness=1)
+    temp.pack(side="top", padx=3,pady=3, fill=X)
+    Label(temp, text="Enter your student ID: ").pack(side="left", padx=5)
+    IDbox = Text(temp, height=1, width=15) # box for student ID
+    IDbox.pack(side="left", padx=2, pady=2)
+    IdCompleter(IDbox, lambda: ID_TABLES["Student Records"])
+
+    temp2 = Frame(registerCoursesTab, width=440, height=30) # frame for drop down list and register button
+    temp2.pack(side="top", padx=3,pady=3, fill=X)
+    courseBox = ttk.Combobox(temp2, values=courseCache.labels(), width=30, state="readonly") #drop down list of courses
+    courseBox.pack(side="left", padx=8)
+    courseCache.subscribe(courseBoxUpdater(courseBox))
+    Button(temp2, text="Register Course", relief="raised", command=lambda: register(IDbox.get(1.0, "end-1c"), courseBox.get())).pack(side="left")
 
 #Adding students, instructors, and courses tab
 def add_something(something):
@@ -727,80 +1012,186 @@ def add_something(something):
             return
         
         # updating the list of courses presented in other tabs
-        courses.append(cID.get(1.0, "end-1c") + " : " + cName.get(1.0, "end-1c"))
-        courseBox['values'] = courses
-        coursesBox['values'] = courses
-        coursesBox.set("")
-        courseBox.set("")
+        courseCache.publish("added", cID.get(1.0, "end-1c"), cName.get(1.0, "end-1c"))
         # clearing the input boxes
         cID.delete('1.0', "end")
         cName.delete('1.0', "end")
     conn.commit()
-    treeview.delete(*treeview.get_children())
-    fillTreeview()
+    refreshTreeview()
     return
 
-frame1 = Frame(addStuffTab, width=145, height=330, relief='raised', highlightbackground='black', highlightthickness=2)
-frame2 = Frame(addStuffTab, width=145, height=330, relief='raised', highlightbackground='black', highlightthickness=2)
-frame3 = Frame(addStuffTab, width=145, height=330, relief='raised', highlightbackground='black', highlightthickness=2)
+def buildAddTab():
+    """
+    Builds the widgets of the Add tab
+    """
+    global frame1, frame2, frame3, sID, sName, sAge, sEmail, iID, iName, iAge, iEmail, cID, cName
+    frame1 = Frame(addStuffTab, width=145, height=330, relief='raised', highlightbackground='black', highlightthickness=2)
+    frame2 = Frame(addStuffTab, width=145, height=330, relief='raised', highlightbackground='black', highlightthickness=2)
+    frame3 = Frame(addStuffTab, width=145, height=330, relief='raised', highlightbackground='black', highlightthickness=2)
+
+    frame1.pack(side="left", fill=BOTH, expand=True, padx=5, pady=5)
+    frame2.pack(side="left", fill=BOTH, expand=True, padx=5, pady=5)
+    frame3.pack(side="left", fill=BOTH, expand=True, padx=5, pady=5)
 
-frame1.pack(side="left", fill=BOTH, expand=True, padx=5, pady=5)
-frame2.pack(side="left", fill=BOTH, expand=True, padx=5, pady=5)
-frame3.pack(side="left", fill=BOTH, expand=True, padx=5, pady=5)
+    #Student frame
+    Label(frame1, text="Student info").pack(side="top",pady=5)
 
-#Student frame
-Label(frame1, text="Student info").pack(side="top",pady=5)
+    Label(frame1, text="Enter student ID:").pack(side="top", fill=X)
+    sID = Text(frame1, height=1, width=16)
+    sID.pack(side="top", padx=2, pady=2)
 
-Label(frame1, text="Enter student ID:").pack(side="top", fill=X)
-sID = Text(frame1, height=1, width=16)
-sID.pack(side="top", padx=2, pady=2)
+    Label(frame1, text="Enter student name:").pack(side="top", fill=X)
+    sName = Text(frame1, height=1, width=16)
+    sName.pack(side="top", padx=2, pady=2)
 
-Label(frame1, text="Enter student name:").pack(side="top", fill=X)
-sName = Text(frame1, height=1, width=16)
-sName.pack(side="top", padx=2, pady=2)
+    Label(frame1, text="Enter student age:").pack(side="top", fill=X)
+    sAge = Text(frame1, height=1, width=16)
+    sAge.pack(side="top", padx=2, pady=2)
 
-Label(frame1, text="Enter student age:").pack(side="top", fill=X)
-sAge = Text(frame1, height=1, width=16)
-sAge.pack(side="top", padx=2, pady=2)
+    Label(frame1, text="Enter student email:").pack(side="top", fill=X)
+    sEmail = Text(frame1, height=1, width=16)
+    sEmail.pack(side="top", padx=2, pady=5)
 
-Label(frame1, text="Enter student email:").pack(side="top", fill=X)
-sEmail = Text(frame1, height=1, width=16)
-sEmail.pack(side="top", padx=2, pady=5)
+    Button(frame1, text="Add student", relief="raised", command=lambda: add_something("student")).pack(side="bottom", pady=15)
 
-Button(frame1, text="Add student", relief="raised", command=lambda: add_something("student")).pack(side="bottom", pady=15)
+    #Instructor frame
+    Label(frame2, text="Instructor info").pack(side="top", pady=5)
 
-#Instructor frame
-Label(frame2, text="Instructor info").pack(side="top", pady=5)
+    Label(frame2, text="Enter instructor ID:").pack(side="top", fill=X)
+    iID = Text(frame2, height=1, width=16)
+    iID.pack(side="top", padx=2, pady=2)
 
-Label(frame2, text="Enter instructor ID:").pack(side="top", fill=X)
-iID = Text(frame2, height=1, width=16)
-iID.pack(side="top", padx=2, pady=2)
+    Label(frame2, text="Enter instructor name:").pack(side="top", fill=X)
+    iName = Text(frame2, height=1, width=16)
+    iName.pack(side="top", padx=2, pady=2)
 
-Label(frame2, text="Enter instructor name:").pack(side="top", fill=X)
-iName = Text(frame2, height=1, width=16)
-iName.pack(side="top", padx=2, pady=2)
+    Label(frame2, text="Enter instructor age:").pack(side="top", fill=X)
+    iAge = Text(frame2, height=1, width=16)
+    iAge.pack(side="top", padx=2, pady=2)
 
-Label(frame2, text="Enter instructor age:").pack(side="top", fill=X)
-iAge = Text(frame2, height=1, width=16)
-iAge.pack(side="top", padx=2, pady=2)
+    Label(frame2, text="Enter instructor email:").pack(side="top", fill=X)
+    iEmail = Text(frame2, height=1, width=16)
+    iEmail.pack(side="top", padx=2, pady=5)
 
-Label(frame2, text="Enter instructor email:").pack(side="top", fill=X)
-iEmail = Text(frame2, height=1, width=16)
-iEmail.pack(side="top", padx=2, pady=5)
+    Button(frame2, text="Add instructor", relief="raised", command=lambda: add_something("instructor")).pack(side="bottom", pady=15)
 
-Button(frame2, text="Add instructor", relief="raised", command=lambda: add_something("instructor")).pack(side="bottom", pady=15)
+    #Course frame
+    Label(frame3, text="Course info").pack(side="top", pady=5)
 
-#Course frame
-Label(frame3, text="Course info").pack(side="top", pady=5)
+    Label(frame3, text="Enter course ID:").pack(side="top", fill=X)
+    cID = Text(frame3, height=1, width=16)
+    cID.pack(side="top", padx=2, pady=2)
 
-Label(frame3, text="Enter course ID:").pack(side="top", fill=X)
-cID = Text(frame3, height=1, width=16)
-cID.pack(side="top", padx=2, pady=2)
+    Label(frame3, text="Enter course name:").pack(side="top", fill=X)
+    cName = Text(frame3, height=1, width=16)
+    cName.pack(side="top", padx=2, pady=2)
 
-Label(frame3, text="Enter course name:").pack(side="top", fill=X)
-cName = Text(frame3, height=1, width=16)
-cName.pack(side="top", padx=2, pady=2)
+    Button(frame3, text="Add course", relief="raised", command=lambda: add_something("course")).pack(side="bottom", pady=15)
 
-Button(frame3, text="Add course", relief="raised", command=lambda: add_something("course")).pack(side="bottom", pady=15)
+#Reports
+def fillReports():
+    """
+    Fills the reports with the counters of the summary tables, which the database keeps up to date with triggers,
+    so no registration has to be counted
+    
+    Returns:
+        :return: none
+    """
+    reports.delete(*reports.get_children())
+    with readSnapshot():
+        courses = reports.insert("", END, text="Students per course", open=True)
+        readCursor.execute("SELECT courses.course_id, courses.name, counts.students FROM course_enrollment_counts counts JOIN courses ON courses.course_id=counts.course_id ORDER BY courses.course_id")
+        for x in readCursor.fetchall():
+            reports.insert(courses, END, text=x[0] + " : " + x[1], values=(x[2],))
+
+        instructors = reports.insert("", END, text="Courses per instructor", open=True)
+        readCursor.execute("SELECT instructors.instructor_id, instructors.name, loads.courses FROM instructor_course_load loads JOIN instructors ON instructors.instructor_id=loads.instructor_id ORDER BY instructors.instructor_id")
+        for x in readCursor.fetchall():
+            reports.insert(instructors, END, text=x[0] + " : " + x[1], values=(x[2],))
+
+        readCursor.execute("SELECT students.student_id, students.name FROM student_course_counts counts JOIN students ON students.student_id=counts.student_id WHERE counts.courses=0 ORDER BY students.student_id")
+        rows = readCursor.fetchall()
+        students = reports.insert("", END, text="Students without courses", values=(len(rows),))
+        for x in rows:
+            reports.insert(students, END, text=x[0] + " : " + x[1])
+
+def buildReportsTab():
+    """
+    Builds the tree of the Reports tab and fills it
+    """
+    global reports
+    reports = ttk.Treeview(reportsTab, columns=("count",))
+    reports.heading("#0", text="Record")
+    reports.heading("count", text="Count")
+    reports.column("count", width=80, anchor="e")
+    Button(reportsTab, text="Refresh", relief="raised", command=fillReports).pack(side="bottom", pady=3)
+    reports.pack(fill=BOTH, expand=True)
+    fillReports()
+
+#Timetable
+def generateTimetable():
+    """
+    Gives every course a time slot in which none of its students has another course, then shows the new timetable
+    
+    Returns:
+        :return: none
+    """
+    slots = timetable.generate(conn, timetable.TKINTER)
+    messagebox.showinfo("Timetable", str(slots) + " time slots are needed so that no student has two courses at the same time.")
+    fillTimetable()
+
+def fillTimetable():
+    """
+    Shows the courses of the last generated timetable grouped by time slot
+    
+    Returns:
+        :return: none
+    """
+    slots.delete(*slots.get_children())
+    with readSnapshot():
+        parent = None
+        for x in timetable.fetch(readConn, timetable.TKINTER):
+            if parent is None or slots.item(parent, "text") != "Slot " + str(x[0] + 1):
+                parent = slots.insert("", END, text="Slot " + str(x[0] + 1), open=True)
+            slots.insert(parent, END, text=x[1] + " : " + x[2])
+
+def buildTimetableTab():
+    """
+    Builds the widgets of the Timetable tab and shows the current timetable
+    """
+    global slots
+    Button(timetableTab, text="Generate timetable", relief="raised", command=generateTimetable).pack(side="bottom", pady=3)
+    slots = ttk.Treeview(timetableTab)
+    slots.pack(fill=BOTH, expand=True)
+    fillTimetable()
+
+# widgets of each tab, built the first time the tab is selected so the window shows up before the records are read
+tabBuilders = {str(addStuffTab): buildAddTab, str(registerCoursesTab): buildRegisterTab, str(assignCoursesTab): buildAssignTab,
+               str(displayTab): buildDisplayTab, str(searchTab): buildSearchTab, str(editTab): buildEditTab, str(deleteTab): buildDeleteTab,
+               str(reportsTab): buildReportsTab, str(timetableTab): buildTimetableTab}
+
+def showTab(e=None):
+    """
+    Builds the selected tab on its first selection, reloads the treeview when the Display tab is selected after a change and
+    the reports or the timetable every time their tab is selected
+
+    Returns:
+        :return: none
+    """
+    global treeviewStale
+    tab = tabControl.select()
+    if tab in tabBuilders:
+        tabBuilders.pop(tab)()
+    elif tab == str(displayTab) and treeviewStale:
+        treeview.delete(*treeview.get_children())
+        fillTreeview()
+        treeviewStale = False
+    elif tab == str(reportsTab):
+        fillReports()
+    elif tab == str(timetableTab):
+        fillTimetable()
+
+tabControl.bind("<<NotebookTabChanged>>", showTab)
+showTab()
 
 root.mainloop()
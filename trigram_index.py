@@ -0,0 +1,293 @@
+"""
+Typo-tolerant search over the names and emails of the students and instructors and the names of the courses, backed
+by a trigram index stored in the database itself.
+
+Every indexed text is lower-cased and every word padded with two spaces in front and one behind, then cut into
+trigrams: ``"John Smith"`` gives ``"  j", " jo", "joh", "ohn", "hn ", "n  ", "  s", ...``. The ``search_trigrams``
+table holds one row per (trigram, record, field), kept up to date by triggers on the indexed tables, so any connection
+writing to the database keeps the index current. The trigrams are produced in SQL by joining the padded text with
+``search_positions``, a table of the numbers 1 to :data:`MAX_LENGTH`.
+
+A search cuts the query the same way and collects the records sharing enough trigrams with it or with one of its
+variants with two adjacent letters swapped (``"jonh"`` shares ``"  j"`` and ``" jo"`` with ``"john"``, and its variant
+``"john"`` all five), reading the postings of their rarest trigrams only. The candidates sharing the most trigrams are
+then ranked by the :class:`difflib.SequenceMatcher` similarity between the query and the closest words of the field.
+
+The indexed tables of either application are described by :data:`TKINTER` and :data:`PYQT`.
+
+Usage::
+
+    python trigram_index.py --pyqt school.db jonh smiht
+    python trigram_index.py --tkinter mySchool.db --kind course algrebra
+"""
+import argparse
+import heapq
+import math
+from difflib import SequenceMatcher
+
+import query_log
+
+# longest prefix of a text that is indexed, in characters after padding
+MAX_LENGTH = 256
+
+# trigram frequencies are only counted up to this, more frequent trigrams are ordered by their text
+FREQUENCY_CAP = 5000
+
+# kind of record -> table, key column and indexed fields (field name -> column) of the tkinter database (DDL_sql.py)
+TKINTER = {
+    'student': {'table': 'students', 'key': 'student_id', 'fields': {'name': 'name', 'email': 'email'}},
+    'instructor': {'table': 'instructors', 'key': 'instructor_id', 'fields': {'name': 'name', 'email': 'email'}},
+    'course': {'table': 'courses', 'key': 'course_id', 'fields': {'name': 'name'}},
+}
+
+# same for the PyQt database (school_db.init_db), records identified by their rowid
+PYQT = {
+    'student': {'table': 'students', 'key': 'id', 'fields': {'name': 'name', 'email': 'email'}},
+    'instructor': {'table': 'instructors', 'key': 'id', 'fields': {'name': 'name', 'email': 'email'}},
+    'course': {'table': 'courses', 'key': 'id', 'fields': {'name': 'course_name'}},
+}
+
+_TABLES = [
+    # record has no declared type so the integer keys of the PyQt database and the text keys of the tkinter one keep their type
+    '''CREATE TABLE IF NOT EXISTS search_trigrams (
+        gram TEXT NOT NULL, kind TEXT NOT NULL, field TEXT NOT NULL, record NOT NULL,
+        PRIMARY KEY (gram, kind, field, record)
+    ) WITHOUT ROWID''',
+    # used by the triggers to delete the trigrams of a record
+    'CREATE INDEX IF NOT EXISTS idx_search_trigrams_record ON search_trigrams (kind, record)',
+    'CREATE TABLE IF NOT EXISTS search_positions (n INTEGER PRIMARY KEY)',
+]
+
+
+def padded(text):
+    """
+    The text as it is cut into trigrams, see the module documentation.
+    """
+    return '  ' + text.lower().replace(' ', '  ') + ' '
+
+
+def trigrams(text):
+    """
+    The set of trigrams of a text, computed like the triggers do.
+    """
+    text = padded(text)[:MAX_LENGTH]
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _padded_sql(column):
+    """
+    SQL expression of :func:`padded` applied to a column, cut to :data:`MAX_LENGTH`.
+    """
+    return f"substr('  ' || replace(lower({column}), ' ', '  ') || ' ', 1, {MAX_LENGTH})"
+
+
+def _grams_select(kind, field, column, key, source):
+    """
+    SELECT producing the ``(gram, kind, field, record)`` rows of a column, for every row of ``source``.
+    """
+    return f'''SELECT substr(t, n, 3), '{kind}', '{field}', record
+               FROM (SELECT {key} AS record, {_padded_sql(column)} AS t FROM {source}) JOIN search_positions ON n <= length(t) - 2'''
+
+
+def _statements(schema):
+    """
+    The triggers keeping the index of every kind of record of ``schema`` up to date.
+    """
+    statements = []
+    for kind, spec in schema.items():
+        table, key = spec['table'], spec['key']
+        insert = ''.join(f"INSERT OR IGNORE INTO search_trigrams (gram, kind, field, record) "
+                         f"{_grams_select(kind, field, 'new.' + column, 'new.' + key, '(SELECT 1)')};\n"
+                         for field, column in spec['fields'].items())
+        # +old.key has no affinity, compared with old.key SQLite would convert record and could not use the index
+        delete = f"DELETE FROM search_trigrams WHERE kind = '{kind}' AND record = +old.{key};\n"
+        columns = ', '.join([key] + list(spec['fields'].values()))
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_insert AFTER INSERT ON {table} BEGIN\n{insert}END",
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_update AFTER UPDATE OF {columns} ON {table} BEGIN\n{delete}{insert}END",
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_delete AFTER DELETE ON {table} BEGIN\n{delete}END",
+        ]
+    return statements
+
+
+def create_index(conn, schema):
+    """
+    Creates the trigram index of a database with its triggers and indexes the records already there, in one
+    transaction. Does nothing to a database that already has it.
+
+    :param conn: An open connection to the database, with no transaction in progress.
+    :type conn: sqlite3.Connection
+    :param schema: :data:`TKINTER` or :data:`PYQT`.
+    :type schema: dict
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='search_trigrams'").fetchone():
+        return
+    conn.execute('BEGIN')
+    try:
+        for statement in _TABLES + _statements(schema):
+            conn.execute(statement)
+        conn.executemany('INSERT INTO search_positions (n) VALUES (?)', ((n,) for n in range(1, MAX_LENGTH + 1)))
+        for kind, spec in schema.items():
+            for field, column in spec['fields'].items():
+                conn.execute('INSERT OR IGNORE INTO search_trigrams (gram, kind, field, record) '
+                             + _grams_select(kind, field, column, spec['key'], spec['table']))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def swaps(text):
+    """
+    The variants of a text with two adjacent letters swapped, the most common typo.
+    """
+    return {text[:i] + text[i + 1] + text[i] + text[i + 2:] for i in range(len(text) - 1)
+            if text[i] != text[i + 1] and not text[i].isspace() and not text[i + 1].isspace()}
+
+
+def similarity(query, text, cutoff=0.0):
+    """
+    Similarity between 0 and 1 of the query and the words of ``text`` closest to it: the query is compared with every
+    run of as many consecutive words as it has. The runs that cannot reach ``cutoff`` are skipped without being
+    compared, 0 is returned if none can.
+    """
+    query, words = query.lower(), text.lower().split()
+    size = len(query.split())
+    runs = [' '.join(words)] if len(words) <= size else [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    letters = {x: query.count(x) for x in set(query)}
+    best = 0.0
+    for run in runs:
+        # upper bounds of the ratio, as SequenceMatcher.real_quick_ratio and quick_ratio but without building one
+        total = len(query) + len(run)
+        bound = max(best, cutoff) * total / 2
+        if min(len(query), len(run)) >= bound and sum(min(n, run.count(x)) for x, n in letters.items()) >= bound:
+            best = max(best, SequenceMatcher(None, query, run).ratio())
+    return best
+
+
+def search(conn, schema, query, kinds=None, fields=None, limit=50, min_shared=0.3, min_similarity=0.5):
+    """
+    Finds the records whose indexed fields are close to ``query``.
+
+    **Sphinx-style documentation**
+
+    :param conn: An open connection to a database with the index, see :func:`create_index`.
+    :type conn: sqlite3.Connection
+    :param schema: :data:`TKINTER` or :data:`PYQT`.
+    :type schema: dict
+    :param query: The text looked for, typos included.
+    :type query: str
+    :param kinds: The kinds of records searched (``student``, ``instructor``, ``course``), all by default.
+    :type kinds: list[str]
+    :param fields: The fields searched (``name``, ``email``), all by default.
+    :type fields: list[str]
+    :param limit: The maximum number of records returned.
+    :type limit: int
+    :param min_shared: Fraction of the trigrams of the query a field must share with the query or one of its
+        variants with two adjacent letters swapped to be found, it sets how many of their rarest trigrams are looked up.
+    :type min_shared: float
+    :param min_similarity: Minimum :func:`similarity` of a returned record.
+    :type min_similarity: float
+    :return: ``(similarity, kind, key, field)`` tuples by decreasing similarity, one per record (its best field).
+    :rtype: list
+    """
+    query = query.strip()
+    if not query:
+        return []
+    grams = trigrams(query)
+    kinds = kinds or list(schema)
+    fields = fields or sorted({x for spec in schema.values() for x in spec['fields']})
+    needed = math.ceil(min_shared * len(grams))
+    # the query and its variants with two adjacent letters swapped, "jonh" only shares "  j" and " jo" with "john"
+    variants = [query.lower(), *sorted(swaps(query.lower()))]
+    scored = sorted(set().union(*(trigrams(x) for x in variants)))
+    frequency = {x: conn.execute('SELECT COUNT(*) FROM (SELECT 1 FROM search_trigrams WHERE gram = ? LIMIT ?)',
+                                 (x, FREQUENCY_CAP)).fetchone()[0] for x in scored}
+    # A field sharing `needed` trigrams with a variant shares at least needed - common of its other trigrams, so when
+    # that is positive it contains one of the len(other) - needed + common + 1 rarest of them: only their postings are
+    # read. Otherwise the common trigrams alone could make a match, and the fields are required to contain one of the
+    # other trigrams too rather than reading the postings of the common ones.
+    rare = set()
+    for variant in variants:
+        other = sorted((x for x in trigrams(variant) if frequency[x] < FREQUENCY_CAP), key=lambda x: (frequency[x], x))
+        common = len(trigrams(variant)) - len(other)
+        rare.update(other[:len(other) - max(needed, common + 1) + common + 1])
+    rare = sorted(rare)
+    marks = lambda values: ', '.join('?' * len(values))
+    # the candidates are ranked on the trigrams they share with any variant, so "john" shares five with "jonh" where
+    # "jonas" shares three; +kind and CROSS JOIN keep SQLite from scanning the (kind, record) index for the postings
+    if rare:
+        candidates = f'''
+            SELECT c.record, COUNT(*) AS shared
+            FROM (SELECT DISTINCT record FROM search_trigrams WHERE gram IN ({marks(rare)}) AND +kind = ? AND field = ?) AS c
+            CROSS JOIN search_trigrams AS t ON t.kind = ? AND t.record = c.record AND t.field = ? AND +t.gram IN ({marks(scored)})
+            GROUP BY c.record HAVING shared >= ?'''
+        parameters = lambda kind, field: [*rare, kind, field, kind, field, *scored, needed]
+    else:
+        candidates = f'''
+            SELECT record, COUNT(*) AS shared FROM search_trigrams
+            WHERE gram IN ({marks(scored)}) AND +kind = ? AND field = ? GROUP BY record HAVING shared >= ?'''
+        parameters = lambda kind, field: [*scored, kind, field, needed]
+    # the limit * 4 candidates sharing the most trigrams are compared with the query, and the ones sharing as many as
+    # the last of them
+    top = lambda rows: [x for x in rows if x[3] >= rows[limit * 4 - 1][3]] if len(rows) > limit * 4 else rows
+    rows = []
+    for kind in kinds:
+        spec = schema[kind]
+        for field in fields:
+            if field in spec['fields']:
+                rows += top([(kind, record, field, shared) for record, shared in conn.execute(
+                    f'{candidates} ORDER BY shared DESC', parameters(kind, field)).fetchall()])
+    rows = top(sorted(rows, key=lambda x: -x[3]))
+
+    # every candidate is compared with the query, the ones that cannot reach the similarity of the limit-th record
+    # found so far (a lower bound of it, `kept`) being dismissed by the quick upper bounds of SequenceMatcher
+    best = {}
+    kept = []
+    for kind, record, field, shared in rows:
+        spec = schema[kind]
+        text = conn.execute(f"SELECT {spec['fields'][field]} FROM {spec['table']} WHERE {spec['key']} = ?", (record,)).fetchone()
+        if text is None:
+            continue
+        value = similarity(query, text[0], max(min_similarity, kept[0] if len(kept) == limit else 0))
+        if value >= min_similarity and value > best.get((kind, record), (0,))[0]:
+            if (kind, record) not in best:
+                heapq.heappush(kept, value)
+                if len(kept) > limit:
+                    heapq.heappop(kept)
+            best[(kind, record)] = (value, field)
+    results = [(value, kind, record, field) for (kind, record), (value, field) in best.items()]
+    results.sort(key=lambda x: (-x[0], x[1], str(x[2])))
+    return results[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typo-tolerant search of the students, instructors and courses of a database.")
+    database = parser.add_mutually_exclusive_group(required=True)
+    database.add_argument('--tkinter', metavar='PATH', help="database of the tkinter application")
+    database.add_argument('--pyqt', metavar='PATH', help="database of the PyQt application")
+    parser.add_argument('--kind', action='append', choices=['student', 'instructor', 'course'], help="kind of record searched, can be repeated (default: all)")
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('query', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.tkinter:
+        from DDL_sql import create_tables
+        conn = query_log.connect(args.tkinter)
+        create_tables(conn)
+        schema = TKINTER
+    else:
+        import school_db
+        school_db.DB_PATH = args.pyqt
+        school_db.init_db()
+        conn = school_db.connect()
+        schema = PYQT
+    for value, kind, key, field in search(conn, schema, ' '.join(args.query), args.kind, limit=args.limit):
+        spec = schema[kind]
+        text = conn.execute(f"SELECT {spec['fields'][field]} FROM {spec['table']} WHERE {spec['key']} = ?", (key,)).fetchone()[0]
+        print(f"  {value:.2f}  {kind:<10} {key}  {field}: {text}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Write-behind queue with group commit for bursts of small writes, such as many clerks registering students at once.
+
+Writes are queued and applied by one background thread on its own connection. The thread takes the operations that
+arrive within ``max_delay_ms`` of the first one (at most ``max_batch``) and runs them in one transaction, each inside
+a savepoint, so a failed operation is rolled back alone and the others are committed together. Every caller gets a
+:class:`concurrent.futures.Future` resolved once the transaction is committed, with the result of its operation or its
+exception (typically :class:`sqlite3.IntegrityError`). Throughput is then bounded by SQLite and not by one sync to disk
+per statement. If the writer thread stops on an error (no connection, failing ``on_rollback``), the queued operations
+fail with it and later calls raise :class:`RuntimeError`.
+
+The queue serves :mod:`school_service`. The tkinter and PyQt applications keep writing directly on their own
+connections: one user makes one write at a time and the window shows its outcome at once, so a group commit would only
+add the wait for the writer thread.
+
+Example::
+
+    queue = WriteBehindQueue(school_db.connect)
+    futures = [queue.call(school_db.insert_enrollment, s, 'C101') for s in student_ids]
+    results = [f.result() for f in futures]
+    queue.close()
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# put on the queue by close() to stop the writer thread
+_STOP = object()
+
+
+def _execute(conn, sql, params):
+    return conn.execute(sql, params).rowcount
+
+
+class WriteBehindQueue(object):
+    """
+    Queue of write operations applied in group commits by a background thread.
+
+    :param connect: Callable returning a new connection to the database, called once by the writer thread.
+    :type connect: callable
+    :param max_batch: Maximum number of operations per transaction.
+    :type max_batch: int
+    :param max_delay_ms: How long the writer waits for more operations after the first one of a transaction.
+    :type max_delay_ms: float
+    :param on_rollback: Called without argument when a whole transaction is rolled back, e.g. to reload caches the
+        operations updated.
+    :type on_rollback: callable
+    """
+    def __init__(self, connect, max_batch=256, max_delay_ms=5, on_rollback=None):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.on_rollback = on_rollback
+        # number of transactions committed and of operations they contained
+        self.commits = 0
+        self.operations = 0
+        self._connect = connect
+        self._pending = queue.Queue()
+        self._closed = False
+        # exception that stopped the writer thread, the operations queued after it fail at once
+        self._error = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def call(self, fn, *args):
+        """
+        Queues ``fn(conn, *args)``. The function must not commit or roll back.
+
+        :return: A future resolved with the return value of ``fn`` once committed, or with the exception it raised.
+        :rtype: concurrent.futures.Future
+        :raises RuntimeError: If the queue is closed or its writer thread stopped on an error.
+        """
+        with self._lock:
+            if self._error is not None:
+                raise RuntimeError(f"write queue stopped: {self._error!r}") from self._error
+            if self._closed:
+                raise RuntimeError("write queue is closed")
+            future = Future()
+            self._pending.put((fn, args, future))
+        return future
+
+    def submit(self, sql, params=()):
+        """
+        Queues one statement.
+
+        :return: A future resolved with the row count of the statement.
+        :rtype: concurrent.futures.Future
+        """
+        return self.call(_execute, sql, params)
+
+    def flush(self):
+        """
+        Waits until every operation queued so far is committed or failed.
+        """
+        self.call(lambda conn: None).result()
+
+    def close(self):
+        """
+        Applies the queued operations, then stops the writer thread and closes its connection.
+        """
+        if not self._closed:
+            self._closed = True
+            self._pending.put(_STOP)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        batch = []
+        try:
+            conn = self._connect()
+            try:
+                conn.isolation_level = None # transactions are handled explicitly
+                stop = False
+                while not stop:
+                    first = self._pending.get()
+                    if first is _STOP:
+                        break
+                    batch = [first]
+                    deadline = time.monotonic() + self.max_delay
+                    while len(batch) < self.max_batch:
+                        try:
+                            op = self._pending.get(timeout=max(0, deadline - time.monotonic()))
+                        except queue.Empty:
+                            break
+                        if op is _STOP:
+                            stop = True
+                            break
+                        batch.append(op)
+                    self._apply(conn, batch)
+            finally:
+                conn.close()
+        except Exception as e:
+            # the writer cannot go on (no connection, on_rollback failed...): the operations it holds and the queued
+            # ones fail with the error, and so do the later calls
+            with self._lock:
+                self._error = e
+                while True:
+                    try:
+                        op = self._pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    if op is not _STOP:
+                        batch.append(op)
+            for fn, args, future in batch:
+                if not future.done() and (future.running() or future.set_running_or_notify_cancel()):
+                    future.set_exception(e)
+
+    def _apply(self, conn, batch):
+        """
+        Runs a batch of operations in one transaction and resolves their futures.
+        """
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT operation')
+                try:
+                    result = fn(conn, *args)
+                except Exception as e:
+                    conn.execute('ROLLBACK TO operation')
+                    conn.execute('RELEASE operation')
+                    outcomes.append((future, False, e))
+                else:
+                    conn.execute('RELEASE operation')
+                    outcomes.append((future, True, result))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for fn, args, future in batch:
+                if not future.done():
+                    if future.running() or future.set_running_or_notify_cancel():
+                        future.set_exception(e)
+            if self.on_rollback is not None:
+                self.on_rollback()
+            return
+        self.commits += 1
+        self.operations += len(outcomes)
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)